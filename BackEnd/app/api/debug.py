@@ -0,0 +1,52 @@
+"""
+Rutas de diagnóstico: perfiles de peticiones lentas.
+Solo se registran si PROFILING_ENABLED=true y requieren el token de administración.
+"""
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from app.middleware.profiling import profile_store, is_admin_token, PROFILE_TOKEN_HEADER
+from app.utils.ids import validate_object_id
+
+
+async def require_admin_token(
+    token: Optional[str] = Header(None, alias=PROFILE_TOKEN_HEADER)
+):
+    """Rechaza la petición si no trae el token de administración."""
+    if not is_admin_token(token):
+        raise HTTPException(status_code=403, detail="Token de perfilado no válido")
+
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_admin_token)]
+)
+
+
+@router.get("/profiles", response_model=List[dict], status_code=200)
+async def list_profiles():
+    """
+    Lista los perfiles más lentos conservados, del más lento al más rápido.
+    """
+    return profile_store.slowest()
+
+
+@router.get("/profiles/{profile_id}", status_code=200)
+async def download_profile(profile_id: str, format: str = "txt"):
+    """
+    Descarga el informe de un perfil (`format=txt`) o el volcado de
+    cProfile (`format=prof`).
+    """
+    try:
+        validate_object_id(profile_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Perfil {profile_id} no encontrado")
+    if format not in ("txt", "prof"):
+        raise HTTPException(status_code=400, detail="Formato no válido: usa txt o prof")
+    path = profile_store.path(profile_id, format)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Perfil {profile_id} no encontrado")
+    return FileResponse(path, filename=f"profile-{profile_id}.{format}")
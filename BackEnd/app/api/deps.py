@@ -0,0 +1,52 @@
+"""
+Dependencias compartidas por las rutas: identidad de la petición.
+
+Las rutas de tareas reciben el espacio de trabajo con `Depends(get_workspace_id)`.
+Por defecto se lee de la cabecera `X-Workspace-Id`, que es obligatoria: una
+petición sin ella no debe acabar en el espacio de otro cliente. Una integración de
+autenticación lo sustituye sin tocar las rutas, p. ej. sacándolo de un token:
+
+    app.dependency_overrides[get_workspace_id] = workspace_from_jwt
+"""
+import re
+from typing import Optional
+from fastapi import Header, HTTPException
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db.repository import DEFAULT_WORKSPACE
+
+WORKSPACE_HEADER = "X-Workspace-Id"
+# Identificadores de espacio admitidos
+WORKSPACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class IdentitySettings(BaseSettings):
+    """Configuración de la identidad de las peticiones."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Rechazar las peticiones sin espacio (false = usar el espacio por defecto)
+    require_workspace: bool = True
+
+
+identity_settings = IdentitySettings()
+
+
+async def get_workspace_id(
+    workspace_id: Optional[str] = Header(None, alias=WORKSPACE_HEADER)
+) -> str:
+    """
+    Espacio de trabajo de la petición. Sin cabecera responde 401, salvo con
+    REQUIRE_WORKSPACE=false, que usa el espacio por defecto.
+    """
+    if workspace_id is None:
+        if identity_settings.require_workspace:
+            raise HTTPException(status_code=401, detail=f"Falta la cabecera {WORKSPACE_HEADER}")
+        return DEFAULT_WORKSPACE
+    if not WORKSPACE_ID_PATTERN.match(workspace_id):
+        raise HTTPException(status_code=400, detail=f"{WORKSPACE_HEADER} no válido: {workspace_id}")
+    return workspace_id
@@ -1,92 +1,415 @@
 """
 Rutas API para gestión de tareas.
 """
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from datetime import datetime
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
 
-from app.models.task import TaskCreate, TaskUpdate, TaskResponse
+from app.api.deps import get_workspace_id
+from app.models.task import (
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+    TaskSummaryResponse,
+    TASK_LIST_FIELDS
+)
+from app.models.task_import import ImportJobResponse
+from app.models.schedule import ConflictsResponse, CriticalPathResponse, ProjectScheduleResponse
+from app.models.suggestion import SuggestIndexResponse, TaskSuggestionList
+from app.models.workload import WorkloadResponse
 from app.services.task_service import (
     create_task_service,
     get_task_by_id_service,
     get_all_tasks_service,
+    count_tasks_service,
     update_task_service,
-    delete_task_service
+    delete_task_service,
+    TaskVersionConflict
+)
+from app.services.import_service import (
+    start_import_service,
+    get_import_job_service,
+    detect_import_format,
+    ImportFileTooLarge
+)
+from app.services.workload_service import get_workload_service, WorkloadRangeError
+from app.services.conflict_service import get_conflicts_service, check_task_conflicts_service
+from app.services.suggest_service import get_suggestions_service, rebuild_suggest_index_service
+from app.services.dependency_service import (
+    get_critical_path_service,
+    get_project_schedule_service,
+    TaskDependencyError
 )
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+# Máximo de IDs en la cabecera X-Schedule-Conflicts
+CONFLICT_HEADER_MAX_IDS = 50
+
+# Campos de una actualización que pueden crear un conflicto de calendario;
+# los cambios de estado (`completed`, `subtasks`) no mueven la tarea
+SCHEDULE_FIELDS = frozenset({"startDateTime", "endDateTime", "estimatedHours"})
+
+
+def _etag(version: int) -> str:
+    """ETag de una tarea: su versión entre comillas."""
+    return f'"{version}"'
+
+
+async def _set_conflict_header(response: Response, workspace_id: str, task_id: str):
+    """Añade X-Schedule-Conflicts con las tareas en conflicto, si las hay."""
+    conflicts = await check_task_conflicts_service(workspace_id, task_id, CONFLICT_HEADER_MAX_IDS)
+    if conflicts:
+        response.headers["X-Schedule-Conflicts"] = ",".join(conflicts)
+
+
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Extrae la versión de una cabecera If-Match ('"3"', 'W/"3"' o '3').
+    Retorna None si no hay cabecera o es '*'.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"If-Match no válido: {if_match}")
+
 
 @router.post("/", response_model=TaskResponse, status_code=201)
-async def create_task(payload: TaskCreate):
+async def create_task(
+    payload: TaskCreate,
+    response: Response,
+    workspace_id: str = Depends(get_workspace_id)
+):
     """
-    Crea una nueva tarea.
+    Crea una nueva tarea en el espacio de trabajo de la petición.
+    Si coincide con otras en días que superan la capacidad, sus IDs se
+    devuelven en la cabecera `X-Schedule-Conflicts`.
+    Responde 400 si `dependsOn` referencia tareas inexistentes.
     """
-    task = await create_task_service(payload)
+    try:
+        task = await create_task_service(workspace_id, payload)
+    except TaskDependencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if task is None:
         raise HTTPException(
             status_code=400,
             detail="No se pudo crear la tarea. Verifica los datos enviados."
         )
+    response.headers["ETag"] = _etag(task.version)
+    await _set_conflict_header(response, workspace_id, task.id)
     return task
 
 
+@router.post("/import", response_model=ImportJobResponse, status_code=202)
+async def import_tasks(
+    response: Response,
+    file: UploadFile = File(..., description="Archivo CSV o iCalendar (.ics)"),
+    format: Optional[str] = Query(None, pattern="^(csv|ics)$", description="Formato: csv o ics (por defecto, según el archivo)"),
+    workspace_id: str = Depends(get_workspace_id)
+):
+    """
+    Importa tareas desde un CSV o un calendario .ics en segundo plano.
+    Responde 202 con el trabajo; su estado se consulta en la URL de la
+    cabecera Location.
+    """
+    file_format = format or detect_import_format(file.filename, file.content_type)
+    if file_format is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Formato no reconocido: sube un .csv o .ics, o indica format"
+        )
+    try:
+        job = await start_import_service(workspace_id, file, file_format)
+    except ImportFileTooLarge as e:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El archivo supera el máximo de {e.max_bytes} bytes"
+        )
+    if job is None:
+        raise HTTPException(status_code=500, detail="No se pudo iniciar la importación")
+    response.headers["Location"] = f"{router.prefix}/import/{job.id}"
+    return job
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse, status_code=200)
+async def get_import_job(job_id: str, workspace_id: str = Depends(get_workspace_id)):
+    """
+    Obtiene el progreso de una importación: bytes y filas procesadas,
+    tareas importadas y filas rechazadas con su motivo.
+    """
+    job = await get_import_job_service(workspace_id, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Importación {job_id} no encontrada"
+        )
+    return job
+
+
+@router.get("/workload", response_model=WorkloadResponse, status_code=200)
+async def get_workload(
+    start: Optional[datetime] = Query(None, alias="from", description="Inicio del rango (por defecto, hoy a las 00:00 UTC)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Fin del rango (por defecto, WORKLOAD_DEFAULT_DAYS después)"),
+    bucket: str = Query("day", pattern="^(day|week)$", description="Intervalo: day o week"),
+    workspace_id: str = Depends(get_workspace_id)
+):
+    """
+    Obtiene la carga de trabajo pendiente por día o semana (UTC).
+    Las horas que faltan de cada tarea abierta se reparten por igual entre
+    su inicio y su fin; cada intervalo indica si supera la capacidad
+    (DAILY_CAPACITY_HOURS por día).
+    """
+    try:
+        workload = await get_workload_service(workspace_id, start, end, bucket)
+    except WorkloadRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if workload is None:
+        raise HTTPException(status_code=500, detail="No se pudo calcular la carga de trabajo")
+    return workload
+
+
+@router.get("/conflicts", response_model=ConflictsResponse, status_code=200)
+async def get_conflicts(
+    start: Optional[datetime] = Query(None, alias="from", description="Inicio del rango (por defecto, hoy a las 00:00 UTC)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Fin del rango (por defecto, WORKLOAD_DEFAULT_DAYS después)"),
+    workspace_id: str = Depends(get_workspace_id)
+):
+    """
+    Obtiene los conflictos de calendario: tramos de días (UTC) en los que
+    varias tareas abiertas se solapan y sus horas pendientes superan la
+    capacidad diaria, con las tareas implicadas.
+    """
+    try:
+        conflicts = await get_conflicts_service(workspace_id, start, end)
+    except WorkloadRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if conflicts is None:
+        raise HTTPException(status_code=500, detail="No se pudieron calcular los conflictos")
+    return conflicts
+
+
+@router.get("/suggest", response_model=TaskSuggestionList, status_code=200)
+async def suggest_tasks(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto escrito hasta ahora"),
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de sugerencias"),
+    workspace_id: str = Depends(get_workspace_id)
+):
+    """
+    Sugiere tareas por título mientras se escribe: coincidencias por
+    prefijo de palabra y, si faltan, títulos parecidos (tolera erratas).
+    Se resuelve en memoria, sin consultar la base de datos.
+    """
+    suggestions = await get_suggestions_service(workspace_id, q, limit)
+    if suggestions is None:
+        raise HTTPException(status_code=500, detail="No se pudieron obtener sugerencias")
+    return suggestions
+
+
+@router.post("/suggest/rebuild", response_model=SuggestIndexResponse, status_code=200)
+async def rebuild_suggest_index(workspace_id: str = Depends(get_workspace_id)):
+    """
+    Reconstruye desde la base de datos el índice de títulos del espacio en
+    el worker que atiende la petición (los demás lo reconstruyen al
+    caducar, tras WORKSPACE_INDEX_MAX_AGE_SECONDS).
+    """
+    result = await rebuild_suggest_index_service(workspace_id)
+    if result is None:
+        raise HTTPException(status_code=500, detail="No se pudo reconstruir el índice de títulos")
+    return result
+
+
+@router.get("/schedule", response_model=ProjectScheduleResponse, status_code=200)
+async def get_project_schedule(
+    criticalOnly: bool = Query(False, description="Solo las tareas sin holgura"),
+    includeCompleted: bool = Query(False, description="Incluir las tareas completadas"),
+    skip: int = Query(0, ge=0, description="Número de tareas a saltar"),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de tareas"),
+    workspace_id: str = Depends(get_workspace_id)
+):
+    """
+    Obtiene la planificación del espacio por el método del camino crítico:
+    inicio y fin más tempranos y más tardíos y holgura de cada tarea, en
+    horas desde el inicio del proyecto, según `dependsOn` y las horas
+    pendientes. Ordenada por inicio más temprano.
+    """
+    schedule = await get_project_schedule_service(
+        workspace_id,
+        critical_only=criticalOnly,
+        include_completed=includeCompleted,
+        skip=skip,
+        limit=limit
+    )
+    if schedule is None:
+        raise HTTPException(status_code=500, detail="No se pudo calcular la planificación")
+    return schedule
+
+
 @router.get("/{task_id}", response_model=TaskResponse, status_code=200)
-async def get_task(task_id: str):
+async def get_task(
+    task_id: str,
+    response: Response,
+    workspace_id: str = Depends(get_workspace_id)
+):
     """
-    Obtiene una tarea por su ID.
+    Obtiene una tarea por su ID. La cabecera ETag lleva su versión.
     """
-    task = await get_task_by_id_service(task_id)
+    task = await get_task_by_id_service(workspace_id, task_id)
     if task is None:
         raise HTTPException(
             status_code=404,
             detail=f"Tarea con ID {task_id} no encontrada"
         )
+    response.headers["ETag"] = _etag(task.version)
     return task
 
 
-@router.get("/", response_model=List[TaskResponse], status_code=200)
+@router.get("/{task_id}/critical-path", response_model=CriticalPathResponse, status_code=200)
+async def get_critical_path(task_id: str, workspace_id: str = Depends(get_workspace_id)):
+    """
+    Obtiene la cadena de dependencias más larga que pasa por una tarea,
+    desde la primera tarea que la retrasa hasta la última que depende de
+    ella, con la planificación de cada paso.
+    """
+    critical_path = await get_critical_path_service(workspace_id, task_id)
+    if critical_path is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Tarea con ID {task_id} no encontrada"
+        )
+    return critical_path
+
+
+@router.get(
+    "/",
+    response_model=List[Union[TaskResponse, TaskSummaryResponse]],
+    response_model_exclude_none=True,
+    status_code=200
+)
 async def get_tasks(
+    response: Response,
     completed: Optional[bool] = Query(None, description="Filtrar por estado de completado"),
     sortBy: Optional[str] = Query(None, description="Ordenamiento: recent, oldest, dueDate, title, progress, duration"),
     filterBy: Optional[str] = Query(None, description="Filtro: all, completed, inProgress, overdue, today"),
     search: Optional[str] = Query(None, description="Búsqueda de texto en título y descripción"),
     skip: int = Query(0, ge=0, description="Número de documentos a saltar"),
-    limit: int = Query(100, ge=1, le=1000, description="Número máximo de documentos")
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de documentos"),
+    fields: Optional[str] = Query(None, description="Campos a devolver separados por comas"),
+    view: Optional[str] = Query(None, pattern="^(full|summary)$", description="Vista: full o summary"),
+    withTotal: bool = Query(False, description="Incluir el total de tareas en la cabecera X-Total-Count"),
+    includeArchived: bool = Query(False, description="Incluir las tareas archivadas"),
+    workspace_id: str = Depends(get_workspace_id)
 ):
     """
     Obtiene todas las tareas con filtros opcionales y ordenamiento.
+    Con `fields` o `view=summary` devuelve solo los campos pedidos; la vista
+    resumida sustituye las subtareas por sus contadores.
+    Con `withTotal=true` el total sin paginar se devuelve en `X-Total-Count`.
+    Con `includeArchived=true` se mezclan las tareas archivadas (`archived: true`).
     """
-    tasks = await get_all_tasks_service(
+    field_list = None
+    if fields:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+        invalid = [f for f in field_list if f not in TASK_LIST_FIELDS]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos no válidos: {', '.join(invalid)}"
+            )
+    
+    list_call = get_all_tasks_service(
+        workspace_id,
         completed=completed,
         sort_by=sortBy,
         filter_by=filterBy,
         search=search,
         skip=skip,
-        limit=limit
+        limit=limit,
+        fields=field_list,
+        view=view,
+        include_archived=includeArchived
     )
+    if not withTotal:
+        return await list_call
+    
+    # El conteo se lanza en paralelo con el listado
+    tasks, total = await asyncio.gather(
+        list_call,
+        count_tasks_service(
+            workspace_id,
+            completed=completed,
+            filter_by=filterBy,
+            search=search,
+            include_archived=includeArchived
+        )
+    )
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
     return tasks
 
 
 @router.put("/{task_id}", response_model=TaskResponse, status_code=200)
-async def update_task(task_id: str, payload: TaskUpdate):
+async def update_task(
+    task_id: str,
+    payload: TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match"),
+    workspace_id: str = Depends(get_workspace_id)
+):
     """
     Actualiza una tarea existente.
+    
+    Con la cabecera `If-Match` (ETag de la tarea) o `expectedVersion` en el
+    cuerpo, la actualización solo se aplica si la tarea sigue en esa
+    versión; si no, responde 409 con la versión actual en ETag.
+    Si cambian las fechas o las horas, las tareas en conflicto de
+    calendario se indican en `X-Schedule-Conflicts`.
+    Responde 400 si `dependsOn` referencia tareas inexistentes o crea un ciclo.
     """
-    task = await update_task_service(task_id, payload)
+    expected_version = _parse_if_match(if_match)
+    if payload.expectedVersion is not None:
+        if expected_version is not None and expected_version != payload.expectedVersion:
+            raise HTTPException(
+                status_code=400,
+                detail="If-Match y expectedVersion indican versiones distintas"
+            )
+        expected_version = payload.expectedVersion
+    
+    try:
+        task = await update_task_service(workspace_id, task_id, payload, expected_version)
+    except TaskVersionConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"La tarea {task_id} fue modificada por otra petición "
+                f"(versión actual {e.current_version})"
+            ),
+            headers={"ETag": _etag(e.current_version)}
+        )
+    except TaskDependencyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if task is None:
         raise HTTPException(
             status_code=404,
             detail=f"Tarea con ID {task_id} no encontrada o datos inválidos"
         )
+    response.headers["ETag"] = _etag(task.version)
+    if payload.model_fields_set & SCHEDULE_FIELDS:
+        await _set_conflict_header(response, workspace_id, task.id)
     return task
 
 
 @router.delete("/{task_id}", status_code=204)
-async def delete_task(task_id: str):
+async def delete_task(task_id: str, workspace_id: str = Depends(get_workspace_id)):
     """
-    Elimina una tarea.
+    Elimina una tarea, activa o archivada.
     """
-    deleted = await delete_task_service(task_id)
+    deleted = await delete_task_service(workspace_id, task_id)
     if not deleted:
         raise HTTPException(
             status_code=404,
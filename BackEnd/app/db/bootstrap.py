@@ -0,0 +1,153 @@
+"""
+Inicialización única de la base de datos (índices y migraciones).
+
+Cuando varios workers arrancan a la vez, cada paso se protege con un documento
+de bloqueo en la colección `bootstrap`: solo un proceso lo ejecuta y el resto
+espera a que quede registrada la versión aplicada.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from pymongo.errors import DuplicateKeyError
+
+from app.db import database
+from app.db.mongo_repository import MongoTaskRepository
+
+logger = logging.getLogger(__name__)
+
+LOCK_TTL_SECONDS = 120
+WAIT_TIMEOUT_SECONDS = 120
+POLL_INTERVAL_SECONDS = 0.5
+
+
+def _lock_owner() -> str:
+    """Identificador del proceso que intenta tomar el bloqueo."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _applied_version(name: str) -> int:
+    """Retorna la versión registrada para un paso de inicialización."""
+    state = await database.db.bootstrap.find_one({"_id": name})
+    return state.get("version", 0) if state else 0
+
+
+async def run_once(
+    name: str,
+    version: int,
+    step: Callable[[], Awaitable[None]]
+) -> bool:
+    """
+    Ejecuta un paso de inicialización una sola vez por versión.
+
+    Parámetros:
+    - `name`: Nombre del paso (p. ej. 'task_indexes').
+    - `version`: Versión del paso; se vuelve a ejecutar si aumenta.
+    - `step`: Corrutina que aplica el paso.
+
+    Retorna:
+    - True si este proceso ejecutó el paso, False si ya estaba aplicado.
+
+    Lanza:
+    - TimeoutError: Si otro proceso retiene el bloqueo demasiado tiempo.
+    """
+    if await _applied_version(name) >= version:
+        return False
+
+    lock_id = f"{name}:lock"
+    owner = _lock_owner()
+    now = datetime.now(timezone.utc)
+    try:
+        # Inserta el bloqueo o toma uno caducado; si hay uno vigente el
+        # upsert choca con el _id existente y lanza DuplicateKeyError.
+        await database.db.bootstrap.find_one_and_update(
+            {"_id": lock_id, "expires_at": {"$lt": now}},
+            {"$set": {
+                "owner": owner,
+                "expires_at": now + timedelta(seconds=LOCK_TTL_SECONDS)
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        logger.info(f"Esperando a que otro proceso aplique '{name}'")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + WAIT_TIMEOUT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            if await _applied_version(name) >= version:
+                return False
+        raise TimeoutError(f"Tiempo de espera agotado para '{name}'")
+
+    try:
+        if await _applied_version(name) >= version:
+            return False
+        await step()
+        await database.db.bootstrap.update_one(
+            {"_id": name},
+            {"$set": {"version": version, "applied_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        logger.info(f"Paso de inicialización aplicado: {name} v{version}")
+        return True
+    finally:
+        await database.db.bootstrap.delete_one({"_id": lock_id, "owner": owner})
+
+
+async def acquire_lease(name: str, seconds: float) -> bool:
+    """
+    Intenta reservar una tarea periódica durante `seconds` segundos, para
+    que solo la ejecute uno de los procesos que comparten la base de datos.
+    La reserva no se libera: caduca sola, y el siguiente turno es de quien
+    la tome primero. Con un backend en proceso siempre se obtiene.
+
+    Retorna:
+    - True si este proceso obtuvo la reserva.
+    """
+    if not isinstance(database.task_repository, MongoTaskRepository):
+        return True
+    now = datetime.now(timezone.utc)
+    try:
+        await database.db.bootstrap.find_one_and_update(
+            {"_id": f"{name}:lease", "expires_at": {"$lt": now}},
+            {"$set": {"owner": _lock_owner(), "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def _init_import_job_indexes():
+    # Los estados de importación se borran solos al pasar `expires_at`
+    await database.db.import_jobs.create_index("expires_at", expireAfterSeconds=0)
+
+
+async def bootstrap_database():
+    """
+    Aplica índices y migraciones pendientes. Seguro de llamar desde varios
+    procesos a la vez.
+
+    Lanza:
+    - RuntimeError: Si el almacenamiento no está inicializado.
+    - Cualquier error de MongoDB al migrar o crear índices, para que
+      `serve.py` no arranque los workers sin ellos.
+    """
+    repository = database.task_repository
+    if repository is None:
+        raise RuntimeError("almacenamiento no inicializado")
+    try:
+        if not isinstance(repository, MongoTaskRepository):
+            # Los backends en proceso no comparten estado entre workers
+            await repository.init_indexes()
+            return
+        # Primero las migraciones: los índices nuevos dependen de `workspace_id`
+        await run_once("task_migrations", MongoTaskRepository.MIGRATIONS_VERSION, repository.migrate)
+        await run_once("task_indexes", MongoTaskRepository.INDEXES_VERSION, repository.init_indexes)
+        await run_once("import_job_indexes", 1, _init_import_job_indexes)
+        # Idempotente: se aplica siempre para recoger cambios del plazo de purga
+        await repository.init_archive()
+    except Exception as e:
+        logger.error(f"Error al crear índices: {e}")
+        raise
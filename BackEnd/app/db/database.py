@@ -1,12 +1,18 @@
 """
 Configuración de la conexión a MongoDB usando Motor (async).
 """
+import asyncio
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from typing import Optional
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
 
+from app.db.monitoring import CommandRecorder
+from app.db.repository import TaskRepository
+from app.db.mongo_repository import MongoTaskRepository
+from app.db.memory_repository import MemoryTaskRepository
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,6 +26,20 @@ class DatabaseSettings(BaseSettings):
     
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "intellitasker"
+    # Presupuesto total de conexiones, repartido entre todos los workers
+    mongodb_max_pool_size: int = 100
+    mongodb_min_pool_size: int = 0
+    # Número de procesos que sirven la API (lo fija serve.py)
+    web_concurrency: int = 1
+    # Crear índices y migraciones en el lifespan de cada worker
+    init_indexes_on_startup: bool = True
+    # Backend de almacenamiento: 'mongo' o 'memory'
+    storage_backend: str = "mongo"
+    # Snapshot en disco del backend en memoria (vacío = sin persistencia)
+    memory_snapshot_path: str = ""
+    memory_snapshot_interval: int = 0
+    # Días que se conservan las tareas archivadas (0 = para siempre)
+    archive_purge_after_days: float = 0
 
 
 db_settings = DatabaseSettings()
@@ -28,6 +48,27 @@ db_settings = DatabaseSettings()
 client: Optional[AsyncIOMotorClient] = None
 db: Optional[AsyncIOMotorDatabase] = None
 
+# Repositorio de tareas activo
+task_repository: Optional[TaskRepository] = None
+
+
+def archive_ttl_seconds() -> int:
+    """Plazo de purga del archivo en segundos (0 = sin purga)."""
+    return int(db_settings.archive_purge_after_days * 86400)
+
+
+def worker_pool_sizes() -> tuple[int, int]:
+    """
+    Reparte el presupuesto de conexiones entre los workers.
+    
+    Retorna:
+    - Tupla (maxPoolSize, minPoolSize) para el cliente de este proceso.
+    """
+    workers = max(1, db_settings.web_concurrency)
+    max_pool = max(1, db_settings.mongodb_max_pool_size // workers)
+    min_pool = min(max_pool, db_settings.mongodb_min_pool_size // workers)
+    return max_pool, min_pool
+
 
 async def connect_to_mongo():
     """
@@ -35,20 +76,43 @@ async def connect_to_mongo():
     """
     global client, db
     try:
+        max_pool, min_pool = worker_pool_sizes()
         client = AsyncIOMotorClient(
             db_settings.mongodb_url,
             uuidRepresentation="standard",
-            serverSelectionTimeoutMS=5000
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=max_pool,
+            minPoolSize=min_pool,
+            # Solo registra comandos si hay una captura de perfilado activa
+            event_listeners=[CommandRecorder()]
         )
         db = client[db_settings.database_name]
         # Verificar conexión
         await client.admin.command('ping')
-        logger.info(f"Conectado a MongoDB: {db_settings.database_name}")
+        logger.info(
+            f"Conectado a MongoDB: {db_settings.database_name}, "
+            f"pool: {min_pool}-{max_pool} conexiones"
+        )
     except Exception as e:
         logger.error(f"Error al conectar a MongoDB: {e}")
         raise
 
 
+async def warm_up_connection():
+    """
+    Abre conexiones del pool y toca la colección de tareas antes de
+    declarar el worker como listo.
+    """
+    if client is None or db is None:
+        return
+    _, min_pool = worker_pool_sizes()
+    await asyncio.gather(
+        *(client.admin.command('ping') for _ in range(max(1, min_pool)))
+    )
+    await db.tasks.find_one({}, {"_id": 1})
+    logger.info("Conexión a MongoDB precalentada")
+
+
 async def close_mongo_connection():
     """
     Cierra la conexión a MongoDB.
@@ -58,3 +122,39 @@ async def close_mongo_connection():
         client.close()
         logger.info("Conexión a MongoDB cerrada")
 
+
+
+async def connect_storage():
+    """
+    Inicializa el backend de almacenamiento configurado en `storage_backend`.
+    """
+    global task_repository
+    if db_settings.storage_backend == "memory":
+        repository = MemoryTaskRepository(
+            snapshot_path=db_settings.memory_snapshot_path,
+            snapshot_interval=db_settings.memory_snapshot_interval,
+            archive_ttl_seconds=archive_ttl_seconds()
+        )
+        await repository.open()
+        task_repository = repository
+        logger.info("Almacenamiento en memoria inicializado")
+    elif db_settings.storage_backend == "mongo":
+        await connect_to_mongo()
+        task_repository = MongoTaskRepository(
+            db.tasks,
+            archive=db.tasks_archive,
+            archive_ttl_seconds=archive_ttl_seconds()
+        )
+    else:
+        raise ValueError(f"Backend de almacenamiento desconocido: {db_settings.storage_backend}")
+
+
+async def close_storage():
+    """
+    Cierra el backend de almacenamiento activo.
+    """
+    global task_repository
+    if task_repository:
+        await task_repository.close()
+        task_repository = None
+    await close_mongo_connection()
@@ -0,0 +1,634 @@
+"""
+Repositorio de tareas en memoria del proceso.
+
+Pensado para pruebas y despliegues pequeños sin MongoDB. Las tareas se
+guardan como registros compactos (`__slots__`) y se mantienen índices
+secundarios ordenados sobre `created_at`, `endDateTime`, `startDateTime`,
+`title` y `completed`, todos con el espacio de trabajo como prefijo. Opcionalmente se persiste un snapshot BSON en disco.
+Las tareas archivadas se guardan en un segundo almacén con los mismos índices.
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import bson
+from bson import ObjectId
+
+from app.db.repository import (
+    DEFAULT_WORKSPACE,
+    TaskKey,
+    TaskRepository,
+    TaskQuery,
+    TaskProjection,
+    UpdateGuard,
+    resolve_sort,
+    today_bounds
+)
+from app.utils.dates import to_stored
+
+logger = logging.getLogger(__name__)
+
+INDEXED_FIELDS = ("created_at", "endDateTime", "startDateTime", "title", "completed")
+
+# Si el filtro deja menos de 1/N de las tareas, ordenar los candidatos
+# directamente es más barato que recorrer el índice de ordenamiento.
+_SORT_CANDIDATES_RATIO = 8
+
+
+def _normalize(value):
+    """Convierte fechas a UTC sin zona y con precisión de milisegundos, como Motor."""
+    if isinstance(value, datetime):
+        return to_stored(value)
+    return value
+
+
+def _archived_doc(doc: dict) -> dict:
+    """Marca un documento leído del archivo, como hace `$addFields` en MongoDB."""
+    doc["archived"] = True
+    return doc
+
+
+class _Top:
+    """Valor mayor que cualquier ObjectId, para acotar rangos de índices."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_TOP = _Top()
+
+
+class _SortedIndex:
+    """
+    Índice secundario: lista ordenada de ternas (espacio, clave, _id). Como
+    en un índice compuesto de MongoDB, cada consulta acota primero el rango
+    de su espacio con una búsqueda binaria, así que su coste no depende del
+    número de espacios.
+    """
+
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries: list = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, scope: str, key, oid: ObjectId):
+        if key is not None:
+            bisect.insort(self.entries, (scope, key, oid))
+
+    def remove(self, scope: str, key, oid: ObjectId):
+        if key is None:
+            return
+        i = bisect.bisect_left(self.entries, (scope, key, oid))
+        if i < len(self.entries) and self.entries[i] == (scope, key, oid):
+            del self.entries[i]
+
+    def _bounds(self, scope: str, low, high, low_inclusive: bool, high_inclusive: bool):
+        if low is None:
+            probe = (scope,)
+        else:
+            probe = (scope, low) if low_inclusive else (scope, low, _TOP)
+        start = bisect.bisect_left(self.entries, probe)
+        if high is None:
+            probe = (scope, _TOP)
+        else:
+            probe = (scope, high, _TOP) if high_inclusive else (scope, high)
+        end = bisect.bisect_left(self.entries, probe, lo=start)
+        return start, end
+
+    def count(self, scope: str, low=None, high=None, low_inclusive=True, high_inclusive=True) -> int:
+        start, end = self._bounds(scope, low, high, low_inclusive, high_inclusive)
+        return end - start
+
+    def range(
+        self,
+        scope: str,
+        low=None,
+        high=None,
+        low_inclusive=True,
+        high_inclusive=True
+    ) -> Iterator[ObjectId]:
+        start, end = self._bounds(scope, low, high, low_inclusive, high_inclusive)
+        for i in range(start, end):
+            yield self.entries[i][2]
+
+    def ordered(self, scope: str, reverse: bool = False) -> Iterator[ObjectId]:
+        start, end = self._bounds(scope, None, None, True, True)
+        indexes = range(end - 1, start - 1, -1) if reverse else range(start, end)
+        for i in indexes:
+            yield self.entries[i][2]
+
+
+class _TaskRecord:
+    """Tarea almacenada de forma compacta; las subtareas son tuplas."""
+
+    __slots__ = (
+        "_id", "workspace_id", "title", "description", "startDateTime", "endDateTime",
+        "estimatedHours", "completed", "subtasks", "created_at", "updated_at",
+        "version", "extra"
+    )
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "_TaskRecord":
+        record = cls()
+        extra = dict(doc)
+        record._id = extra.pop("_id")
+        # Snapshots anteriores a `workspace_id`: mismo criterio que la migración de MongoDB
+        record.workspace_id = extra.pop("workspace_id", DEFAULT_WORKSPACE)
+        record.title = extra.pop("title", "")
+        record.description = extra.pop("description", "")
+        record.startDateTime = _normalize(extra.pop("startDateTime", None))
+        record.endDateTime = _normalize(extra.pop("endDateTime", None))
+        record.estimatedHours = extra.pop("estimatedHours", 0.0)
+        record.completed = extra.pop("completed", False)
+        record.subtasks = tuple(
+            (st["_id"], st["title"], st["estimatedHours"], st.get("completed", False))
+            for st in extra.pop("subtasks", [])
+        )
+        record.created_at = _normalize(extra.pop("created_at", None))
+        record.updated_at = _normalize(extra.pop("updated_at", None))
+        record.version = extra.pop("version", 0)
+        record.extra = {k: _normalize(v) for k, v in extra.items()} or None
+        return record
+
+    def _subtask_docs(self) -> list:
+        return [
+            {"_id": oid, "title": title, "estimatedHours": hours, "completed": completed}
+            for oid, title, hours, completed in self.subtasks
+        ]
+
+    def to_doc(self) -> dict:
+        doc = {
+            "_id": self._id,
+            "workspace_id": self.workspace_id,
+            "title": self.title,
+            "description": self.description,
+            "startDateTime": self.startDateTime,
+            "endDateTime": self.endDateTime,
+            "estimatedHours": self.estimatedHours,
+            "completed": self.completed,
+            "subtasks": self._subtask_docs(),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "version": self.version,
+        }
+        if self.extra:
+            doc.update(self.extra)
+        return doc
+
+    def project(self, projection: TaskProjection) -> dict:
+        """Documento parcial con los campos de `projection`."""
+        doc = {"_id": self._id}
+        for field in projection.fields:
+            if field == "subtasks":
+                doc["subtasks"] = self._subtask_docs()
+            elif field in self.__slots__:
+                doc[field] = getattr(self, field)
+            elif self.extra and field in self.extra:
+                doc[field] = self.extra[field]
+        if projection.subtask_counts:
+            doc["subtaskCount"] = len(self.subtasks)
+            doc["completedSubtaskCount"] = sum(1 for st in self.subtasks if st[3])
+        if projection.completed_subtask_hours:
+            doc["completedSubtaskHours"] = sum(st[2] for st in self.subtasks if st[3])
+        return doc
+
+    def satisfies(self, guard: Optional[UpdateGuard]) -> bool:
+        """True si la tarea cumple las condiciones de `guard`."""
+        if guard is None:
+            return True
+        if guard.version is not None and self.version != guard.version:
+            return False
+        if guard.start_before is not None and not self.startDateTime < _normalize(guard.start_before):
+            return False
+        if guard.end_after is not None and not self.endDateTime > _normalize(guard.end_after):
+            return False
+        return True
+
+
+class MemoryTaskRepository(TaskRepository):
+    """Repositorio de tareas en memoria con índices ordenados."""
+
+    def __init__(
+        self,
+        snapshot_path: str = "",
+        snapshot_interval: int = 0,
+        archive_ttl_seconds: int = 0
+    ):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.archive_ttl_seconds = archive_ttl_seconds
+        self._records: Dict[ObjectId, _TaskRecord] = {}
+        self._indexes: Dict[str, _SortedIndex] = {
+            field: _SortedIndex() for field in INDEXED_FIELDS
+        }
+        # Tareas archivadas (con `archived_at`); se crea al archivar la primera
+        self._archive: Optional["MemoryTaskRepository"] = None
+        self._dirty = False
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    async def open(self) -> None:
+        """Carga el snapshot, si existe, y arranca el guardado periódico."""
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            await asyncio.to_thread(self._load_snapshot)
+            logger.info(
+                f"Snapshot cargado: {len(self._records)} tareas desde {self.snapshot_path}"
+            )
+        if self.snapshot_path and self.snapshot_interval > 0:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def init_indexes(self) -> None:
+        # Los índices se mantienen en cada escritura
+        logger.info("Índices en memoria listos")
+
+    # Mantenimiento de índices
+
+    def _add(self, record: _TaskRecord):
+        self._records[record._id] = record
+        for field, index in self._indexes.items():
+            index.add(record.workspace_id, getattr(record, field), record._id)
+        self._dirty = True
+
+    def _remove(self, record: _TaskRecord):
+        del self._records[record._id]
+        for field, index in self._indexes.items():
+            index.remove(record.workspace_id, getattr(record, field), record._id)
+        self._dirty = True
+
+    def _replace(self, old: _TaskRecord, new: _TaskRecord):
+        self._records[new._id] = new
+        for field, index in self._indexes.items():
+            old_key = getattr(old, field)
+            new_key = getattr(new, field)
+            if old_key != new_key:
+                index.remove(old.workspace_id, old_key, old._id)
+                index.add(new.workspace_id, new_key, new._id)
+        self._dirty = True
+
+    # Operaciones del repositorio
+
+    async def insert(self, document: dict) -> dict:
+        if "_id" not in document:
+            # Igual que insert_one, el _id generado queda en el documento original
+            document["_id"] = ObjectId()
+        record = _TaskRecord.from_doc(document)
+        self._add(record)
+        return record.to_doc()
+
+    async def insert_many(self, documents: List[dict]) -> int:
+        for document in documents:
+            self._add(_TaskRecord.from_doc(document))
+        return len(documents)
+
+    def _lookup(self, workspace_id: str, task_id: ObjectId) -> Optional[_TaskRecord]:
+        """Registro de la tarea si existe y pertenece al espacio."""
+        record = self._records.get(task_id)
+        if record is None or record.workspace_id != workspace_id:
+            return None
+        return record
+
+    def _scope_size(self, workspace_id: str) -> int:
+        """Tareas del espacio, contadas sobre el índice de `created_at`."""
+        return self._indexes["created_at"].count(workspace_id)
+
+    async def get(
+        self,
+        workspace_id: str,
+        task_id: ObjectId,
+        include_archived: bool = False
+    ) -> Optional[dict]:
+        record = self._lookup(workspace_id, task_id)
+        if record is not None:
+            return record.to_doc()
+        if include_archived and self._archive is not None:
+            record = self._archive._lookup(workspace_id, task_id)
+            if record is not None:
+                return _archived_doc(record.to_doc())
+        return None
+
+    async def find(
+        self,
+        query: TaskQuery,
+        sort_by: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        projection: Optional[TaskProjection] = None
+    ) -> List[dict]:
+        sort_key, sort_direction = resolve_sort(sort_by)
+        records = self._query(query, sort_key, sort_direction)
+        archive = self._archive
+        if query.include_archived and archive is not None and archive._records:
+            # Ambos recorridos ya vienen ordenados por (clave, _id)
+            records = heapq.merge(
+                records,
+                archive._query(query, sort_key, sort_direction),
+                key=lambda r: (getattr(r, sort_key), r._id),
+                reverse=sort_direction < 0
+            )
+        page = islice(records, skip, skip + limit)
+        docs = []
+        for record in page:
+            doc = record.project(projection) if projection is not None else record.to_doc()
+            if record._id not in self._records:
+                doc = _archived_doc(doc)
+            docs.append(doc)
+        return docs
+
+    async def scan(self, query: TaskQuery, projection: TaskProjection) -> List[dict]:
+        candidates = self._candidates(query)
+        if candidates is None:
+            candidates = self._indexes["created_at"].range(query.workspace_id)
+        pool = (self._records[oid] for oid in candidates)
+        return [record.project(projection) for record in self._matching(pool, query)]
+
+    async def workspace_ids(self, limit: int) -> List[str]:
+        last_update: Dict[str, datetime] = {}
+        for record in self._records.values():
+            current = last_update.get(record.workspace_id)
+            if current is None or record.updated_at > current:
+                last_update[record.workspace_id] = record.updated_at
+        recent = heapq.nsmallest(limit, last_update.items(), key=lambda item: (-item[1].timestamp(), item[0]))
+        return [workspace_id for workspace_id, _ in recent]
+
+    async def count(self, query: TaskQuery) -> int:
+        total = 0
+        if query.include_archived and self._archive is not None:
+            total = await self._archive.count(TaskQuery(
+                workspace_id=query.workspace_id,
+                completed=query.completed,
+                filter_by=query.filter_by,
+                search=query.search,
+                window=query.window
+            ))
+        if query.is_unfiltered():
+            return total + self._scope_size(query.workspace_id)
+        candidates = self._candidates(query)
+        if candidates is None:
+            candidates = self._indexes["created_at"].range(query.workspace_id)
+        pool = (self._records[oid] for oid in candidates)
+        return total + sum(1 for _ in self._matching(pool, query))
+
+    def _apply(self, old: _TaskRecord, fields: dict, increment: int) -> _TaskRecord:
+        doc = old.to_doc()
+        doc.update(fields)
+        doc["version"] = old.version + increment
+        new = _TaskRecord.from_doc(doc)
+        self._replace(old, new)
+        return new
+
+    async def update(
+        self,
+        workspace_id: str,
+        task_id: ObjectId,
+        fields: dict,
+        guard: Optional[UpdateGuard] = None
+    ) -> Optional[dict]:
+        # Sin await entre la comprobación y la escritura: atómico en el event loop
+        old = self._lookup(workspace_id, task_id)
+        if old is None or not old.satisfies(guard):
+            return None
+        return self._apply(old, fields, 1).to_doc()
+
+    async def bulk_update(self, updates: Dict[TaskKey, Tuple[dict, int, int]]) -> List[TaskKey]:
+        missed = []
+        for key, (fields, version, increment) in updates.items():
+            old = self._lookup(*key)
+            if old is None or not old.satisfies(UpdateGuard(version=version)):
+                missed.append(key)
+            else:
+                self._apply(old, fields, increment)
+        return missed
+
+    async def delete(self, workspace_id: str, task_id: ObjectId) -> bool:
+        record = self._lookup(workspace_id, task_id)
+        if record is not None:
+            self._remove(record)
+            return True
+        if self._archive is not None and await self._archive.delete(workspace_id, task_id):
+            # El snapshot, que incluye el archivo, solo mira este indicador
+            self._dirty = True
+            return True
+        return False
+
+    async def remove_dependency(self, workspace_id: str, task_id: ObjectId) -> int:
+        now = _normalize(datetime.now(timezone.utc))
+        dependents = [
+            record for record in map(self._records.get, self._indexes["created_at"].ordered(workspace_id))
+            if record.extra and task_id in (record.extra.get("dependsOn") or ())
+        ]
+        for record in dependents:
+            depends_on = [dep for dep in record.extra["dependsOn"] if dep != task_id]
+            self._apply(record, {"dependsOn": depends_on, "updated_at": now}, 1)
+        return len(dependents)
+
+    async def archive_completed(self, before: datetime, limit: int) -> int:
+        now = _normalize(datetime.now(timezone.utc))
+        self._purge_archive(now)
+        before = _normalize(before)
+        # Mantenimiento de todos los espacios: recorre todas las tareas
+        eligible = [
+            r for r in self._records.values()
+            if r.completed and r.updated_at < before
+        ]
+        eligible.sort(key=lambda r: r.updated_at)
+        if eligible and self._archive is None:
+            self._archive = MemoryTaskRepository()
+        for record in eligible[:limit]:
+            self._remove(record)
+            doc = record.to_doc()
+            doc["archived_at"] = now
+            self._archive._add(_TaskRecord.from_doc(doc))
+        return min(len(eligible), limit)
+
+    def _purge_archive(self, now: datetime):
+        """Equivalente al índice TTL de MongoDB sobre `archived_at`."""
+        if self.archive_ttl_seconds <= 0 or self._archive is None:
+            return
+        cutoff = now - timedelta(seconds=self.archive_ttl_seconds)
+        expired = [
+            r for r in self._archive._records.values()
+            if r.extra["archived_at"] < cutoff
+        ]
+        for record in expired:
+            self._archive._remove(record)
+        if expired:
+            self._dirty = True
+            logger.info(f"Purgadas {len(expired)} tareas archivadas")
+
+    async def close(self) -> None:
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        if self.snapshot_path and self._dirty:
+            await self.snapshot()
+
+    # Consultas
+
+    def _query(self, query: TaskQuery, sort_key: str, sort_direction: int) -> Iterator[_TaskRecord]:
+        """Registros que cumplen `query`, en el orden pedido."""
+        candidates = self._candidates(query)
+        return self._matching(
+            self._sorted(query.workspace_id, candidates, sort_key, sort_direction), query
+        )
+
+    def _candidates(self, query: TaskQuery) -> Optional[Set[ObjectId]]:
+        """
+        Resuelve los filtros con los índices. Retorna None si no hay filtro
+        (todas las tareas del espacio son candidatas).
+        """
+        sets: List[Set[ObjectId]] = []
+        scope = query.workspace_id
+        filter_by = query.filter_by
+        now = _normalize(datetime.now(timezone.utc))
+
+        completed = query.completed
+        if filter_by == 'completed':
+            completed = True
+        elif filter_by == 'inProgress':
+            completed = False
+        if completed is not None:
+            sets.append(set(self._indexes["completed"].range(scope, completed, completed)))
+
+        if filter_by == 'overdue':
+            sets.append(set(self._indexes["endDateTime"].range(
+                scope, high=now, high_inclusive=False
+            )))
+        elif filter_by == 'today':
+            sets.append(self._today(scope, now))
+
+        if query.window is not None:
+            window_start, window_end = (_normalize(d) for d in query.window)
+            sets.append(set(self._indexes["startDateTime"].range(
+                scope, high=window_end, high_inclusive=False
+            )))
+            sets.append(set(self._indexes["endDateTime"].range(
+                scope, low=window_start, low_inclusive=False
+            )))
+
+        if not sets:
+            return None
+        sets.sort(key=len)
+        result = sets[0]
+        for other in sets[1:]:
+            result = result & other
+        return result
+
+    def _matching(
+        self,
+        records: Iterable[_TaskRecord],
+        query: TaskQuery
+    ) -> Iterable[_TaskRecord]:
+        """Aplica la búsqueda de texto, que no usa índices."""
+        search = query.search.strip() if query.search else ""
+        if not search:
+            return records
+        pattern = re.compile(search, re.IGNORECASE)
+        return (
+            r for r in records
+            if pattern.search(r.title) or pattern.search(r.description)
+        )
+
+    def _today(self, scope: str, now: datetime) -> Set[ObjectId]:
+        """Tareas del espacio que empiezan, terminan o abarcan el día de hoy."""
+        today_start, today_end = (_normalize(d) for d in today_bounds(now))
+        start_index = self._indexes["startDateTime"]
+        end_index = self._indexes["endDateTime"]
+
+        result = set(start_index.range(scope, today_start, today_end))
+        result.update(end_index.range(scope, today_start, today_end))
+
+        # Tareas que abarcan el día completo: recorrer el rango más pequeño
+        started_before = start_index.count(scope, high=today_start, high_inclusive=False)
+        ending_after = end_index.count(scope, low=today_end, low_inclusive=False)
+        if started_before <= ending_after:
+            for oid in start_index.range(scope, high=today_start, high_inclusive=False):
+                if self._records[oid].endDateTime > today_end:
+                    result.add(oid)
+        else:
+            for oid in end_index.range(scope, low=today_end, low_inclusive=False):
+                if self._records[oid].startDateTime < today_start:
+                    result.add(oid)
+        return result
+
+    def _sorted(
+        self,
+        scope: str,
+        candidates: Optional[Set[ObjectId]],
+        sort_key: str,
+        sort_direction: int
+    ) -> Iterator[_TaskRecord]:
+        """Recorre los candidatos del espacio en el orden pedido."""
+        reverse = sort_direction < 0
+        index = self._indexes.get(sort_key)
+        few_candidates = (
+            candidates is not None
+            and len(candidates) * _SORT_CANDIDATES_RATIO < self._scope_size(scope)
+        )
+
+        if index is not None and not few_candidates:
+            for oid in index.ordered(scope, reverse=reverse):
+                if candidates is None or oid in candidates:
+                    yield self._records[oid]
+            return
+
+        if candidates is None:
+            candidates = self._indexes["created_at"].range(scope)
+        pool = (self._records[oid] for oid in candidates)
+        yield from sorted(
+            pool,
+            key=lambda r: (getattr(r, sort_key), r._id),
+            reverse=reverse
+        )
+
+    # Snapshots
+
+    async def snapshot(self) -> None:
+        """Escribe todas las tareas en `snapshot_path` de forma atómica."""
+        if not self.snapshot_path:
+            return
+        records = list(self._records.values())
+        if self._archive is not None:
+            # Las archivadas se distinguen al cargar por `archived_at`
+            records.extend(self._archive._records.values())
+        payload = b"".join(bson.encode(r.to_doc()) for r in records)
+        self._dirty = False
+        await asyncio.to_thread(self._write_snapshot, payload)
+        logger.info(f"Snapshot guardado: {len(self._records)} tareas en {self.snapshot_path}")
+
+    def _write_snapshot(self, payload: bytes):
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _load_snapshot(self):
+        with open(self.snapshot_path, "rb") as f:
+            for doc in bson.decode_file_iter(f):
+                if "archived_at" in doc:
+                    if self._archive is None:
+                        self._archive = MemoryTaskRepository()
+                    self._archive._add(_TaskRecord.from_doc(doc))
+                else:
+                    self._add(_TaskRecord.from_doc(doc))
+        self._dirty = False
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if self._dirty:
+                try:
+                    await self.snapshot()
+                except Exception as e:
+                    logger.error(f"Error al guardar snapshot: {e}")
@@ -0,0 +1,442 @@
+"""
+Repositorio de tareas sobre MongoDB (Motor).
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.db.repository import (
+    DEFAULT_WORKSPACE,
+    TaskKey,
+    TaskRepository,
+    TaskQuery,
+    TaskProjection,
+    UpdateGuard,
+    resolve_sort,
+    today_bounds
+)
+
+logger = logging.getLogger(__name__)
+
+# Nombre del índice TTL que purga el archivo
+ARCHIVE_TTL_INDEX = "archived_at_ttl"
+# Código de MongoDB para índices existentes con otras opciones
+INDEX_OPTIONS_CONFLICT = 85
+# Código de MongoDB al borrar un índice que no existe
+INDEX_NOT_FOUND = 27
+# Índices de un solo campo anteriores a `workspace_id`
+LEGACY_INDEXES = ("created_at_1", "completed_1", "startDateTime_1")
+
+
+def build_filter(query: TaskQuery) -> dict:
+    """
+    Traduce un TaskQuery al filtro de MongoDB. El espacio de trabajo va
+    siempre primero para que el filtro use el prefijo de los índices.
+    """
+    filter_query = {"workspace_id": query.workspace_id}
+
+    # Filtro por completado (compatibilidad con API anterior)
+    if query.completed is not None:
+        filter_query["completed"] = query.completed
+
+    # Filtros avanzados
+    filter_by = query.filter_by
+    if filter_by:
+        now = datetime.now(timezone.utc)
+        today_start, today_end = today_bounds(now)
+
+        if filter_by == 'completed':
+            filter_query["completed"] = True
+        elif filter_by == 'inProgress':
+            filter_query["completed"] = False
+        elif filter_by == 'overdue':
+            filter_query["endDateTime"] = {"$lt": now}
+        elif filter_by == 'today':
+            filter_query["$or"] = [
+                {"startDateTime": {"$gte": today_start, "$lte": today_end}},
+                {"endDateTime": {"$gte": today_start, "$lte": today_end}},
+                {"$and": [
+                    {"startDateTime": {"$lt": today_start}},
+                    {"endDateTime": {"$gt": today_end}}
+                ]}
+            ]
+
+    # Solapamiento con una ventana de tiempo
+    if query.window is not None:
+        window_start, window_end = query.window
+        filter_query.setdefault("startDateTime", {})["$lt"] = window_end
+        filter_query.setdefault("endDateTime", {})["$gt"] = window_start
+
+    # Búsqueda de texto en título y descripción
+    search = query.search
+    if search and search.strip():
+        search_regex = {"$regex": search.strip(), "$options": "i"}
+        if "$or" in filter_query:
+            # Si ya hay $or, añadir búsqueda
+            filter_query["$and"] = [
+                {"$or": filter_query.pop("$or")},
+                {"$or": [
+                    {"title": search_regex},
+                    {"description": search_regex}
+                ]}
+            ]
+        else:
+            filter_query["$or"] = [
+                {"title": search_regex},
+                {"description": search_regex}
+            ]
+
+    return filter_query
+
+
+def build_projection(projection: TaskProjection) -> dict:
+    """
+    Traduce un TaskProjection a la proyección de `find`. Los contadores de
+    subtareas se calculan en el servidor (requiere MongoDB 4.4+).
+    """
+    mongo_projection = {field: 1 for field in projection.fields}
+    if projection.subtask_counts:
+        subtasks = {"$ifNull": ["$subtasks", []]}
+        mongo_projection["subtaskCount"] = {"$size": subtasks}
+        mongo_projection["completedSubtaskCount"] = {"$size": {"$filter": {
+            "input": subtasks,
+            "cond": {"$eq": ["$$this.completed", True]}
+        }}}
+    if projection.completed_subtask_hours:
+        mongo_projection["completedSubtaskHours"] = {"$sum": {"$map": {
+            "input": {"$filter": {
+                "input": {"$ifNull": ["$subtasks", []]},
+                "cond": {"$eq": ["$$this.completed", True]}
+            }},
+            "in": "$$this.estimatedHours"
+        }}}
+    return mongo_projection
+
+
+def build_guard(guard: Optional[UpdateGuard]) -> dict:
+    """
+    Traduce un UpdateGuard a condiciones adicionales del filtro por `_id`.
+    """
+    conditions = {}
+    if guard is None:
+        return conditions
+    if guard.version is not None:
+        # {"version": None} también coincide con tareas sin el campo
+        conditions["version"] = {"$in": [0, None]} if guard.version == 0 else guard.version
+    if guard.start_before is not None:
+        conditions["startDateTime"] = {"$lt": guard.start_before}
+    if guard.end_after is not None:
+        conditions["endDateTime"] = {"$gt": guard.end_after}
+    return conditions
+
+
+class MongoTaskRepository(TaskRepository):
+    """Repositorio de tareas respaldado por una colección de MongoDB."""
+
+    # Incrementar al cambiar los índices para que bootstrap los vuelva a aplicar
+    INDEXES_VERSION = 4
+    # Incrementar al añadir migraciones de documentos
+    MIGRATIONS_VERSION = 1
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        archive: Optional[AsyncIOMotorCollection] = None,
+        archive_ttl_seconds: int = 0
+    ):
+        self.collection = collection
+        self.archive = archive
+        self.archive_ttl_seconds = archive_ttl_seconds
+
+    async def init_indexes(self) -> None:
+        # Todos los índices de consulta empiezan por el espacio de trabajo:
+        # también sirven como índice de la clave de fragmentación
+        # {workspace_id: 1, created_at: 1}
+        await self.collection.create_index([("workspace_id", 1), ("created_at", 1)])
+        await self.collection.create_index([("workspace_id", 1), ("completed", 1), ("created_at", 1)])
+        await self.collection.create_index([("workspace_id", 1), ("startDateTime", 1)])
+        await self.collection.create_index([("workspace_id", 1), ("endDateTime", 1)])
+        # Tareas que dependen de una que se elimina (índice multiclave)
+        await self.collection.create_index([("workspace_id", 1), ("dependsOn", 1)])
+        # Selección de tareas a archivar (recorre todos los espacios)
+        await self.collection.create_index([("completed", 1), ("updated_at", 1)])
+        await self._drop_indexes(self.collection, LEGACY_INDEXES)
+        logger.info("Índices de tareas inicializados")
+
+    async def migrate(self) -> None:
+        """Asigna el espacio por defecto a las tareas anteriores a `workspace_id`."""
+        for collection in (self.collection, self.archive):
+            if collection is None:
+                continue
+            result = await collection.update_many(
+                {"workspace_id": {"$exists": False}},
+                {"$set": {"workspace_id": DEFAULT_WORKSPACE}}
+            )
+            if result.modified_count:
+                logger.info(
+                    f"Tareas asignadas al espacio '{DEFAULT_WORKSPACE}': "
+                    f"{result.modified_count}, colección: {collection.name}"
+                )
+
+    @staticmethod
+    async def _drop_indexes(collection: AsyncIOMotorCollection, names):
+        for name in names:
+            try:
+                await collection.drop_index(name)
+            except OperationFailure as e:
+                if e.code != INDEX_NOT_FOUND:
+                    raise
+
+    async def init_archive(self) -> None:
+        if self.archive is None:
+            return
+        await self.archive.create_index([("workspace_id", 1), ("created_at", 1)])
+        await self._drop_indexes(self.archive, ("created_at_1",))
+        if self.archive_ttl_seconds <= 0:
+            # Purga desactivada: quitar el índice TTL si quedó de antes
+            try:
+                await self.archive.drop_index(ARCHIVE_TTL_INDEX)
+            except OperationFailure:
+                pass
+            return
+        try:
+            await self.archive.create_index(
+                "archived_at",
+                name=ARCHIVE_TTL_INDEX,
+                expireAfterSeconds=self.archive_ttl_seconds
+            )
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # El índice existe con otro plazo: cambiarlo sin reconstruirlo
+            await self.archive.database.command(
+                "collMod", self.archive.name,
+                index={"name": ARCHIVE_TTL_INDEX, "expireAfterSeconds": self.archive_ttl_seconds}
+            )
+        logger.info(f"Archivo de tareas con purga a los {self.archive_ttl_seconds} s")
+
+    async def insert(self, document: dict) -> dict:
+        result = await self.collection.insert_one(document)
+        # Releer para devolver las fechas tal como las almacena MongoDB
+        return await self.collection.find_one({"_id": result.inserted_id})
+
+    async def insert_many(self, documents: List[dict]) -> int:
+        if not documents:
+            return 0
+        try:
+            # Sin orden: un documento rechazado no detiene el resto del lote
+            result = await self.collection.insert_many(documents, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            logger.error(
+                f"Lote de inserción con {len(errors)} errores"
+                f"{': ' + errors[0].get('errmsg', '') if errors else ''}"
+            )
+            return e.details.get("nInserted", 0)
+
+    async def get(
+        self,
+        workspace_id: str,
+        task_id: ObjectId,
+        include_archived: bool = False
+    ) -> Optional[dict]:
+        # Con el espacio en el filtro la lectura va a un solo fragmento
+        task_filter = {"workspace_id": workspace_id, "_id": task_id}
+        doc = await self.collection.find_one(task_filter)
+        if doc is None and include_archived and self.archive is not None:
+            # Solo se consulta el archivo si la tarea no está activa
+            doc = await self.archive.find_one(task_filter)
+            if doc is not None:
+                doc["archived"] = True
+        return doc
+
+    async def find(
+        self,
+        query: TaskQuery,
+        sort_by: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        projection: Optional[TaskProjection] = None
+    ) -> List[dict]:
+        filter_query = build_filter(query)
+        sort_key, sort_direction = resolve_sort(sort_by)
+        if query.include_archived and self.archive is not None:
+            return await self._find_with_archive(
+                filter_query, sort_key, sort_direction, skip, limit, projection
+            )
+        if projection is not None:
+            cursor = self.collection.find(filter_query, build_projection(projection))
+        else:
+            cursor = self.collection.find(filter_query)
+        cursor = cursor.sort(sort_key, sort_direction).skip(skip).limit(limit)
+        docs = await cursor.to_list(length=limit)
+        logger.debug(f"Consulta de tareas: filtro {filter_query}, orden {sort_key} {sort_direction}")
+        return docs
+
+    async def _find_with_archive(
+        self,
+        filter_query: dict,
+        sort_key: str,
+        sort_direction: int,
+        skip: int,
+        limit: int,
+        projection: Optional[TaskProjection]
+    ) -> List[dict]:
+        """
+        Listado sobre las tareas activas y archivadas con `$unionWith`
+        (MongoDB 4.4+). Cada rama se ordena y recorta a `skip + limit` con
+        su índice antes de la unión, que solo ordena esos documentos.
+        """
+        branch = [
+            {"$match": filter_query},
+            {"$sort": {sort_key: sort_direction}},
+            {"$limit": skip + limit}
+        ]
+        pipeline = [
+            *branch,
+            {"$unionWith": {
+                "coll": self.archive.name,
+                "pipeline": [*branch, {"$addFields": {"archived": True}}]
+            }},
+            {"$sort": {sort_key: sort_direction}},
+            {"$skip": skip},
+            {"$limit": limit}
+        ]
+        if projection is not None:
+            pipeline.append({"$project": {**build_projection(projection), "archived": 1}})
+        return await self.collection.aggregate(pipeline).to_list(length=limit)
+
+    async def scan(self, query: TaskQuery, projection: TaskProjection) -> List[dict]:
+        return await self.collection.find(
+            build_filter(query), build_projection(projection)
+        ).to_list(length=None)
+
+    async def workspace_ids(self, limit: int) -> List[str]:
+        # Un documento por espacio y solo `limit` en la respuesta: `distinct`
+        # devuelve todos los espacios en un documento limitado a 16 MB
+        pipeline = [
+            {"$group": {"_id": "$workspace_id", "last_update": {"$max": "$updated_at"}}},
+            {"$sort": {"last_update": -1, "_id": 1}},
+            {"$limit": limit}
+        ]
+        docs = await self.collection.aggregate(pipeline, allowDiskUse=True).to_list(length=limit)
+        return [doc["_id"] for doc in docs]
+
+    async def count(self, query: TaskQuery) -> int:
+        collections = [self.collection]
+        if query.include_archived and self.archive is not None:
+            collections.append(self.archive)
+        filter_query = build_filter(query)
+        total = 0
+        for collection in collections:
+            # Sin más filtros que el espacio se cuenta sobre el índice
+            # (COUNT_SCAN), sin leer documentos
+            total += await collection.count_documents(filter_query)
+        return total
+
+    async def update(
+        self,
+        workspace_id: str,
+        task_id: ObjectId,
+        fields: dict,
+        guard: Optional[UpdateGuard] = None
+    ) -> Optional[dict]:
+        # Filtro, escritura y lectura en una sola operación atómica
+        return await self.collection.find_one_and_update(
+            {"workspace_id": workspace_id, "_id": task_id, **build_guard(guard)},
+            {"$set": fields, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def bulk_update(self, updates: Dict[TaskKey, Tuple[dict, int, int]]) -> List[TaskKey]:
+        if not updates:
+            return []
+        # Sin orden: cada operación toca una tarea distinta
+        result = await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "workspace_id": workspace_id,
+                        "_id": task_id,
+                        **build_guard(UpdateGuard(version=version))
+                    },
+                    {"$set": fields, "$inc": {"version": increment}}
+                )
+                for (workspace_id, task_id), (fields, version, increment) in updates.items()
+            ],
+            ordered=False
+        )
+        if result.matched_count == len(updates):
+            return []
+        # El resultado no dice qué operaciones fallaron: se leen las versiones,
+        # con el espacio en el filtro para que cada rama vaya a un solo fragmento
+        by_workspace: Dict[str, List[ObjectId]] = {}
+        for workspace_id, task_id in updates:
+            by_workspace.setdefault(workspace_id, []).append(task_id)
+        branches = [
+            {"workspace_id": workspace_id, "_id": {"$in": task_ids}}
+            for workspace_id, task_ids in by_workspace.items()
+        ]
+        current = {
+            (doc["workspace_id"], doc["_id"]): doc.get("version") or 0
+            for doc in await self.collection.find(
+                branches[0] if len(branches) == 1 else {"$or": branches},
+                {"workspace_id": 1, "version": 1}
+            ).to_list(length=None)
+        }
+        return [
+            key for key, (_, version, increment) in updates.items()
+            if current.get(key) != version + increment
+        ]
+
+    async def delete(self, workspace_id: str, task_id: ObjectId) -> bool:
+        filter_query = {"workspace_id": workspace_id, "_id": task_id}
+        deleted = (await self.collection.delete_one(filter_query)).deleted_count
+        if self.archive is not None:
+            # También la copia que pudo dejar una pasada de archivado interrumpida
+            deleted += (await self.archive.delete_one(filter_query)).deleted_count
+        return deleted > 0
+
+    async def remove_dependency(self, workspace_id: str, task_id: ObjectId) -> int:
+        result = await self.collection.update_many(
+            {"workspace_id": workspace_id, "dependsOn": task_id},
+            {
+                "$pull": {"dependsOn": task_id},
+                "$set": {"updated_at": datetime.now(timezone.utc)},
+                "$inc": {"version": 1}
+            }
+        )
+        return result.modified_count
+
+    async def archive_completed(self, before: datetime, limit: int) -> int:
+        if self.archive is None:
+            return 0
+        eligible = {"completed": True, "updated_at": {"$lt": before}}
+        docs = await self.collection.find(eligible).sort("updated_at", 1).limit(limit).to_list(length=limit)
+        if not docs:
+            return 0
+
+        archived_at = datetime.now(timezone.utc)
+        for doc in docs:
+            doc["archived_at"] = archived_at
+        try:
+            await self.archive.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Copias que dejó una pasada anterior interrumpida
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+        ids = [doc["_id"] for doc in docs]
+        # El mismo filtro evita borrar tareas modificadas desde la copia
+        result = await self.collection.delete_many({"_id": {"$in": ids}, **eligible})
+        if result.deleted_count < len(ids):
+            # Las que siguen activas no deben quedar también en el archivo
+            still_active = await self.collection.distinct("_id", {"_id": {"$in": ids}})
+            if still_active:
+                await self.archive.delete_many({"_id": {"$in": still_active}})
+        return result.deleted_count
@@ -0,0 +1,67 @@
+"""
+Registro de los comandos de MongoDB emitidos durante una petición.
+
+Motor ejecuta pymongo en un pool de hilos copiando el contexto, así que el
+listener puede asociar cada comando con la captura activa en la petición.
+"""
+import json
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from pymongo import monitoring
+
+# Máximo de comandos registrados por captura
+MAX_COMMANDS = 500
+# Longitud máxima del comando serializado en el informe
+MAX_COMMAND_CHARS = 300
+
+
+class CommandCapture:
+    """Comandos registrados durante una petición."""
+
+    def __init__(self):
+        self.commands: List[dict] = []
+        self._pending: Dict[int, dict] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if len(self.commands) + len(self._pending) >= MAX_COMMANDS:
+            return
+        body = {
+            k: v for k, v in event.command.items()
+            if k not in ("lsid", "$db", "$clusterTime", "documents")
+        }
+        self._pending[event.request_id] = {
+            "command": event.command_name,
+            "body": json.dumps(body, default=str)[:MAX_COMMAND_CHARS],
+        }
+
+    def finished(self, event, ok: bool):
+        entry = self._pending.pop(event.request_id, None)
+        if entry is None:
+            return
+        entry["duration_ms"] = event.duration_micros / 1000
+        entry["ok"] = ok
+        self.commands.append(entry)
+
+
+current_capture: ContextVar[Optional[CommandCapture]] = ContextVar(
+    "current_capture", default=None
+)
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Listener de pymongo que alimenta la captura activa, si la hay."""
+
+    def started(self, event):
+        capture = current_capture.get()
+        if capture is not None:
+            capture.started(event)
+
+    def succeeded(self, event):
+        capture = current_capture.get()
+        if capture is not None:
+            capture.finished(event, ok=True)
+
+    def failed(self, event):
+        capture = current_capture.get()
+        if capture is not None:
+            capture.finished(event, ok=False)
@@ -0,0 +1,223 @@
+"""
+Interfaz de almacenamiento de tareas.
+
+`task_service` solo habla con un `TaskRepository`; cada backend (MongoDB,
+memoria) traduce las consultas a su propio motor. Los documentos que entran
+y salen tienen siempre la forma de MongoDB (`_id` ObjectId, fechas datetime).
+
+Cada tarea pertenece a un espacio de trabajo (`workspace_id`). Todas las
+operaciones sobre tareas concretas o listados reciben el espacio y los
+índices empiezan por él, de modo que una consulta recorre solo el rango de
+un espacio (y, con la colección fragmentada por `workspace_id`, un solo
+fragmento).
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from bson import ObjectId
+
+
+# sortBy -> (campo, dirección). 'progress' se ordena en el servicio tras
+# paginar por el orden por defecto.
+SORT_OPTIONS = {
+    "recent": ("created_at", -1),
+    "oldest": ("created_at", 1),
+    "dueDate": ("endDateTime", 1),
+    "title": ("title", 1),
+    "duration": ("estimatedHours", -1),
+}
+DEFAULT_SORT = SORT_OPTIONS["recent"]
+
+# Espacio de trabajo de las tareas creadas antes de existir `workspace_id`
+DEFAULT_WORKSPACE = "default"
+
+# Clave de una tarea concreta: (workspace_id, _id)
+TaskKey = Tuple[str, ObjectId]
+
+
+@dataclass
+class TaskQuery:
+    """Criterios de búsqueda de tareas, independientes del backend."""
+    workspace_id: str
+    completed: Optional[bool] = None
+    filter_by: Optional[str] = None
+    search: Optional[str] = None
+    # Incluir también las tareas archivadas
+    include_archived: bool = False
+    # Solo tareas cuyo intervalo se solapa con [inicio, fin)
+    window: Optional[Tuple[datetime, datetime]] = None
+
+    def is_unfiltered(self) -> bool:
+        """True si la consulta abarca todo el espacio de trabajo."""
+        return (
+            self.completed is None
+            and self.filter_by in (None, "all")
+            and not (self.search and self.search.strip())
+            and self.window is None
+        )
+
+
+@dataclass(frozen=True)
+class TaskProjection:
+    """
+    Campos a devolver en un listado. `_id` se incluye siempre; con
+    `subtask_counts` el backend añade `subtaskCount` y
+    `completedSubtaskCount` en lugar de las subtareas completas, y con
+    `completed_subtask_hours`, `completedSubtaskHours`.
+    """
+    fields: FrozenSet[str] = frozenset()
+    subtask_counts: bool = False
+    completed_subtask_hours: bool = False
+
+
+@dataclass(frozen=True)
+class UpdateGuard:
+    """
+    Condiciones que debe cumplir la tarea para aplicar una actualización. Se
+    comprueban en la misma operación atómica que la escritura.
+    """
+    # Versión esperada; las tareas sin `version` cuentan como 0
+    version: Optional[int] = None
+    # startDateTime < start_before (al cambiar solo endDateTime)
+    start_before: Optional[datetime] = None
+    # endDateTime > end_after (al cambiar solo startDateTime)
+    end_after: Optional[datetime] = None
+
+
+def resolve_sort(sort_by: Optional[str]) -> Tuple[str, int]:
+    """Retorna (campo, dirección) para una opción sortBy."""
+    return SORT_OPTIONS.get(sort_by, DEFAULT_SORT)
+
+
+def today_bounds(now: datetime) -> Tuple[datetime, datetime]:
+    """Retorna el inicio y el final del día UTC de `now`."""
+    today_start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+    today_end = datetime(now.year, now.month, now.day, 23, 59, 59, tzinfo=timezone.utc)
+    return today_start, today_end
+
+
+class TaskRepository(ABC):
+    """Operaciones de almacenamiento que necesita `task_service`."""
+
+    @abstractmethod
+    async def init_indexes(self) -> None:
+        """Crea los índices del backend."""
+
+    @abstractmethod
+    async def insert(self, document: dict) -> dict:
+        """Inserta un documento y lo retorna tal como quedó almacenado."""
+
+    @abstractmethod
+    async def insert_many(self, documents: List[dict]) -> int:
+        """
+        Inserta un lote de documentos con `_id` ya asignado, sin orden entre
+        ellos. Retorna cuántos se insertaron.
+        """
+
+    @abstractmethod
+    async def get(
+        self,
+        workspace_id: str,
+        task_id: ObjectId,
+        include_archived: bool = False
+    ) -> Optional[dict]:
+        """
+        Retorna el documento con ese `_id` en el espacio o None. Con `include_archived`
+        también busca en el archivo; esos documentos llevan `archived: True`.
+        """
+
+    @abstractmethod
+    async def find(
+        self,
+        query: TaskQuery,
+        sort_by: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        projection: Optional[TaskProjection] = None
+    ) -> List[dict]:
+        """
+        Retorna los documentos que cumplen `query`, ordenados y paginados.
+        Con `projection` solo se leen y devuelven los campos indicados. Con
+        `query.include_archived` se mezclan las tareas archivadas, marcadas
+        con `archived: True`.
+        """
+
+    @abstractmethod
+    async def scan(self, query: TaskQuery, projection: TaskProjection) -> List[dict]:
+        """
+        Retorna todos los documentos activos que cumplen `query`, sin orden
+        ni paginación y solo con los campos de `projection`. Pensado para
+        agregaciones en el servicio.
+        """
+
+    @abstractmethod
+    async def workspace_ids(self, limit: int) -> List[str]:
+        """
+        Retorna hasta `limit` espacios de trabajo con tareas activas, del
+        modificado más recientemente (`updated_at`) al menos.
+        """
+
+    @abstractmethod
+    async def count(self, query: TaskQuery) -> int:
+        """
+        Cuenta los documentos que cumplen `query`. Sin filtros cuenta sobre
+        el índice del espacio, sin leer los documentos.
+        """
+
+    @abstractmethod
+    async def update(
+        self,
+        workspace_id: str,
+        task_id: ObjectId,
+        fields: dict,
+        guard: Optional[UpdateGuard] = None
+    ) -> Optional[dict]:
+        """
+        Aplica `fields` con semántica `$set`, incrementa `version` en 1 y
+        retorna el documento actualizado. Retorna None si la tarea no existe
+        en el espacio o no cumple `guard`.
+        """
+
+    @abstractmethod
+    async def bulk_update(self, updates: Dict[TaskKey, Tuple[dict, int, int]]) -> List[TaskKey]:
+        """
+        Aplica varios cambios independientes, uno por tarea y sin orden entre
+        ellos: (campos `$set`, versión leída, incremento de `version`). Cada
+        cambio se aplica solo si la tarea sigue en la versión leída (las
+        tareas sin `version` cuentan como 0).
+
+        Retorna las tareas en las que no se aplicó: modificadas por otro
+        proceso o que ya no existen. Puede incluir alguna en la que sí se
+        aplicó y que se modificó justo después.
+        """
+
+    @abstractmethod
+    async def delete(self, workspace_id: str, task_id: ObjectId) -> bool:
+        """
+        Elimina el documento, activo o archivado; retorna False si no
+        existía en el espacio.
+        """
+
+    @abstractmethod
+    async def remove_dependency(self, workspace_id: str, task_id: ObjectId) -> int:
+        """
+        Quita `task_id` del `dependsOn` de las tareas activas del espacio,
+        actualizando su `updated_at` e incrementando su `version`. Retorna
+        cuántas tareas cambió.
+        """
+
+    @abstractmethod
+    async def archive_completed(self, before: datetime, limit: int) -> int:
+        """
+        Mueve al archivo hasta `limit` tareas completadas cuya última
+        modificación (`updated_at`) es anterior a `before`, con `archived_at`.
+        Es una tarea de mantenimiento que abarca todos los espacios.
+        Retorna cuántas se movieron. Es seguro repetirlo si se interrumpe.
+        """
+
+    async def init_archive(self) -> None:
+        """Prepara el almacenamiento del archivo (índices, purga por TTL)."""
+
+    async def close(self) -> None:
+        """Libera los recursos del backend."""
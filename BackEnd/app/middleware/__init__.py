@@ -0,0 +1 @@
+# Middleware de la aplicación
@@ -0,0 +1,231 @@
+"""
+Middleware de perfilado por petición.
+
+Se activa con PROFILING_ENABLED=true. Una petición se perfila si trae la
+cabecera `X-Profile-Token` (o el parámetro `__profile`) con el token de
+administración, o al azar según PROFILING_SAMPLE_RATE. El informe incluye un
+perfil determinista (cProfile) y los comandos de MongoDB emitidos, y se guarda
+en PROFILING_DIR. En memoria solo se conservan los N perfiles más lentos.
+"""
+import asyncio
+import cProfile
+import heapq
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import time
+from datetime import datetime, timezone
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from fastapi import Request
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.db.monitoring import CommandCapture, current_capture
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_TOKEN_PARAM = "__profile"
+# Las rutas de diagnóstico no se perfilan
+EXCLUDED_PATH_PREFIX = "/debug"
+# Funciones mostradas en el informe, por tiempo acumulado
+REPORT_TOP_FUNCTIONS = 40
+
+
+class ProfilingSettings(BaseSettings):
+    """Configuración del perfilado."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    profiling_enabled: bool = False
+    # Token de administración; vacío = solo muestreo aleatorio
+    profiling_token: str = ""
+    profiling_dir: str = "profiles"
+    # Fracción de peticiones perfiladas sin token (0 = ninguna)
+    profiling_sample_rate: float = 0.0
+    # Perfiles más lentos que se conservan en memoria y en disco
+    profiling_keep_slowest: int = 20
+    # Perfiles pedidos con token que se conservan fuera del ranking (los últimos)
+    profiling_keep_explicit: int = 50
+
+
+profiling_settings = ProfilingSettings()
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Comprueba el token de administración en tiempo constante."""
+    expected = profiling_settings.profiling_token
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+
+class ProfileStore:
+    """
+    Perfiles más lentos, acotados a `keep` entradas. Los últimos
+    `keep_explicit` perfiles pedidos explícitamente con token se conservan
+    en disco aunque salgan del ranking.
+    """
+
+    def __init__(self, directory: str, keep: int, keep_explicit: int):
+        self.directory = directory
+        self.keep = keep
+        self.keep_explicit = keep_explicit
+        # Montículo de mínimos: (duración_ms, id, resumen)
+        self._slowest: List[Tuple[float, str, dict]] = []
+        # Perfiles explícitos, del más antiguo al más reciente
+        self._explicit: "OrderedDict[str, None]" = OrderedDict()
+
+    def path(self, profile_id: str, suffix: str = "txt") -> str:
+        return os.path.join(self.directory, f"{profile_id}.{suffix}")
+
+    def _ranked(self, profile_id: str) -> bool:
+        return any(entry[1] == profile_id for entry in self._slowest)
+
+    def add(self, summary: dict, explicit: bool) -> List[str]:
+        """
+        Registra un perfil. Retorna los ids de los perfiles desalojados
+        cuyos archivos se deben borrar.
+        """
+        evicted = []
+        entry = (summary["duration_ms"], summary["id"], summary)
+        if explicit:
+            self._explicit[summary["id"]] = None
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        else:
+            _, evicted_id, _ = heapq.heappushpop(self._slowest, entry)
+            if evicted_id not in self._explicit:
+                evicted.append(evicted_id)
+        while len(self._explicit) > self.keep_explicit:
+            oldest, _ = self._explicit.popitem(last=False)
+            if not self._ranked(oldest):
+                evicted.append(oldest)
+        return evicted
+
+    def accepts(self, duration_ms: float) -> bool:
+        """True si un perfil con esta duración entraría en el ranking."""
+        return len(self._slowest) < self.keep or duration_ms > self._slowest[0][0]
+
+    def slowest(self) -> List[dict]:
+        return [entry[2] for entry in sorted(self._slowest, reverse=True)]
+
+
+profile_store = ProfileStore(
+    profiling_settings.profiling_dir,
+    profiling_settings.profiling_keep_slowest,
+    profiling_settings.profiling_keep_explicit
+)
+
+
+def _render_report(summary: dict, capture: CommandCapture, profiler: cProfile.Profile) -> str:
+    """Informe legible: petición, comandos de MongoDB y funciones más costosas."""
+    out = io.StringIO()
+    out.write(f"Perfil {summary['id']} ({summary['timestamp']})\n")
+    out.write(
+        f"{summary['method']} {summary['path']}"
+        f"{'?' + summary['query'] if summary['query'] else ''} -> "
+        f"{summary['status']} en {summary['duration_ms']:.1f} ms\n\n"
+    )
+    out.write(f"Comandos MongoDB ({len(capture.commands)}):\n")
+    for command in capture.commands:
+        status = "" if command["ok"] else " [ERROR]"
+        out.write(
+            f"  {command['duration_ms']:8.2f} ms  {command['command']}{status}  {command['body']}\n"
+        )
+    out.write(
+        "\nNota: cProfile mide el hilo del event loop; si hubo peticiones "
+        "concurrentes, su trabajo también aparece.\n\n"
+    )
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Perfila peticiones individuales bajo demanda o por muestreo."""
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        super().__init__(app)
+        self.store = store
+        # cProfile no admite perfiles anidados: uno a la vez por proceso
+        self._lock = asyncio.Lock()
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path.startswith(EXCLUDED_PATH_PREFIX):
+            return await call_next(request)
+        token = (
+            request.headers.get(PROFILE_TOKEN_HEADER)
+            or request.query_params.get(PROFILE_TOKEN_PARAM)
+        )
+        explicit = is_admin_token(token)
+        sampled = (
+            not explicit
+            and profiling_settings.profiling_sample_rate > 0
+            and random.random() < profiling_settings.profiling_sample_rate
+        )
+        if not (explicit or sampled) or self._lock.locked():
+            return await call_next(request)
+
+        async with self._lock:
+            capture = CommandCapture()
+            capture_token = current_capture.set(capture)
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await call_next(request)
+            finally:
+                profiler.disable()
+                current_capture.reset(capture_token)
+            duration_ms = (time.perf_counter() - started) * 1000
+
+        if not explicit and not self.store.accepts(duration_ms):
+            return response
+
+        summary = {
+            "id": str(ObjectId()),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "method": request.method,
+            "path": request.url.path,
+            # Sin el token, que no debe quedar escrito en el informe
+            "query": "&".join(
+                f"{k}={v}" for k, v in request.query_params.multi_items()
+                if k != PROFILE_TOKEN_PARAM
+            ),
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "mongo_commands": len(capture.commands),
+            "mongo_ms": sum(c["duration_ms"] for c in capture.commands),
+            "explicit": explicit,
+        }
+        try:
+            report = _render_report(summary, capture, profiler)
+            await asyncio.to_thread(self._write, summary["id"], report, profiler)
+            for evicted in self.store.add(summary, explicit):
+                await asyncio.to_thread(self._remove, evicted)
+            response.headers["X-Profile-Id"] = summary["id"]
+        except Exception as e:
+            logger.error(f"Error al guardar perfil: {e}")
+        return response
+
+    def _write(self, profile_id: str, report: str, profiler: cProfile.Profile):
+        os.makedirs(self.store.directory, exist_ok=True)
+        with open(self.store.path(profile_id), "w", encoding="utf-8") as f:
+            f.write(report)
+        # Volcado binario para herramientas como snakeviz
+        profiler.dump_stats(self.store.path(profile_id, "prof"))
+
+    def _remove(self, profile_id: str):
+        for suffix in ("txt", "prof"):
+            try:
+                os.remove(self.store.path(profile_id, suffix))
+            except FileNotFoundError:
+                pass
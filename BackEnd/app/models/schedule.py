@@ -0,0 +1,65 @@
+"""
+Modelos Pydantic para los conflictos de calendario y el camino crítico.
+"""
+from typing import List
+from pydantic import BaseModel
+
+from app.models.task import StoredDateTime
+
+
+class ScheduleConflict(BaseModel):
+    """Días consecutivos en los que las tareas abiertas superan la capacidad."""
+    start: StoredDateTime
+    end: StoredDateTime
+    # Horas del día más cargado de la ventana
+    peakHours: float
+    # Tareas que se solapan con la ventana, por fecha de inicio
+    taskIds: List[str]
+
+
+class ConflictsResponse(BaseModel):
+    """Conflictos entre `start` y `end`, alineados a días UTC."""
+    start: StoredDateTime
+    end: StoredDateTime
+    # Capacidad diaria (DAILY_CAPACITY_HOURS)
+    capacityHours: float
+    conflicts: List[ScheduleConflict]
+
+
+class ScheduledTask(BaseModel):
+    """
+    Planificación de una tarea por el método del camino crítico, en horas
+    de trabajo desde el inicio del proyecto.
+    """
+    id: str
+    title: str
+    # Horas pendientes (estimatedHours menos subtareas completadas)
+    durationHours: float
+    earliestStart: float
+    earliestFinish: float
+    latestStart: float
+    latestFinish: float
+    # Horas que puede retrasarse sin retrasar el proyecto
+    slack: float
+    critical: bool
+    dependsOn: List[str]
+
+
+class CriticalPathResponse(BaseModel):
+    """Cadena de dependencias más larga que pasa por una tarea."""
+    taskId: str
+    # Duración del proyecto (espacio de trabajo completo)
+    projectHours: float
+    # Horas de la cadena
+    lengthHours: float
+    # La cadena es la crítica del proyecto
+    critical: bool
+    path: List[ScheduledTask]
+
+
+class ProjectScheduleResponse(BaseModel):
+    """Planificación de las tareas de un espacio de trabajo."""
+    projectHours: float
+    # Tareas que cumplen el filtro, antes de paginar
+    total: int
+    tasks: List[ScheduledTask]
@@ -0,0 +1,27 @@
+"""
+Modelos Pydantic para las sugerencias de títulos.
+"""
+from typing import List
+from pydantic import BaseModel
+
+
+class TaskSuggestion(BaseModel):
+    """Tarea cuyo título coincide con la consulta."""
+    id: str
+    title: str
+    completed: bool
+    # 1 si todas las palabras de la consulta son prefijos de palabras del
+    # título; si no, fracción de sus trigramas presentes en el título
+    score: float
+
+
+class SuggestIndexResponse(BaseModel):
+    """Resultado de reconstruir el índice de títulos de un espacio."""
+    tasks: int
+    durationMs: float
+
+
+class TaskSuggestionList(BaseModel):
+    """Sugerencias para una consulta, de mejor a peor."""
+    query: str
+    suggestions: List[TaskSuggestion]
@@ -2,8 +2,20 @@
 Modelos Pydantic para Task y Subtask.
 """
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, List, Optional
+from pydantic import AfterValidator, BaseModel, Field, model_validator
+
+from app.utils.dates import ensure_utc
+
+
+# Fecha de entrada: se parsea una sola vez y queda como datetime UTC con zona.
+# Las fechas sin zona se interpretan como UTC.
+UTCDateTime = Annotated[datetime, AfterValidator(ensure_utc)]
+
+# Fecha de salida: UTC sin zona, tal como la devuelve el almacenamiento.
+# Pydantic la serializa de forma nativa como '2025-01-20T09:00:00', el
+# formato ISO 8601 que la API ha devuelto siempre.
+StoredDateTime = datetime
 
 
 class SubtaskCreate(BaseModel):
@@ -25,18 +37,18 @@ class TaskCreate(BaseModel):
     """Modelo para crear una tarea."""
     title: str = Field(..., min_length=1, max_length=200)
     description: str = Field(default="", max_length=1000)
-    startDateTime: str  # ISO 8601
-    endDateTime: str  # ISO 8601
+    startDateTime: UTCDateTime  # ISO 8601
+    endDateTime: UTCDateTime  # ISO 8601
     estimatedHours: float = Field(..., gt=0)
     completed: bool = False
     subtasks: List[SubtaskCreate] = Field(default_factory=list)
+    # IDs de las tareas que deben terminar antes de que empiece esta
+    dependsOn: List[str] = Field(default_factory=list, max_length=100)
 
     @model_validator(mode='after')
     def validate_end_after_start(self):
         """Valida que endDateTime sea posterior a startDateTime."""
-        start = datetime.fromisoformat(self.startDateTime.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(self.endDateTime.replace('Z', '+00:00'))
-        if end <= start:
+        if self.endDateTime <= self.startDateTime:
             raise ValueError("endDateTime debe ser posterior a startDateTime")
         return self
 
@@ -45,11 +57,14 @@ class TaskUpdate(BaseModel):
     """Modelo para actualizar una tarea."""
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
-    startDateTime: Optional[str] = None  # ISO 8601
-    endDateTime: Optional[str] = None  # ISO 8601
+    startDateTime: Optional[UTCDateTime] = None  # ISO 8601
+    endDateTime: Optional[UTCDateTime] = None  # ISO 8601
     estimatedHours: Optional[float] = Field(None, gt=0)
     completed: Optional[bool] = None
     subtasks: Optional[List[SubtaskCreate]] = None
+    dependsOn: Optional[List[str]] = Field(None, max_length=100)
+    # Versión que el cliente leyó; alternativa a la cabecera If-Match
+    expectedVersion: Optional[int] = Field(None, ge=0)
 
 
 class TaskResponse(BaseModel):
@@ -57,11 +72,49 @@ class TaskResponse(BaseModel):
     id: str
     title: str
     description: str
-    startDateTime: str
-    endDateTime: str
+    startDateTime: StoredDateTime
+    endDateTime: StoredDateTime
     estimatedHours: float
     completed: bool
     subtasks: List[SubtaskResponse]
-    created_at: str
-    updated_at: str
+    dependsOn: List[str] = []
+    created_at: StoredDateTime
+    updated_at: StoredDateTime
+    # Aumenta con cada cambio; las tareas anteriores a este campo tienen 0
+    version: int = 0
+    # Tarea movida al archivo (solo lectura)
+    archived: bool = False
+
 
+# Campos que se pueden pedir con ?fields= en el listado de tareas
+TASK_LIST_FIELDS = (
+    "title", "description", "startDateTime", "endDateTime", "estimatedHours",
+    "completed", "subtasks", "subtaskCount", "completedSubtaskCount",
+    "dependsOn", "created_at", "updated_at", "version"
+)
+
+# Campos de la vista resumida (?view=summary)
+TASK_SUMMARY_FIELDS = (
+    "title", "startDateTime", "endDateTime", "estimatedHours", "completed",
+    "subtaskCount", "completedSubtaskCount", "created_at", "updated_at",
+    "version"
+)
+
+
+class TaskSummaryResponse(BaseModel):
+    """Modelo de respuesta parcial para listados (?fields= o ?view=summary)."""
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    startDateTime: Optional[StoredDateTime] = None
+    endDateTime: Optional[StoredDateTime] = None
+    estimatedHours: Optional[float] = None
+    completed: Optional[bool] = None
+    subtasks: Optional[List[SubtaskResponse]] = None
+    dependsOn: Optional[List[str]] = None
+    subtaskCount: Optional[int] = None
+    completedSubtaskCount: Optional[int] = None
+    created_at: Optional[StoredDateTime] = None
+    updated_at: Optional[StoredDateTime] = None
+    version: Optional[int] = None
+    archived: Optional[bool] = None
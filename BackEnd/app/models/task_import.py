@@ -0,0 +1,36 @@
+"""
+Modelos Pydantic para la importación masiva de tareas.
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    """Fila rechazada: línea del archivo donde empieza y motivo."""
+    line: int
+    message: str
+
+
+class ImportJobResponse(BaseModel):
+    """Estado de un trabajo de importación."""
+    id: str
+    # pending, running, completed o failed
+    status: str
+    format: str
+    filename: str
+    totalBytes: int
+    processedBytes: int
+    # Fracción del archivo procesada (0 a 1)
+    progress: float
+    # Filas o eventos leídos, insertados y rechazados
+    processed: int
+    imported: int
+    failed: int
+    # Primeras filas rechazadas (hasta IMPORT_MAX_REPORTED_ERRORS)
+    errors: List[ImportRowError]
+    # Motivo si el trabajo entero falló
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
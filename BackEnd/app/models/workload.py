@@ -0,0 +1,31 @@
+"""
+Modelos Pydantic para la carga de trabajo por intervalo.
+"""
+from typing import List
+from pydantic import BaseModel
+
+from app.models.task import StoredDateTime
+
+
+class WorkloadBucket(BaseModel):
+    """Carga de un día o una semana."""
+    start: StoredDateTime
+    end: StoredDateTime
+    # Horas pendientes repartidas en el intervalo
+    hours: float
+    # Tareas abiertas cuyo intervalo se solapa con este
+    tasks: int
+    capacityHours: float
+    overloaded: bool
+
+
+class WorkloadResponse(BaseModel):
+    """Carga de trabajo entre `start` y `end`, alineados al intervalo."""
+    start: StoredDateTime
+    end: StoredDateTime
+    # 'day' o 'week'
+    bucket: str
+    totalHours: float
+    # Tareas abiertas consideradas
+    tasks: int
+    buckets: List[WorkloadBucket]
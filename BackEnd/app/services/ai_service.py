@@ -1,6 +1,7 @@
 """
 Servicio para generar tareas usando IA (Gemini).
 """
+import asyncio
 import json
 import logging
 from typing import Optional
@@ -23,6 +24,10 @@ class Settings(BaseSettings):
     )
     
     gemini_api_key: str = ""
+    # gemini o fake (respuesta simulada, sin red; para pruebas de carga)
+    ai_backend: str = "gemini"
+    # Latencia simulada por el backend fake
+    ai_fake_latency_ms: float = 800.0
 
 
 settings = Settings()
@@ -32,6 +37,26 @@ if settings.gemini_api_key:
     genai.configure(api_key=settings.gemini_api_key)
 
 
+def _fake_response_text(request: AITaskRequest, now: datetime) -> str:
+    """
+    Respuesta con la misma forma que la de Gemini, para ejecutar sin red.
+    """
+    start_dt = (now + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    end_dt = start_dt + timedelta(days=2)
+    return json.dumps({
+        "title": request.title,
+        "description": request.description or f"Tarea generada para: {request.title}",
+        "startDateTime": start_dt.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endDateTime": end_dt.strftime("%Y-%m-%dT%H:%M:%S"),
+        "estimatedHours": 12,
+        "subtasks": [
+            {"title": f"Analizar {request.title}", "estimatedHours": 4},
+            {"title": f"Implementar {request.title}", "estimatedHours": 6},
+            {"title": f"Revisar {request.title}", "estimatedHours": 2}
+        ]
+    })
+
+
 async def generate_task_with_ai(request: AITaskRequest) -> Optional[AITaskResponse]:
     """
     Genera una tarea estructurada usando Gemini AI basándose en el título y descripción.
@@ -42,7 +67,7 @@ async def generate_task_with_ai(request: AITaskRequest) -> Optional[AITaskRespon
     Retorna:
     - AITaskResponse con la tarea estructurada o None si falla
     """
-    if not settings.gemini_api_key:
+    if settings.ai_backend != "fake" and not settings.gemini_api_key:
         logger.error("GEMINI_API_KEY no está configurada en el archivo .env")
         return None
     
@@ -84,14 +109,20 @@ Título de la tarea: {request.title}
         
         prompt += "\n\nResponde ÚNICAMENTE con el JSON válido, sin texto adicional antes o después, sin markdown (sin ```json o ```), sin explicaciones. Solo el objeto JSON."
 
-        # Configurar el modelo
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # Generar respuesta
-        response = model.generate_content(prompt)
-        
-        # Extraer el JSON de la respuesta
-        response_text = response.text.strip()
+        if settings.ai_backend == "fake":
+            # Simular la latencia de Gemini sin bloquear el event loop
+            await asyncio.sleep(settings.ai_fake_latency_ms / 1000)
+            response_text = _fake_response_text(request, now)
+        else:
+            # Configurar el modelo
+            model = genai.GenerativeModel('gemini-2.5-flash')
+
+            # Generar respuesta en un hilo: la llamada es bloqueante y
+            # detendría el event loop mientras responde Gemini
+            response = await asyncio.to_thread(model.generate_content, prompt)
+
+            # Extraer el JSON de la respuesta
+            response_text = response.text.strip()
         
         # Limpiar la respuesta si tiene markdown o texto adicional
         # Buscar el inicio del JSON (primer {)
@@ -0,0 +1,112 @@
+"""
+Archivado de tareas completadas.
+
+Una tarea completada que no se modifica en ARCHIVE_AFTER_DAYS se mueve de la
+colección activa a `tasks_archive`, de modo que los índices y los recorridos
+de la colección activa solo crecen con el trabajo en curso. El traslado se
+hace por lotes en segundo plano. Con varios workers, cada pasada la
+ejecuta uno solo: el que toma la reserva `archive` de la colección
+`bootstrap`.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db import database
+from app.db.bootstrap import acquire_lease
+from app.services.task_service import invalidate_counts, invalidate_indexes
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveSettings(BaseSettings):
+    """Configuración del archivado."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Días sin cambios tras los que se archiva una tarea completada (0 = nunca)
+    archive_after_days: float = 0
+    # Segundos entre pasadas del job
+    archive_interval_seconds: int = 3600
+    # Tareas por lote y lotes como máximo por pasada
+    archive_batch_size: int = 500
+    archive_max_batches: int = 20
+
+
+archive_settings = ArchiveSettings()
+
+_archive_task: Optional[asyncio.Task] = None
+
+
+async def archive_completed_tasks_service() -> int:
+    """
+    Ejecuta una pasada de archivado: mueve por lotes las tareas completadas
+    que llevan más de ARCHIVE_AFTER_DAYS sin cambios.
+
+    Retorna:
+    - Número de tareas archivadas (0 si falla o está desactivado).
+    """
+    if archive_settings.archive_after_days <= 0:
+        return 0
+    before = datetime.now(timezone.utc) - timedelta(days=archive_settings.archive_after_days)
+    total = 0
+    try:
+        for _ in range(archive_settings.archive_max_batches):
+            moved = await database.task_repository.archive_completed(
+                before, archive_settings.archive_batch_size
+            )
+            total += moved
+            if moved < archive_settings.archive_batch_size:
+                break
+        if total:
+            logger.info(f"Tareas archivadas: {total}")
+        return total
+    except Exception as e:
+        logger.error(f"Error al archivar tareas (archivadas {total}): {e}")
+        return total
+    finally:
+        if total:
+            # Las tareas archivadas salen de los totales y de los índices en
+            # memoria, de cualquier espacio
+            invalidate_counts()
+            invalidate_indexes()
+
+
+async def _archive_loop():
+    while True:
+        try:
+            # Los demás workers encuentran la reserva tomada y esperan al siguiente turno
+            if await acquire_lease("archive", archive_settings.archive_interval_seconds):
+                await archive_completed_tasks_service()
+        except Exception as e:
+            logger.error(f"Error al reservar la pasada de archivado: {e}")
+        await asyncio.sleep(archive_settings.archive_interval_seconds)
+
+
+def start_archive_job():
+    """Arranca el archivado periódico si ARCHIVE_AFTER_DAYS > 0."""
+    global _archive_task
+    if archive_settings.archive_after_days > 0 and _archive_task is None:
+        _archive_task = asyncio.create_task(_archive_loop())
+        logger.info(
+            f"Archivado cada {archive_settings.archive_interval_seconds} s de tareas "
+            f"completadas hace más de {archive_settings.archive_after_days} días"
+        )
+
+
+async def stop_archive_job():
+    """Detiene el archivado periódico; un lote a medias se repite en la próxima pasada."""
+    global _archive_task
+    if _archive_task is not None:
+        _archive_task.cancel()
+        try:
+            await _archive_task
+        except asyncio.CancelledError:
+            pass
+        _archive_task = None
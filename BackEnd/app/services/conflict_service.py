@@ -0,0 +1,181 @@
+"""
+Servicio de conflictos de calendario.
+
+Un día UTC está en conflicto cuando dos o más tareas abiertas se solapan
+con él y sus horas pendientes, repartidas como en la carga de trabajo,
+superan DAILY_CAPACITY_HOURS. Los días consecutivos en conflicto forman
+una ventana, que se devuelve con las tareas que se solapan con ella. Todo
+se calcula sobre el índice de calendario (`schedule_index`), sin comparar
+las tareas por parejas ni recorrer las que quedan fuera de los días
+consultados.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.models.schedule import ConflictsResponse, ScheduleConflict
+from app.services.schedule_index import (
+    WorkspaceSchedule,
+    day_edges,
+    schedule_index,
+    schedule_settings
+)
+from app.services.workload_service import (
+    bucket_edges,
+    default_range,
+    to_seconds,
+    workload_settings
+)
+from app.utils.dates import to_stored
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Margen para los errores de redondeo de las sumas acumuladas
+_TOLERANCE = 1e-9
+
+# (inicio, fin, horas del día más cargado, IDs de las tareas)
+ConflictWindow = Tuple[float, float, float, List[str]]
+
+
+def conflict_days(
+    schedule: WorkspaceSchedule,
+    edges: np.ndarray,
+    capacity: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tramos de días consecutivos en conflicto entre los días delimitados por
+    `edges` (segundos).
+
+    Retorna:
+    - (inicios, fines, horas del día más cargado) de cada tramo.
+    """
+    load, active = schedule.daily(edges)
+    overloaded = (load > capacity + _TOLERANCE) & (active >= 2)
+    if not overloaded.any():
+        empty = np.zeros(0)
+        return empty, empty, empty
+    # Cambios de estado: [primer día, día siguiente al último) de cada tramo
+    changes = np.flatnonzero(np.diff(np.concatenate(([0], overloaded.view(np.int8), [0]))))
+    first_days, end_days = changes[0::2], changes[1::2]
+    peaks = np.array([load[a:b].max() for a, b in zip(first_days.tolist(), end_days.tolist())])
+    return edges[first_days], edges[end_days], peaks
+
+
+def find_conflicts(
+    schedule: WorkspaceSchedule,
+    edges: np.ndarray,
+    capacity: float
+) -> List[ConflictWindow]:
+    """
+    Ventanas en conflicto entre los días delimitados por `edges` (segundos),
+    con las tareas que se solapan con cada una.
+    """
+    window_starts, window_ends, peaks = conflict_days(schedule, edges, capacity)
+    return [
+        (start, end, peak, schedule.in_start_order(schedule.overlapping(start, end)))
+        for start, end, peak in zip(window_starts.tolist(), window_ends.tolist(), peaks.tolist())
+    ]
+
+
+def _to_datetime(seconds: float) -> datetime:
+    return to_stored(_EPOCH + timedelta(seconds=seconds))
+
+
+async def get_conflicts_service(
+    workspace_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Optional[ConflictsResponse]:
+    """
+    Obtiene las ventanas de días en conflicto de un espacio.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `start`: Inicio del rango (por defecto, hoy a las 00:00 UTC).
+    - `end`: Fin del rango (por defecto, WORKLOAD_DEFAULT_DAYS después).
+
+    Retorna:
+    - ConflictsResponse, o None si no se pudo construir el índice.
+
+    Lanza:
+    - WorkloadRangeError: Si el rango está vacío o tiene más de
+      WORKLOAD_MAX_BUCKETS días.
+    """
+    edges = bucket_edges(*default_range(start, end), "day")
+    try:
+        schedule = await schedule_index.get(workspace_id)
+    except Exception as e:
+        logger.error(f"Error al construir el índice de calendario: {e}")
+        return None
+
+    capacity = workload_settings.daily_capacity_hours
+    windows = find_conflicts(schedule, to_seconds(edges), capacity)
+    logger.info(
+        f"Conflictos de calendario: {len(windows)} ventanas entre {edges[0]} y "
+        f"{edges[-1]}, espacio: {workspace_id}"
+    )
+    return ConflictsResponse(
+        start=edges[0],
+        end=edges[-1],
+        capacityHours=capacity,
+        conflicts=[
+            ScheduleConflict(
+                start=_to_datetime(window_start),
+                end=_to_datetime(window_end),
+                peakHours=round(peak, 2),
+                taskIds=task_ids
+            )
+            for window_start, window_end, peak, task_ids in windows
+        ]
+    )
+
+
+async def check_task_conflicts_service(
+    workspace_id: str,
+    task_id: str,
+    limit: Optional[int] = None
+) -> List[str]:
+    """
+    Comprueba si una tarea recién creada o actualizada entra en conflicto.
+
+    Solo se miran los días que ocupa la tarea, así que el coste no depende
+    del número de tareas ni de los conflictos del resto del calendario.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `task_id`: ID de la tarea, ya reflejada en el índice.
+    - `limit`: Máximo de IDs a devolver (opcional).
+
+    Retorna:
+    - IDs de las otras tareas con las que coincide en días sobrecargados,
+      por fecha de inicio; lista vacía si no hay conflicto, si la
+      comprobación está desactivada (SCHEDULE_CONFLICT_CHECK) o si falla.
+    """
+    if not schedule_settings.schedule_conflict_check:
+        return []
+    try:
+        schedule = await schedule_index.get(workspace_id)
+        interval = schedule.tasks.get(task_id)
+        if interval is None:
+            return []
+        start, end, _ = interval
+        window_starts, window_ends, _ = conflict_days(
+            schedule, day_edges(start, end), workload_settings.daily_capacity_hours
+        )
+        ids = set()
+        for window_start, window_end in zip(window_starts.tolist(), window_ends.tolist()):
+            ids.update(schedule.overlapping(window_start, window_end))
+        ids.discard(task_id)
+        conflicts = schedule.in_start_order(ids, limit)
+        if conflicts:
+            logger.info(
+                f"Tarea {task_id} en conflicto con otras tareas, espacio: {workspace_id}"
+            )
+        return conflicts
+    except Exception as e:
+        logger.error(f"Error al comprobar conflictos de calendario: {e}")
+        return []
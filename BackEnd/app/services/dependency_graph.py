@@ -0,0 +1,413 @@
+"""
+Grafo de dependencias entre tareas, en memoria, con método del camino
+crítico (CPM) incremental.
+
+Cada tarea es un nodo cuya duración son sus horas pendientes y cuyas
+aristas salen de `dependsOn` ("no puede empezar hasta que terminen").
+Por nodo se guardan dos distancias:
+- `head`: inicio más temprano (ES), el camino más largo desde cualquier
+  tarea sin dependencias. Solo depende de los antecesores.
+- `tail`: camino más largo desde el inicio de la tarea hasta el final del
+  proyecto, incluida su duración. Solo depende de los sucesores.
+
+Con ellas, y la duración del proyecto T = max(ES + duración), salen
+EF = ES + d, LS = T - tail, LF = LS + d y holgura = LS - ES.
+
+Cada nodo tiene además un rango que respeta el orden topológico y que se
+mantiene al añadir aristas (Pearce-Kelly: solo se reordena la región entre
+los dos extremos). Al cambiar una tarea, los `head` se propagan hacia sus
+descendientes y los `tail` hacia sus antecesores en orden de rango, y la
+propagación se corta en cuanto un valor no cambia; T se mantiene con un
+montículo de fines.
+"""
+import heapq
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app.db.repository import TaskProjection
+from app.services.workload_service import remaining_hours
+from app.services.workspace_index import WorkspaceIndexRegistry
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCY_PROJECTION = TaskProjection(
+    fields=frozenset({"title", "estimatedHours", "completed", "dependsOn"}),
+    completed_subtask_hours=True
+)
+
+# Margen para comparar sumas de horas
+_TOLERANCE = 1e-9
+
+
+class _Node:
+    __slots__ = ("title", "duration", "completed", "preds", "succs", "head", "tail", "rank")
+
+    def __init__(self):
+        self.title = ""
+        self.duration = 0.0
+        self.completed = False
+        # IDs de `dependsOn`, existan o no en el grafo
+        self.preds: List[str] = []
+        self.succs: Set[str] = set()
+        self.head = 0.0
+        self.tail = 0.0
+        # Posición en el orden topológico; los antecesores tienen rangos menores
+        self.rank = 0
+
+    @property
+    def finish(self) -> float:
+        return self.head + self.duration
+
+
+class DependencyGraph:
+    """Grafo de dependencias de un espacio de trabajo."""
+
+    def __init__(self):
+        self.nodes: Dict[str, _Node] = {}
+        # Dependencias hacia tareas que no están en el grafo (eliminadas o
+        # archivadas): se ignoran, pero se enlazan si la tarea aparece
+        self._waiting: Dict[str, Set[str]] = {}
+        # (-fin, ID): el primero válido da la duración del proyecto
+        self._finishes: List[tuple] = []
+        self._next_rank = 0
+
+    @classmethod
+    def from_docs(cls, docs: List[dict]) -> "DependencyGraph":
+        """Construye el grafo a partir de documentos con DEPENDENCY_PROJECTION."""
+        graph = cls()
+        for doc in docs:
+            node = _Node()
+            node.title = doc.get("title", "")
+            node.duration = remaining_hours(doc)
+            node.completed = bool(doc.get("completed"))
+            node.preds = _unique(str(p) for p in doc.get("dependsOn") or [])
+            graph.nodes[str(doc["_id"])] = node
+        for task_id, node in graph.nodes.items():
+            for pred in node.preds:
+                if pred in graph.nodes:
+                    graph.nodes[pred].succs.add(task_id)
+                else:
+                    graph._waiting.setdefault(pred, set()).add(task_id)
+        ordered = graph._topological_order()
+        if len(ordered) < len(graph.nodes):
+            # Ciclos creados por escrituras concurrentes en otros workers
+            logger.warning(
+                f"Dependencias circulares ignoradas en {len(graph.nodes) - len(ordered)} tareas"
+            )
+            placed = set(ordered)
+            ordered += [task_id for task_id in graph.nodes if task_id not in placed]
+        for rank, task_id in enumerate(ordered):
+            graph.nodes[task_id].rank = rank
+        graph._next_rank = len(ordered)
+        for task_id in ordered:
+            graph._recompute_head(task_id)
+        for task_id in reversed(ordered):
+            graph._recompute_tail(task_id)
+        graph._compact_finishes()
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    # Recorridos
+
+    def _existing_preds(self, task_id: str) -> List[str]:
+        return [p for p in self.nodes[task_id].preds if p in self.nodes]
+
+    def _topological_order(self) -> List[str]:
+        """
+        Orden topológico (Kahn); los nodos de un ciclo quedan fuera. Entre
+        los disponibles va primero el que se insertó antes, para que las
+        tareas relacionadas, creadas en fechas cercanas, tengan rangos
+        cercanos y los reordenamientos posteriores sean pequeños.
+        """
+        position = {n: i for i, n in enumerate(self.nodes)}
+        pending = {n: len(self._existing_preds(n)) for n in self.nodes}
+        ready = [(position[n], n) for n, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            _, current = heapq.heappop(ready)
+            ordered.append(current)
+            for succ in self.nodes[current].succs:
+                pending[succ] -= 1
+                if pending[succ] == 0:
+                    heapq.heappush(ready, (position[succ], succ))
+        return ordered
+
+    def _collect(
+        self,
+        start: str,
+        step: Callable[[str], Iterable[str]],
+        within: Callable[[int], bool]
+    ) -> Set[str]:
+        """Nodos alcanzables desde `start` siguiendo `step` con rango en `within`."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for other in step(stack.pop()):
+                if other not in seen and within(self.nodes[other].rank):
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def _link(self, pred: str, succ: str):
+        """
+        Ajusta los rangos tras añadir la arista `pred` -> `succ`: si `succ`
+        iba antes, se reordenan solo los nodos con rango entre los dos.
+        """
+        lower, upper = self.nodes[succ].rank, self.nodes[pred].rank
+        if upper < lower:
+            return
+        forward = self._collect(succ, lambda n: self.nodes[n].succs, lambda r: r <= upper)
+        if pred in forward:
+            logger.warning(f"Dependencia circular ignorada: {pred} -> {succ}")
+            return
+        backward = self._collect(pred, self._existing_preds, lambda r: r >= lower)
+        by_rank = lambda n: self.nodes[n].rank
+        moved = sorted(backward, key=by_rank) + sorted(forward, key=by_rank)
+        for task_id, rank in zip(moved, sorted(self.nodes[n].rank for n in moved)):
+            self.nodes[task_id].rank = rank
+
+    # Distancias
+
+    def _recompute_head(self, task_id: str) -> bool:
+        node = self.nodes[task_id]
+        head = max((self.nodes[p].finish for p in self._existing_preds(task_id)), default=0.0)
+        changed = head != node.head
+        node.head = head
+        heapq.heappush(self._finishes, (-node.finish, task_id))
+        return changed
+
+    def _recompute_tail(self, task_id: str) -> bool:
+        node = self.nodes[task_id]
+        tail = node.duration + max((self.nodes[s].tail for s in node.succs), default=0.0)
+        changed = tail != node.tail
+        node.tail = tail
+        return changed
+
+    def _propagate(self, head_seeds: Set[str], tail_seeds: Set[str]):
+        """
+        Recalcula `head` desde `head_seeds` hacia los descendientes y `tail`
+        desde `tail_seeds` hacia los antecesores. Los nodos se visitan en
+        orden de rango, así que cada uno se recalcula una vez, y solo se
+        sigue por los que cambian.
+        """
+        queue = [(self.nodes[n].rank, n) for n in head_seeds if n in self.nodes]
+        heapq.heapify(queue)
+        done = set()
+        while queue:
+            _, task_id = heapq.heappop(queue)
+            if task_id in done:
+                continue
+            done.add(task_id)
+            # En las semillas puede haber cambiado la duración, y con ella el fin
+            if self._recompute_head(task_id) or task_id in head_seeds:
+                for succ in self.nodes[task_id].succs:
+                    heapq.heappush(queue, (self.nodes[succ].rank, succ))
+
+        queue = [(-self.nodes[n].rank, n) for n in tail_seeds if n in self.nodes]
+        heapq.heapify(queue)
+        done = set()
+        while queue:
+            _, task_id = heapq.heappop(queue)
+            if task_id in done:
+                continue
+            done.add(task_id)
+            if self._recompute_tail(task_id) or task_id in tail_seeds:
+                for pred in self._existing_preds(task_id):
+                    heapq.heappush(queue, (-self.nodes[pred].rank, pred))
+        if len(self._finishes) > 2 * len(self.nodes) + 1024:
+            self._compact_finishes()
+
+    def _compact_finishes(self):
+        self._finishes = [(-node.finish, task_id) for task_id, node in self.nodes.items()]
+        heapq.heapify(self._finishes)
+
+    @property
+    def project_hours(self) -> float:
+        """Duración del proyecto: el mayor fin más temprano."""
+        while self._finishes:
+            negative_finish, task_id = self._finishes[0]
+            node = self.nodes.get(task_id)
+            if node is not None and node.finish == -negative_finish:
+                return node.finish
+            heapq.heappop(self._finishes)
+        return 0.0
+
+    # Escrituras
+
+    def put(self, task_id: str, doc: dict):
+        """Inserta o actualiza una tarea a partir de su documento completo."""
+        preds = _unique(str(p) for p in doc.get("dependsOn") or [])
+        duration = remaining_hours(doc)
+        node = self.nodes.get(task_id)
+        head_seeds, tail_seeds = {task_id}, {task_id}
+        if node is None:
+            node = _Node()
+            node.rank = self._next_rank
+            self._next_rank += 1
+            self.nodes[task_id] = node
+            # Tareas que ya dependían de esta
+            node.succs = {s for s in self._waiting.pop(task_id, ()) if s in self.nodes}
+            for succ in node.succs:
+                self._link(task_id, succ)
+            head_seeds |= node.succs
+        elif node.preds == preds and node.duration == duration:
+            node.title = doc.get("title", node.title)
+            node.completed = bool(doc.get("completed"))
+            return
+
+        old_preds = set(node.preds)
+        for pred in old_preds - set(preds):
+            if pred in self.nodes:
+                self.nodes[pred].succs.discard(task_id)
+                tail_seeds.add(pred)
+            else:
+                self._unwait(pred, task_id)
+        for pred in set(preds) - old_preds:
+            if pred in self.nodes:
+                self.nodes[pred].succs.add(task_id)
+                self._link(pred, task_id)
+                tail_seeds.add(pred)
+            else:
+                self._waiting.setdefault(pred, set()).add(task_id)
+        node.title = doc.get("title", node.title)
+        node.completed = bool(doc.get("completed"))
+        node.preds = preds
+        node.duration = duration
+        self._propagate(head_seeds, tail_seeds)
+
+    def remove(self, task_id: str):
+        """Retira una tarea; sus dependientes dejan de esperarla."""
+        node = self.nodes.pop(task_id, None)
+        if node is None:
+            return
+        tail_seeds = set()
+        for pred in node.preds:
+            if pred in self.nodes:
+                self.nodes[pred].succs.discard(task_id)
+                tail_seeds.add(pred)
+            else:
+                self._unwait(pred, task_id)
+        if node.succs:
+            self._waiting[task_id] = set(node.succs)
+        self._propagate(set(node.succs), tail_seeds)
+
+    def _unwait(self, pred: str, task_id: str):
+        waiting = self._waiting.get(pred)
+        if waiting is not None:
+            waiting.discard(task_id)
+            if not waiting:
+                del self._waiting[pred]
+
+    # Consultas
+
+    def find_cycle(self, task_id: str, preds: List[str]) -> Optional[List[str]]:
+        """
+        Comprueba si `task_id` puede depender de `preds` sin crear un ciclo.
+
+        Retorna:
+        - None si no hay ciclo, o el ciclo como lista de IDs
+          [task_id, pred, ..., task_id].
+        """
+        if task_id in preds:
+            return [task_id, task_id]
+        if task_id in self.nodes:
+            # Hay ciclo si task_id es antecesor de alguna de las nuevas
+            # dependencias; solo puede serlo de las que van después en el
+            # orden topológico, y por caminos de nodos que también van después
+            floor = self.nodes[task_id].rank
+        elif task_id in self._waiting:
+            # Tarea que este proceso aún no tiene (creada en otro worker)
+            # pero de la que ya dependen otras: sin rango, se recorre todo
+            floor = -1
+        else:
+            return None
+        parent: Dict[str, Optional[str]] = {
+            p: None for p in preds if p in self.nodes and self.nodes[p].rank > floor
+        }
+        stack = list(parent)
+        while stack:
+            current = stack.pop()
+            for pred in self.nodes[current].preds:
+                if pred == task_id:
+                    chain = [task_id]
+                    step = current
+                    while step is not None:
+                        chain.append(step)
+                        step = parent[step]
+                    # chain va de task_id hacia la dependencia directa; se invierte
+                    return [task_id] + chain[::-1]
+                if pred in parent or pred not in self.nodes or self.nodes[pred].rank < floor:
+                    continue
+                parent[pred] = current
+                stack.append(pred)
+        return None
+
+    def critical_path(self, task_id: str) -> List[str]:
+        """
+        Cadena más larga que pasa por la tarea: los antecesores que fijan su
+        inicio más temprano y los sucesores que más alarga. Se detiene
+        cuando lo que queda no tiene horas pendientes.
+        """
+        path = [task_id]
+        # Evita recorrer en bucle los ciclos que ya estuvieran guardados
+        seen = {task_id}
+        current = task_id
+        while True:
+            preds = self._existing_preds(current)
+            if not preds:
+                break
+            best = max(preds, key=lambda p: self.nodes[p].finish)
+            if self.nodes[best].finish <= _TOLERANCE or best in seen:
+                break
+            path.append(best)
+            seen.add(best)
+            current = best
+        path.reverse()
+        current = task_id
+        while self.nodes[current].succs:
+            best = max(self.nodes[current].succs, key=lambda s: self.nodes[s].tail)
+            if self.nodes[best].tail <= _TOLERANCE or best in seen:
+                break
+            path.append(best)
+            seen.add(best)
+            current = best
+        return path
+
+    def timing(self, task_id: str, project_hours: float) -> Dict[str, float]:
+        """ES, EF, LS, LF y holgura de una tarea, en horas desde el inicio."""
+        node = self.nodes[task_id]
+        latest_start = project_hours - node.tail
+        slack = latest_start - node.head
+        return {
+            "earliestStart": node.head,
+            "earliestFinish": node.finish,
+            "latestStart": latest_start,
+            "latestFinish": latest_start + node.duration,
+            "slack": slack if slack > _TOLERANCE else 0.0
+        }
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    """Quita duplicados conservando el orden."""
+    return list(dict.fromkeys(values))
+
+
+class DependencyIndex(WorkspaceIndexRegistry[DependencyGraph]):
+    """Grafos de dependencias por espacio de trabajo."""
+
+    name = "Grafo de dependencias"
+
+    def build(self, docs: List[dict]) -> DependencyGraph:
+        return DependencyGraph.from_docs(docs)
+
+    def update(self, index: DependencyGraph, task_id: str, doc: Optional[dict]):
+        if doc is None:
+            index.remove(task_id)
+        else:
+            index.put(task_id, doc)
+
+
+dependency_index = DependencyIndex(DEPENDENCY_PROJECTION)
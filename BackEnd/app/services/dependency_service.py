@@ -0,0 +1,178 @@
+"""
+Servicio de dependencias entre tareas y camino crítico.
+
+Valida `dependsOn` antes de cada escritura (IDs existentes y sin ciclos) y
+expone la planificación por el método del camino crítico calculada sobre
+el grafo en memoria (`dependency_index`). El proyecto es el espacio de
+trabajo completo y las horas se cuentan desde su inicio.
+"""
+import logging
+from typing import List, Optional
+
+from bson import ObjectId
+
+from app.db import database
+from app.models.schedule import (
+    CriticalPathResponse,
+    ProjectScheduleResponse,
+    ScheduledTask
+)
+from app.services.dependency_graph import DependencyGraph, dependency_index
+
+logger = logging.getLogger(__name__)
+
+
+class TaskDependencyError(Exception):
+    """`dependsOn` referencia tareas inexistentes o crea un ciclo."""
+
+
+def _scheduled_task(graph: DependencyGraph, task_id: str, project_hours: float) -> ScheduledTask:
+    node = graph.nodes[task_id]
+    timing = graph.timing(task_id, project_hours)
+    return ScheduledTask(
+        id=task_id,
+        title=node.title,
+        durationHours=round(node.duration, 2),
+        critical=timing["slack"] == 0,
+        dependsOn=list(node.preds),
+        **{key: round(value, 2) for key, value in timing.items()}
+    )
+
+
+async def _stored_dependencies(workspace_id: str, task_id: Optional[str]) -> set:
+    """IDs del `dependsOn` guardado de una tarea (vacío si se está creando)."""
+    if task_id is None:
+        return set()
+    doc = await database.task_repository.get(workspace_id, ObjectId(task_id))
+    return {str(dep) for dep in doc.get("dependsOn") or []} if doc else set()
+
+
+async def validate_dependencies(
+    workspace_id: str,
+    task_id: Optional[str],
+    depends_on: List[str]
+) -> List[ObjectId]:
+    """
+    Valida las dependencias de una tarea antes de guardarlas.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `task_id`: ID de la tarea, o None si se está creando (una tarea nueva
+      no puede cerrar un ciclo).
+    - `depends_on`: IDs recibidos; se descartan los repetidos.
+
+    Retorna:
+    - Lista de ObjectId para guardar.
+
+    Lanza:
+    - TaskDependencyError: Si algún ID no es válido, no existe en el
+      espacio (salvo que ya estuviera guardado en la tarea), es la propia
+      tarea o cierra un ciclo.
+    """
+    depends_on = list(dict.fromkeys(depends_on))
+    invalid = [dep for dep in depends_on if not ObjectId.is_valid(dep)]
+    if invalid:
+        raise TaskDependencyError(f"IDs de dependencia inválidos: {', '.join(invalid)}")
+    if task_id is not None and task_id in depends_on:
+        raise TaskDependencyError("Una tarea no puede depender de sí misma")
+    if not depends_on:
+        return []
+
+    graph = await dependency_index.get(workspace_id)
+    stored: Optional[set] = None
+    for dep in depends_on:
+        if dep in graph.nodes:
+            continue
+        if stored is None:
+            stored = await _stored_dependencies(workspace_id, task_id)
+        # Un cliente que reenvía las dependencias que ya tenía la tarea no
+        # falla porque otra petición eliminara una de ellas
+        if dep in stored:
+            continue
+        # Puede haberla creado otro worker después de construir el grafo
+        if not await database.task_repository.get(workspace_id, ObjectId(dep), include_archived=True):
+            raise TaskDependencyError(f"La tarea {dep} no existe")
+    if task_id is not None:
+        cycle = graph.find_cycle(task_id, depends_on)
+        if cycle:
+            raise TaskDependencyError(f"Dependencia circular: {' -> '.join(cycle)}")
+    return [ObjectId(dep) for dep in depends_on]
+
+
+async def get_critical_path_service(
+    workspace_id: str,
+    task_id: str
+) -> Optional[CriticalPathResponse]:
+    """
+    Obtiene la cadena de dependencias más larga que pasa por una tarea.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `task_id`: ID de la tarea.
+
+    Retorna:
+    - CriticalPathResponse, o None si la tarea no existe o falla el grafo.
+    """
+    try:
+        graph = await dependency_index.get(workspace_id)
+        if task_id not in graph.nodes:
+            logger.info(f"Tarea no encontrada para el camino crítico: {task_id}")
+            return None
+        project_hours = graph.project_hours
+        path = [_scheduled_task(graph, step, project_hours) for step in graph.critical_path(task_id)]
+        node = graph.nodes[task_id]
+        return CriticalPathResponse(
+            taskId=task_id,
+            projectHours=round(project_hours, 2),
+            lengthHours=round(node.head + node.tail, 2),
+            critical=next(step.critical for step in path if step.id == task_id),
+            path=path
+        )
+    except Exception as e:
+        logger.error(f"Error al calcular el camino crítico: {e}")
+        return None
+
+
+async def get_project_schedule_service(
+    workspace_id: str,
+    critical_only: bool = False,
+    include_completed: bool = False,
+    skip: int = 0,
+    limit: int = 100
+) -> Optional[ProjectScheduleResponse]:
+    """
+    Obtiene la planificación de las tareas de un espacio, por inicio más
+    temprano.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `critical_only`: Solo las tareas sin holgura.
+    - `include_completed`: Incluir las tareas completadas (duración 0).
+    - `skip`: Número de tareas a omitir.
+    - `limit`: Número máximo de tareas.
+
+    Retorna:
+    - ProjectScheduleResponse, o None si falla el grafo.
+    """
+    try:
+        graph = await dependency_index.get(workspace_id)
+        project_hours = graph.project_hours
+        selected = []
+        for task_id, node in graph.nodes.items():
+            if node.completed and not include_completed:
+                continue
+            if critical_only and graph.timing(task_id, project_hours)["slack"] > 0:
+                continue
+            selected.append((node.head, task_id))
+        selected.sort()
+        return ProjectScheduleResponse(
+            projectHours=round(project_hours, 2),
+            total=len(selected),
+            tasks=[
+                _scheduled_task(graph, task_id, project_hours)
+                for _, task_id in selected[skip:skip + limit]
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error al calcular la planificación del proyecto: {e}")
+        return None
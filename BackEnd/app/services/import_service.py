@@ -0,0 +1,485 @@
+"""
+Importación masiva de tareas desde CSV o iCalendar (.ics).
+
+La subida se copia a un archivo temporal y se procesa en segundo plano: el
+archivo se lee línea a línea, cada fila o VEVENT se valida con las reglas de
+TaskCreate y las tareas válidas se insertan en lotes con `insert_many`.
+Mientras se inserta un lote, el siguiente se prepara en un hilo, de modo que
+el ritmo lo marca el almacenamiento y la memoria no depende del tamaño del
+archivo.
+"""
+import asyncio
+import csv
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from bson import ObjectId
+from fastapi import UploadFile
+from pydantic import ConfigDict, ValidationError
+from pydantic_settings import BaseSettings
+
+from app.db import database
+from app.models.task import TaskCreate
+from app.models.task_import import ImportJobResponse
+from app.services.task_service import invalidate_counts, invalidate_indexes, prepare_task_document
+from app.utils.dates import to_stored
+from app.utils.ical import iter_events, parse_datetime, parse_duration, unescape_text
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ics")
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "text/calendar": "ics",
+}
+# Columnas CSV que se leen (el resto se ignora) y las obligatorias
+CSV_COLUMNS = ("title", "description", "startDateTime", "endDateTime", "estimatedHours", "completed")
+CSV_REQUIRED_COLUMNS = ("title", "startDateTime", "endDateTime", "estimatedHours")
+# Propiedad opcional de un VEVENT con las horas estimadas
+ICS_ESTIMATED_HOURS = "X-ESTIMATED-HOURS"
+# Tamaño de cada lectura al copiar la subida
+COPY_CHUNK_BYTES = 1 << 20
+# Trabajos terminados que se conservan en memoria
+FINISHED_JOBS_KEPT = 100
+
+
+class ImportSettings(BaseSettings):
+    """Configuración de la importación masiva."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Tareas por lote de inserción
+    import_batch_size: int = 1000
+    # Tamaño máximo del archivo subido
+    import_max_upload_mb: float = 200
+    # Importaciones simultáneas por proceso; el resto espera en cola
+    import_max_concurrent_jobs: int = 2
+    # Filas rechazadas que se detallan en el estado del trabajo
+    import_max_reported_errors: int = 100
+    # Horas que se conserva el estado de un trabajo en MongoDB
+    import_job_ttl_hours: float = 24
+    # Directorio de los archivos temporales (vacío = el del sistema)
+    import_tmp_dir: str = ""
+
+
+import_settings = ImportSettings()
+
+
+class ImportFileTooLarge(Exception):
+    """El archivo supera IMPORT_MAX_UPLOAD_MB."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"el archivo supera {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class ImportFormatError(Exception):
+    """El archivo no tiene el formato esperado; el trabajo entero falla."""
+
+
+class ImportJob:
+    """Estado de un trabajo de importación en este proceso."""
+
+    def __init__(self, workspace_id: str, file_format: str, filename: str, path: str, total_bytes: int):
+        self.id = str(ObjectId())
+        self.workspace_id = workspace_id
+        self.format = file_format
+        self.filename = filename
+        self.path = path
+        self.total_bytes = total_bytes
+        self.processed_bytes = 0
+        self.status = "pending"
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def reject(self, line: int, message: str, count: int = 1):
+        """Cuenta filas rechazadas y detalla las primeras."""
+        self.failed += count
+        if len(self.errors) < import_settings.import_max_reported_errors:
+            self.errors.append({"line": line, "message": message})
+
+    def to_doc(self) -> dict:
+        """Documento del estado, tal como se guarda en `import_jobs`."""
+        last_change = self.finished_at or datetime.now(timezone.utc)
+        return {
+            "_id": self.id,
+            "workspace_id": self.workspace_id,
+            "status": self.status,
+            "format": self.format,
+            "filename": self.filename,
+            "totalBytes": self.total_bytes,
+            "processedBytes": self.processed_bytes,
+            "processed": self.processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "error": self.error,
+            "created_at": to_stored(self.created_at),
+            "started_at": to_stored(self.started_at) if self.started_at else None,
+            "finished_at": to_stored(self.finished_at) if self.finished_at else None,
+            # Índice TTL: un trabajo abandonado caduca igual que uno terminado
+            "expires_at": last_change + timedelta(hours=import_settings.import_job_ttl_hours),
+        }
+
+
+# Trabajos de este proceso por id
+_jobs: Dict[str, ImportJob] = {}
+_job_slots: Optional[asyncio.Semaphore] = None
+
+
+def _job_doc_to_response(doc: dict) -> ImportJobResponse:
+    """Convierte el estado guardado a ImportJobResponse."""
+    total = doc["totalBytes"]
+    if doc["status"] == "completed" or not total:
+        progress = 1.0 if doc["status"] == "completed" else 0.0
+    else:
+        progress = min(1.0, doc["processedBytes"] / total)
+    return ImportJobResponse(
+        id=doc["_id"],
+        progress=round(progress, 4),
+        **{k: v for k, v in doc.items() if k not in ("_id", "workspace_id", "expires_at")}
+    )
+
+
+def detect_import_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """
+    Deduce el formato por la extensión del archivo o su tipo MIME.
+
+    Retorna:
+    - 'csv', 'ics' o None si no se reconoce.
+    """
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension in IMPORT_FORMATS:
+        return extension
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPE_FORMATS.get(media_type)
+
+
+# Lectura del archivo (se ejecuta en un hilo)
+
+class _LineReader:
+    """Líneas UTF-8 de un archivo binario, contando los bytes leídos."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[str]:
+        first = True
+        for raw in self.file:
+            self.bytes_read += len(raw)
+            try:
+                line = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                raise ImportFormatError("El archivo no está codificado en UTF-8")
+            if first:
+                line = line.lstrip("\ufeff")
+                first = False
+            yield line
+
+
+# Cada fila leída: (línea donde empieza, datos para TaskCreate o motivo del rechazo)
+_Row = Tuple[int, Union[dict, str]]
+
+
+def _csv_rows(lines: Iterable[str]) -> Iterator[_Row]:
+    """Filas de un CSV con cabecera; los valores vacíos toman el valor por defecto."""
+    reader = csv.DictReader(lines)
+    header = reader.fieldnames or []
+    missing = [column for column in CSV_REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ImportFormatError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+    line = reader.line_num + 1
+    for row in reader:
+        yield line, {
+            column: row[column] for column in CSV_COLUMNS
+            if row.get(column) not in (None, "")
+        }
+        line = reader.line_num + 1
+
+
+def _event_payload(event: dict) -> dict:
+    """
+    Datos de TaskCreate a partir de un VEVENT. Sin DTEND se usa DURATION
+    (o un día para eventos de día completo); sin X-ESTIMATED-HOURS, las
+    horas estimadas son la duración del evento.
+    """
+    if "DTSTART" not in event:
+        raise ValueError("VEVENT sin DTSTART")
+    start = parse_datetime(event["DTSTART"])
+    if "DTEND" in event:
+        end = parse_datetime(event["DTEND"])
+    elif "DURATION" in event:
+        end = start + parse_duration(event["DURATION"][1])
+    elif event["DTSTART"][0].get("VALUE") == "DATE":
+        end = start + timedelta(days=1)
+    else:
+        raise ValueError("VEVENT sin DTEND ni DURATION")
+
+    if ICS_ESTIMATED_HOURS in event:
+        estimated_hours = event[ICS_ESTIMATED_HOURS][1].strip()
+    else:
+        estimated_hours = round((end - start).total_seconds() / 3600, 2)
+    return {
+        "title": unescape_text(event["SUMMARY"][1]).strip() if "SUMMARY" in event else "",
+        "description": unescape_text(event["DESCRIPTION"][1]) if "DESCRIPTION" in event else "",
+        "startDateTime": start,
+        "endDateTime": end,
+        "estimatedHours": estimated_hours,
+    }
+
+
+def _ics_rows(lines: Iterable[str]) -> Iterator[_Row]:
+    """VEVENTs de un calendario como filas."""
+    for line, event in iter_events(lines):
+        try:
+            yield line, _event_payload(event)
+        except ValueError as e:
+            yield line, str(e)
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Resumen legible de los errores de TaskCreate."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'tarea'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _next_batch(rows: Iterator[_Row], workspace_id: str) -> Tuple[List[dict], List[Tuple[int, str]], int]:
+    """
+    Lee y valida hasta IMPORT_BATCH_SIZE filas. Se ejecuta en un hilo y no
+    toca el trabajo, que se actualiza a la vez desde el bucle de eventos.
+
+    Retorna:
+    - (documentos listos para insertar, filas rechazadas con su línea y
+      motivo, filas leídas).
+    """
+    documents = []
+    rejections = []
+    read = 0
+    for line, payload in islice(rows, import_settings.import_batch_size):
+        read += 1
+        if isinstance(payload, str):
+            rejections.append((line, payload))
+            continue
+        try:
+            task = TaskCreate.model_validate(payload)
+        except ValidationError as e:
+            rejections.append((line, _validation_message(e)))
+            continue
+        document = prepare_task_document(workspace_id, task.model_dump())
+        # _id asignado aquí para insertar el lote sin releerlo
+        document["_id"] = ObjectId()
+        documents.append(document)
+    return documents, rejections, read
+
+
+# Ejecución del trabajo
+
+async def _read_batch(job: ImportJob, rows: Iterator[_Row], reader: _LineReader) -> Tuple[List[dict], bool]:
+    """
+    Prepara el siguiente lote en un hilo y aplica su resultado al trabajo.
+
+    Retorna:
+    - (documentos listos para insertar, True si el archivo se terminó).
+    """
+    documents, rejections, read = await asyncio.to_thread(_next_batch, rows, job.workspace_id)
+    for line, message in rejections:
+        job.reject(line, message)
+    job.processed += read
+    # El hilo ya terminó: nadie más lee del archivo
+    job.processed_bytes = reader.bytes_read
+    return documents, read < import_settings.import_batch_size
+
+
+async def _insert_batch(job: ImportJob, documents: List[dict]):
+    if not documents:
+        return
+    inserted = await database.task_repository.insert_many(documents)
+    job.imported += inserted
+    if inserted < len(documents):
+        job.reject(0, "El almacenamiento rechazó parte de un lote", len(documents) - inserted)
+    invalidate_counts(job.workspace_id)
+    # Reconstruir es más barato que insertar el lote tarea a tarea
+    invalidate_indexes(job.workspace_id)
+
+
+async def _publish(job: ImportJob):
+    """Guarda el estado en MongoDB para que cualquier worker pueda consultarlo."""
+    if database.db is None:
+        return
+    try:
+        await database.db.import_jobs.replace_one({"_id": job.id}, job.to_doc(), upsert=True)
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el estado de la importación {job.id}: {e}")
+
+
+async def _run_job(job: ImportJob):
+    global _job_slots
+    if _job_slots is None:
+        _job_slots = asyncio.Semaphore(import_settings.import_max_concurrent_jobs)
+    try:
+        async with _job_slots:
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+            await _publish(job)
+            with open(job.path, "rb") as f:
+                reader = _LineReader(f)
+                rows = _csv_rows(reader) if job.format == "csv" else _ics_rows(reader)
+                documents, done = await _read_batch(job, rows, reader)
+                while not done:
+                    # El siguiente lote se prepara en un hilo mientras se inserta este
+                    (next_documents, done), _ = await asyncio.gather(
+                        _read_batch(job, rows, reader),
+                        _insert_batch(job, documents)
+                    )
+                    documents = next_documents
+                    await _publish(job)
+                await _insert_batch(job, documents)
+            job.status = "completed"
+            logger.info(
+                f"Importación {job.id} completada: {job.imported} tareas, "
+                f"{job.failed} rechazadas, espacio: {job.workspace_id}"
+            )
+    except asyncio.CancelledError:
+        job.status = "failed"
+        job.error = "Importación interrumpida al cerrar el servidor"
+        raise
+    except ImportFormatError as e:
+        job.status = "failed"
+        job.error = str(e)
+        logger.warning(f"Importación {job.id} rechazada: {e}")
+    except Exception as e:
+        job.status = "failed"
+        job.error = "Error interno al importar"
+        logger.error(f"Error en la importación {job.id}: {e}")
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+        try:
+            os.remove(job.path)
+        except OSError:
+            pass
+        await _publish(job)
+
+
+async def _spool_upload(upload: UploadFile, file_format: str) -> Tuple[str, int]:
+    """
+    Copia la subida a un archivo temporal propio, que sobrevive a la petición.
+
+    Lanza:
+    - ImportFileTooLarge: Si supera IMPORT_MAX_UPLOAD_MB.
+    """
+    max_bytes = int(import_settings.import_max_upload_mb * 1024 * 1024)
+    fd, path = tempfile.mkstemp(
+        prefix="intellitasker-import-",
+        suffix=f".{file_format}",
+        dir=import_settings.import_tmp_dir or None
+    )
+    total = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(COPY_CHUNK_BYTES):
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ImportFileTooLarge(max_bytes)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, total
+
+
+def _register(job: ImportJob):
+    """Añade el trabajo y olvida los terminados más antiguos."""
+    _jobs[job.id] = job
+    finished = [job_id for job_id, j in _jobs.items() if j.finished]
+    for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+        del _jobs[job_id]
+
+
+async def start_import_service(
+    workspace_id: str,
+    upload: UploadFile,
+    file_format: str
+) -> Optional[ImportJobResponse]:
+    """
+    Inicia la importación de un archivo en segundo plano.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo de las tareas importadas.
+    - `upload`: Archivo subido.
+    - `file_format`: 'csv' o 'ics'.
+
+    Retorna:
+    - ImportJobResponse en estado 'pending' o None si falla.
+
+    Lanza:
+    - ImportFileTooLarge: Si el archivo supera IMPORT_MAX_UPLOAD_MB.
+    """
+    try:
+        path, total_bytes = await _spool_upload(upload, file_format)
+        job = ImportJob(workspace_id, file_format, upload.filename or "", path, total_bytes)
+        _register(job)
+        await _publish(job)
+        job.task = asyncio.create_task(_run_job(job))
+        logger.info(
+            f"Importación {job.id} en cola: {job.filename} ({total_bytes} bytes, {file_format}), "
+            f"espacio: {workspace_id}"
+        )
+        return _job_doc_to_response(job.to_doc())
+    except ImportFileTooLarge:
+        raise
+    except Exception as e:
+        logger.error(f"Error al iniciar importación: {e}")
+        return None
+
+
+async def get_import_job_service(workspace_id: str, job_id: str) -> Optional[ImportJobResponse]:
+    """
+    Obtiene el estado de un trabajo de importación del espacio.
+
+    Retorna:
+    - ImportJobResponse o None si no existe, caducó o es de otro espacio.
+    """
+    try:
+        job = _jobs.get(job_id)
+        if job is not None:
+            doc = job.to_doc()
+        elif database.db is not None:
+            # Iniciado en otro worker
+            doc = await database.db.import_jobs.find_one({"_id": job_id})
+        else:
+            doc = None
+        if not doc or doc["workspace_id"] != workspace_id:
+            return None
+        return _job_doc_to_response(doc)
+    except Exception as e:
+        logger.error(f"Error al obtener importación: {e}")
+        return None
+
+
+async def stop_import_jobs():
+    """Cancela las importaciones en curso; se llama al cerrar la aplicación."""
+    running = [job.task for job in _jobs.values() if job.task is not None and not job.task.done()]
+    for task in running:
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
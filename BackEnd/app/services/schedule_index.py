@@ -0,0 +1,368 @@
+"""
+Índice en memoria de los intervalos de las tareas abiertas, para detectar
+conflictos de calendario sin comparar las tareas por parejas.
+
+Por cada espacio de trabajo se guardan las tareas abiertas con horas
+pendientes por días UTC: la carga y las tareas abiertas de cada día como
+sumas por rangos de días (un árbol de Fenwick) y las tareas que ocupa cada
+día en un árbol de segmentos. El índice se construye con `scan` la primera
+vez que se consulta el espacio, con numpy, y después cada escritura de
+este proceso inserta o retira su tarea en O(log D), siendo D el rango de
+días representable. Una consulta de N días cuesta O(log D + N) más las
+tareas que devuelve, sin depender del total de tareas del espacio.
+
+La construcción bajo demanda y la caducidad son las de `workspace_index`.
+"""
+import heapq
+import math
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.services.workload_service import (
+    WORKLOAD_PROJECTION,
+    remaining_hours,
+    to_seconds
+)
+from app.services.workspace_index import WorkspaceIndexRegistry
+from app.utils.dates import to_stored
+
+DAY_SECONDS = 86400.0
+
+# Los días se numeran desde 1970 más _KEY_OFFSET, y los árboles cubren
+# 2^_KEY_BITS claves: caben todas las fechas de `datetime` (años 1 a 9999)
+_KEY_BITS = 22
+_KEY_SIZE = 1 << _KEY_BITS
+_KEY_OFFSET = 1 << 20
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Inicio y fin en segundos y ritmo en horas por segundo
+Interval = Tuple[float, float, float]
+
+
+class ScheduleIndexSettings(BaseSettings):
+    """Configuración del índice de calendario."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Comprobar conflictos al crear y actualizar tareas
+    schedule_conflict_check: bool = True
+
+
+schedule_settings = ScheduleIndexSettings()
+
+
+def _seconds(value: datetime) -> float:
+    return (to_stored(value) - _EPOCH).total_seconds()
+
+
+def task_interval(doc: dict) -> Optional[Interval]:
+    """
+    Intervalo de una tarea completa, o None si no ocupa calendario
+    (completada o sin horas pendientes).
+    """
+    hours = remaining_hours(doc)
+    start, end = _seconds(doc["startDateTime"]), _seconds(doc["endDateTime"])
+    if hours <= 0 or end <= start:
+        return None
+    return start, end, hours / (end - start)
+
+
+def day_edges(start: float, end: float) -> np.ndarray:
+    """Bordes de los días UTC que cubren [start, end), en segundos."""
+    first = np.floor(start / DAY_SECONDS) * DAY_SECONDS
+    last = np.ceil(end / DAY_SECONDS) * DAY_SECONDS
+    return np.arange(first, last + DAY_SECONDS / 2, DAY_SECONDS)
+
+
+class WorkspaceSchedule:
+    """
+    Intervalos de las tareas abiertas de un espacio, por días UTC.
+
+    Cada tarea suma 1 a las tareas abiertas de los días que ocupa y, a la
+    carga de cada uno, sus horas de ese día: las de todos los días
+    intermedios son iguales, así que cuatro diferencias entre días
+    consecutivos (`_diffs`) describen la tarea completa. Un árbol de
+    Fenwick sobre los días (`_tree`) suma las diferencias hasta un día en
+    O(log D). Para saber qué tareas ocupan un día, un árbol de segmentos
+    sobre los días (`_spans`) guarda cada tarea en los O(log D) nodos que
+    cubren sus días, y `_by_start` las agrupa por día de inicio.
+
+    Cada entrada cuenta las tareas que la forman y se borra al quedarse sin
+    ninguna, de modo que insertar y retirar tareas no deja restos de
+    redondeo en los días vacíos.
+    """
+
+    def __init__(self, tasks: Dict[str, Interval]):
+        self.tasks = tasks
+        # Clave de día -> [tareas, Δ tareas abiertas, Δ horas]
+        self._diffs: Dict[int, list] = {}
+        # Nodo de Fenwick -> [tareas, suma de Δ abiertas, suma de Δ horas]
+        self._tree: Dict[int, list] = {}
+        # Nodo del árbol de segmentos -> IDs de las tareas que lo cubren
+        self._spans: Dict[int, Set[str]] = {}
+        # Clave del día de inicio -> IDs
+        self._by_start: Dict[int, Set[str]] = {}
+        if tasks:
+            self._build(tasks)
+
+    def _build(self, tasks: Dict[str, Interval]):
+        """Construye las estructuras de todas las tareas a la vez con numpy."""
+        ids = np.array(list(tasks), dtype=object)
+        values = np.array(list(tasks.values()), dtype=np.float64).reshape(-1, 3)
+        firsts, lasts = _day_keys(values[:, 0], values[:, 1])
+        keys, counts, hours = _changes(values[:, 0], values[:, 1], values[:, 2], firsts, lasts)
+
+        # Diferencias por día y, por cada nivel de Fenwick, los nodos que las
+        # contienen: los de ese nivel con el bit correspondiente de key - 1 a 0
+        self._diffs = _grouped_sums(keys, counts, hours)
+        unique = np.fromiter(self._diffs, dtype=np.int64, count=len(self._diffs))
+        diffs = np.array(list(self._diffs.values()), dtype=np.float64).reshape(-1, 3)
+        for level in range(_KEY_BITS):
+            inside = ((unique - 1) >> level) & 1 == 0
+            nodes = (((unique[inside] - 1) >> (level + 1)) << (level + 1)) + (1 << level)
+            self._tree.update(_grouped_sums(nodes, diffs[inside, 1], diffs[inside, 2], diffs[inside, 0]))
+
+        # Descomposición de [primer día, último día] de todas las tareas a la vez
+        low, high = firsts + _KEY_SIZE, lasts + _KEY_SIZE + 1
+        rows = np.arange(len(ids))
+        nodes, members = [], []
+        while len(rows):
+            odd = (low & 1) == 1
+            nodes.append(low[odd])
+            members.append(rows[odd])
+            low = low + odd
+            odd = (high & 1) == 1
+            high = high - odd
+            nodes.append(high[odd])
+            members.append(rows[odd])
+            low, high = low >> 1, high >> 1
+            pending = low < high
+            low, high, rows = low[pending], high[pending], rows[pending]
+        self._spans = _grouped_ids(np.concatenate(nodes), ids[np.concatenate(members)])
+        self._by_start = _grouped_ids(firsts, ids)
+
+    @classmethod
+    def from_docs(cls, docs: List[dict]) -> "WorkspaceSchedule":
+        """Construye el índice a partir de documentos con WORKLOAD_PROJECTION."""
+        starts = to_seconds([doc["startDateTime"] for doc in docs])
+        ends = to_seconds([doc["endDateTime"] for doc in docs])
+        hours = np.fromiter(
+            (
+                (doc.get("estimatedHours") or 0) - (doc.get("completedSubtaskHours") or 0)
+                for doc in docs
+            ),
+            dtype=np.float64,
+            count=len(docs)
+        )
+        keep = (hours > 0) & (ends > starts)
+        ids = [str(doc["_id"]) for doc, kept in zip(docs, keep.tolist()) if kept]
+        starts, ends, hours = starts[keep], ends[keep], hours[keep]
+        rates = hours / (ends - starts)
+        return cls(dict(zip(ids, zip(starts.tolist(), ends.tolist(), rates.tolist()))))
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def _change(self, key: int, count: int, hours: float, sign: int):
+        """Suma (o resta, con `sign` -1) una diferencia del día `key`."""
+        entry = self._diffs.setdefault(key, [0, 0, 0.0])
+        entry[0] += sign
+        entry[1] += sign * count
+        entry[2] += sign * hours
+        if not entry[0]:
+            del self._diffs[key]
+        node = key
+        while node < _KEY_SIZE:
+            entry = self._tree.setdefault(node, [0, 0, 0.0])
+            entry[0] += sign
+            entry[1] += sign * count
+            entry[2] += sign * hours
+            if not entry[0]:
+                del self._tree[node]
+            node += node & -node
+
+    def _update(self, task_id: str, interval: Interval, sign: int):
+        start, end, rate = interval
+        first, last = _day_keys(start, end)
+        for key, count, hours in zip(*_changes(start, end, rate, first, last)):
+            self._change(key, count, hours, sign)
+        for node in _span_nodes(first, last):
+            if sign > 0:
+                self._spans.setdefault(node, set()).add(task_id)
+            else:
+                members = self._spans[node]
+                members.discard(task_id)
+                if not members:
+                    del self._spans[node]
+        if sign > 0:
+            self._by_start.setdefault(first, set()).add(task_id)
+        else:
+            members = self._by_start[first]
+            members.discard(task_id)
+            if not members:
+                del self._by_start[first]
+
+    def remove(self, task_id: str):
+        """Retira una tarea; no hace nada si no está."""
+        interval = self.tasks.pop(task_id, None)
+        if interval is not None:
+            self._update(task_id, interval, -1)
+
+    def put(self, task_id: str, interval: Optional[Interval]):
+        """Inserta o sustituye una tarea; con `interval` None la retira."""
+        if self.tasks.get(task_id) == interval:
+            return
+        self.remove(task_id)
+        if interval is None:
+            return
+        self.tasks[task_id] = interval
+        self._update(task_id, interval, 1)
+
+    def daily(self, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (horas, tareas abiertas) de cada día entre `edges`, que deben ser
+        bordes de días UTC consecutivos, como los de `day_edges`. Cuesta
+        O(log D) más un paso por día.
+        """
+        first = _day_key(float(edges[0]))
+        days = len(edges) - 1
+        load = np.zeros(days)
+        active = np.zeros(days, dtype=np.int64)
+        count, hours = 0, 0.0
+        node = first
+        while node > 0:
+            entry = self._tree.get(node)
+            if entry is not None:
+                count += entry[1]
+                hours += entry[2]
+            node -= node & -node
+        for day in range(days):
+            if day:
+                entry = self._diffs.get(first + day)
+                if entry is not None:
+                    count += entry[1]
+                    hours += entry[2]
+            active[day] = count
+            # Sin tareas abiertas la carga es 0, aunque queden restos de redondeo
+            load[day] = hours if count else 0.0
+        return np.maximum(load, 0.0), active
+
+    def overlapping(self, start: float, end: float) -> Set[str]:
+        """
+        IDs de las tareas que se solapan con los días UTC de [start, end):
+        las que ocupan el primer día más las que empiezan en los siguientes,
+        en O(log D + días + tareas encontradas).
+        """
+        first, last = _day_keys(start, end)
+        found: Set[str] = set()
+        node = first + _KEY_SIZE
+        while node:
+            found.update(self._spans.get(node, ()))
+            node >>= 1
+        for key in range(first + 1, last + 1):
+            found.update(self._by_start.get(key, ()))
+        return found
+
+    def in_start_order(self, task_ids: Iterable[str], limit: Optional[int] = None) -> List[str]:
+        """Ordena IDs de tareas indexadas por inicio; con `limit`, solo los primeros."""
+        def key(task_id: str):
+            return self.tasks[task_id][0], task_id
+        if limit is None:
+            return sorted(task_ids, key=key)
+        return heapq.nsmallest(limit, task_ids, key=key)
+
+
+def _day_key(seconds):
+    """Clave del día UTC que contiene un instante (escalar o array)."""
+    if isinstance(seconds, np.ndarray):
+        return np.floor(seconds / DAY_SECONDS).astype(np.int64) + _KEY_OFFSET
+    return math.floor(seconds / DAY_SECONDS) + _KEY_OFFSET
+
+
+def _day_keys(start, end):
+    """Claves del primer y el último día UTC que ocupa [start, end)."""
+    if isinstance(end, np.ndarray):
+        last = np.ceil(end / DAY_SECONDS).astype(np.int64) - 1
+    else:
+        last = math.ceil(end / DAY_SECONDS) - 1
+    return _day_key(start), last + _KEY_OFFSET
+
+
+def _changes(start, end, rate, first, last):
+    """
+    Diferencias (claves, Δ tareas abiertas, Δ horas) de una tarea o de un
+    array de tareas: el primer día suma la tarea y sus horas de ese día, el
+    siguiente pasa a las de un día completo, el último a sus horas de ese
+    día y el posterior la retira. Con un solo día, las cuatro se reducen a
+    las horas de la tarea ese día.
+    """
+    first_hours = rate * ((first - _KEY_OFFSET + 1) * DAY_SECONDS - start)
+    last_hours = rate * (end - (last - _KEY_OFFSET) * DAY_SECONDS)
+    full = rate * DAY_SECONDS
+    keys = (first, first + 1, last, last + 1)
+    hours = (first_hours, full - first_hours, last_hours - full, -last_hours)
+    if isinstance(start, np.ndarray):
+        counts = np.repeat(np.array([1, 0, 0, -1]), len(start))
+        return np.concatenate(keys), counts, np.concatenate(hours)
+    return keys, (1, 0, 0, -1), hours
+
+
+def _grouped_sums(keys: np.ndarray, counts: np.ndarray, hours: np.ndarray, weights=None) -> Dict[int, list]:
+    """Suma por clave: [tareas (o suma de `weights`), Δ abiertas, Δ horas]."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    tasks = np.bincount(inverse, weights=weights).astype(np.int64)
+    count = np.rint(np.bincount(inverse, weights=counts)).astype(np.int64)
+    total = np.bincount(inverse, weights=hours)
+    return {
+        key: [n, c, h]
+        for key, n, c, h in zip(unique.tolist(), tasks.tolist(), count.tolist(), total.tolist())
+    }
+
+
+def _grouped_ids(keys: np.ndarray, ids: np.ndarray) -> Dict[int, Set[str]]:
+    """Agrupa IDs por clave."""
+    order = np.argsort(keys, kind="stable")
+    keys, ids = keys[order], ids[order]
+    bounds = np.flatnonzero(np.diff(keys)) + 1
+    return {
+        int(group_keys[0]): set(group_ids.tolist())
+        for group_keys, group_ids in zip(np.split(keys, bounds), np.split(ids, bounds))
+        if len(group_keys)
+    }
+
+
+def _span_nodes(first: int, last: int) -> Iterator[int]:
+    """Nodos del árbol de segmentos que cubren exactamente [first, last]."""
+    low, high = first + _KEY_SIZE, last + _KEY_SIZE + 1
+    while low < high:
+        if low & 1:
+            yield low
+            low += 1
+        if high & 1:
+            high -= 1
+            yield high
+        low >>= 1
+        high >>= 1
+
+
+class ScheduleIndex(WorkspaceIndexRegistry[WorkspaceSchedule]):
+    """Índices de calendario por espacio de trabajo."""
+
+    name = "Índice de calendario"
+
+    def build(self, docs: List[dict]) -> WorkspaceSchedule:
+        return WorkspaceSchedule.from_docs(docs)
+
+    def update(self, index: WorkspaceSchedule, task_id: str, doc: Optional[dict]):
+        index.put(task_id, task_interval(doc) if doc is not None else None)
+
+
+schedule_index = ScheduleIndex(WORKLOAD_PROJECTION, completed=False)
@@ -0,0 +1,110 @@
+"""
+Servicio de sugerencias de títulos mientras se escribe.
+
+Las consultas se resuelven sobre el índice de títulos en memoria
+(`title_index`), sin leer el almacenamiento salvo para construirlo. Al
+arrancar se construyen los índices de los espacios con tareas en segundo
+plano; después los mantienen los servicios de escritura.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.db import database
+from app.models.suggestion import SuggestIndexResponse, TaskSuggestion, TaskSuggestionList
+from app.services.title_index import title_index, title_settings
+from app.services.workspace_index import index_settings
+
+logger = logging.getLogger(__name__)
+
+_warm_task: Optional[asyncio.Task] = None
+
+
+async def get_suggestions_service(
+    workspace_id: str,
+    query: str,
+    limit: int = 10
+) -> Optional[TaskSuggestionList]:
+    """
+    Obtiene las tareas cuyo título coincide con `query`.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `query`: Texto escrito hasta ahora; la última palabra puede estar a
+      medias y las demás pueden tener erratas.
+    - `limit`: Número máximo de sugerencias.
+
+    Retorna:
+    - TaskSuggestionList, o None si no se pudo construir el índice.
+    """
+    try:
+        index = await title_index.get(workspace_id)
+    except Exception as e:
+        logger.error(f"Error al construir el índice de títulos: {e}")
+        return None
+    return TaskSuggestionList(
+        query=query,
+        suggestions=[
+            TaskSuggestion(id=task_id, title=title, completed=completed, score=score)
+            for task_id, title, completed, score in index.search(query, limit)
+        ]
+    )
+
+
+async def rebuild_suggest_index_service(workspace_id: str) -> Optional[SuggestIndexResponse]:
+    """
+    Reconstruye desde el almacenamiento el índice de títulos de un espacio
+    en este worker.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+
+    Retorna:
+    - SuggestIndexResponse con las tareas indexadas, o None si falla.
+    """
+    started = time.perf_counter()
+    try:
+        index = await title_index.rebuild(workspace_id)
+    except Exception as e:
+        logger.error(f"Error al reconstruir el índice de títulos: {e}")
+        return None
+    return SuggestIndexResponse(
+        tasks=len(index),
+        durationMs=round((time.perf_counter() - started) * 1000, 1)
+    )
+
+
+async def _warm_up():
+    try:
+        workspaces = await database.task_repository.workspace_ids(
+            index_settings.workspace_index_max_workspaces
+        )
+    except Exception as e:
+        logger.error(f"Error al listar los espacios para el índice de títulos: {e}")
+        return
+    started = time.perf_counter()
+    await title_index.warm(workspaces)
+    logger.info(
+        f"Índice de títulos precargado: {len(workspaces)} espacios, "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+
+
+def start_suggest_warmup():
+    """Construye en segundo plano los índices de títulos si SUGGEST_WARM_ON_STARTUP."""
+    global _warm_task
+    if title_settings.suggest_warm_on_startup and _warm_task is None:
+        _warm_task = asyncio.create_task(_warm_up())
+
+
+async def stop_suggest_warmup():
+    """Cancela la precarga si sigue en curso."""
+    global _warm_task
+    if _warm_task is not None:
+        _warm_task.cancel()
+        try:
+            await _warm_task
+        except asyncio.CancelledError:
+            pass
+        _warm_task = None
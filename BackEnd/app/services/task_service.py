@@ -2,79 +2,126 @@
 Servicio de lógica de negocio para tareas.
 """
 import logging
+import time
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from bson import ObjectId
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
 
 from app.db import database
-from app.models.task import TaskCreate, TaskUpdate, TaskResponse, SubtaskResponse
+from app.db.repository import TaskKey, TaskQuery, TaskProjection, UpdateGuard
+from app.models.task import (
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+    TaskSummaryResponse,
+    SubtaskResponse,
+    TASK_SUMMARY_FIELDS
+)
+from app.services.dependency_graph import dependency_index
+from app.services.dependency_service import TaskDependencyError, validate_dependencies
+from app.services.schedule_index import schedule_index
+from app.services.title_index import title_index
+from app.services.write_behind import task_write_buffer
 from app.utils.ids import validate_object_id, object_id_to_str
+from app.utils.dates import to_stored
 
 logger = logging.getLogger(__name__)
 
 
-async def init_indexes():
+class TaskServiceSettings(BaseSettings):
+    """Configuración del servicio de tareas."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+    
+    # Segundos que se reutiliza un total calculado para la misma consulta
+    count_cache_ttl: float = 5.0
+    count_cache_max_entries: int = 256
+
+
+task_settings = TaskServiceSettings()
+
+# Totales por espacio y forma de filtro:
+# workspace_id -> (completed, filter_by, search, include_archived) -> (expira, total)
+_count_cache: Dict[str, Dict[Tuple, Tuple[float, int]]] = {}
+# Escrituras por espacio; un total que empezó antes de una escritura no se guarda.
+# `_count_epoch` cambia al vaciar el diccionario, para no confundir generaciones.
+_count_generations: Dict[str, int] = {}
+_count_epoch = 0
+
+class TaskVersionConflict(Exception):
+    """La tarea cambió desde la versión que indicó el cliente."""
+
+    def __init__(self, task_id: str, current_version: int):
+        super().__init__(f"la tarea {task_id} está en la versión {current_version}")
+        self.current_version = current_version
+
+
+# Campos calculados por el backend a partir de las subtareas
+SUBTASK_COUNT_FIELDS = ("subtaskCount", "completedSubtaskCount")
+
+
+def _prepare_subtasks(subtasks: List[dict]) -> List[dict]:
     """
-    Inicializa los índices de la colección de tareas.
+    Prepara las subtareas para almacenarlas, con un ObjectId nuevo cada una.
     """
-    try:
-        if database.db is None:
-            logger.error("Error al crear índices: db no está inicializado")
-            return
-        
-        await database.db.tasks.create_index("created_at")
-        await database.db.tasks.create_index("completed")
-        await database.db.tasks.create_index("startDateTime")
-        logger.info("Índices de tareas inicializados")
-    except Exception as e:
-        logger.error(f"Error al crear índices: {e}")
+    return [
+        {
+            "_id": ObjectId(),
+            "title": subtask["title"],
+            "estimatedHours": subtask["estimatedHours"],
+            "completed": subtask.get("completed", False)
+        }
+        for subtask in subtasks
+    ]
 
 
-def _prepare_task_document(task_data: dict) -> dict:
+def prepare_task_document(workspace_id: str, task_data: dict) -> dict:
     """
     Prepara un documento de tarea para insertar en MongoDB.
-    Convierte fechas a datetime UTC y añade timestamps.
+    Las fechas ya llegan como datetime UTC validados por TaskCreate;
+    añade el espacio de trabajo, IDs de subtareas y timestamps. También lo
+    usa la importación masiva.
     """
     now = datetime.now(timezone.utc)
     
-    # Convertir fechas ISO a datetime UTC
-    start_dt = datetime.fromisoformat(
-        task_data["startDateTime"].replace('Z', '+00:00')
-    )
-    end_dt = datetime.fromisoformat(
-        task_data["endDateTime"].replace('Z', '+00:00')
-    )
-    
-    # Validar que endDateTime > startDateTime
-    if end_dt <= start_dt:
-        raise ValueError("endDateTime debe ser posterior a startDateTime")
-    
     # Preparar subtareas con IDs
-    subtasks = []
-    for subtask in task_data.get("subtasks", []):
-        subtask_doc = {
-            "_id": ObjectId(),
-            "title": subtask["title"],
-            "estimatedHours": subtask["estimatedHours"],
-            "completed": subtask.get("completed", False)
-        }
-        subtasks.append(subtask_doc)
+    subtasks = _prepare_subtasks(task_data.get("subtasks", []))
     
     document = {
+        "workspace_id": workspace_id,
         "title": task_data["title"],
         "description": task_data.get("description", ""),
-        "startDateTime": start_dt,
-        "endDateTime": end_dt,
+        "startDateTime": task_data["startDateTime"],
+        "endDateTime": task_data["endDateTime"],
         "estimatedHours": task_data["estimatedHours"],
         "completed": task_data.get("completed", False),
         "subtasks": subtasks,
+        "dependsOn": task_data.get("dependsOn", []),
         "created_at": now,
-        "updated_at": now
+        "updated_at": now,
+        "version": 1
     }
     
     return document
 
 
+def _subtask_doc_to_response(subtask: dict) -> SubtaskResponse:
+    """
+    Convierte una subtarea de MongoDB a SubtaskResponse.
+    """
+    return SubtaskResponse(
+        id=str(subtask["_id"]),
+        title=subtask["title"],
+        estimatedHours=subtask["estimatedHours"],
+        completed=subtask.get("completed", False)
+    )
+
+
 def _task_doc_to_response(doc: dict) -> TaskResponse:
     """
     Convierte un documento de MongoDB a TaskResponse.
@@ -83,77 +130,208 @@ def _task_doc_to_response(doc: dict) -> TaskResponse:
     doc = object_id_to_str(doc)
     
     # Convertir subtareas
-    subtasks = []
-    for subtask in doc.get("subtasks", []):
-        subtasks.append(SubtaskResponse(
-            id=str(subtask["_id"]),
-            title=subtask["title"],
-            estimatedHours=subtask["estimatedHours"],
-            completed=subtask.get("completed", False)
-        ))
-    
-    # Convertir fechas a ISO 8601
-    start_dt = doc["startDateTime"]
-    end_dt = doc["endDateTime"]
-    created_at = doc["created_at"]
-    updated_at = doc["updated_at"]
-    
-    if isinstance(start_dt, datetime):
-        start_dt = start_dt.isoformat()
-    if isinstance(end_dt, datetime):
-        end_dt = end_dt.isoformat()
-    if isinstance(created_at, datetime):
-        created_at = created_at.isoformat()
-    if isinstance(updated_at, datetime):
-        updated_at = updated_at.isoformat()
+    subtasks = [_subtask_doc_to_response(st) for st in doc.get("subtasks", [])]
     
+    # Las fechas se pasan como datetime; el modelo las serializa a ISO 8601
     return TaskResponse(
         id=doc["id"],
         title=doc["title"],
         description=doc.get("description", ""),
-        startDateTime=start_dt,
-        endDateTime=end_dt,
+        startDateTime=doc["startDateTime"],
+        endDateTime=doc["endDateTime"],
         estimatedHours=doc["estimatedHours"],
         completed=doc.get("completed", False),
         subtasks=subtasks,
-        created_at=created_at,
-        updated_at=updated_at
+        dependsOn=[str(dep) for dep in doc.get("dependsOn", [])],
+        created_at=doc["created_at"],
+        updated_at=doc["updated_at"],
+        version=doc.get("version", 0),
+        archived=doc.get("archived", False)
+    )
+
+
+def _task_doc_to_summary(doc: dict, fields: Sequence[str]) -> TaskSummaryResponse:
+    """
+    Convierte un documento proyectado a TaskSummaryResponse con solo los
+    campos pedidos.
+    """
+    values = {"id": str(doc["_id"])}
+    for field in fields:
+        if field not in doc:
+            continue
+        value = doc[field]
+        if field == "subtasks":
+            value = [_subtask_doc_to_response(st) for st in value]
+        elif field == "dependsOn":
+            value = [str(dep) for dep in value]
+        values[field] = value
+    if doc.get("archived"):
+        values["archived"] = True
+    return TaskSummaryResponse(**values)
+
+
+def _resolve_projection(
+    fields: Optional[Sequence[str]],
+    view: Optional[str],
+    sort_by: Optional[str]
+) -> Optional[TaskProjection]:
+    """
+    Calcula la proyección para `fields`/`view`. Retorna None para la vista
+    completa.
+    """
+    if view == "summary" and not fields:
+        fields = TASK_SUMMARY_FIELDS
+    if not fields:
+        return None
+    # El orden por progreso necesita los contadores de subtareas
+    subtask_counts = sort_by == "progress" or any(
+        f in SUBTASK_COUNT_FIELDS for f in fields
+    )
+    return TaskProjection(
+        fields=frozenset(f for f in fields if f not in SUBTASK_COUNT_FIELDS),
+        subtask_counts=subtask_counts
     )
 
 
-async def create_task_service(task_data: TaskCreate) -> Optional[TaskResponse]:
+def _doc_progress(doc: dict) -> float:
+    """
+    Proporción de subtareas completadas, a partir de las subtareas o de
+    los contadores proyectados.
+    """
+    if "subtaskCount" in doc:
+        total = doc["subtaskCount"]
+        done = doc["completedSubtaskCount"]
+    else:
+        subtasks = doc.get("subtasks", [])
+        total = len(subtasks)
+        done = sum(1 for st in subtasks if st.get("completed", False))
+    return done / total if total else 0.0
+
+
+def _count_generation(workspace_id: str) -> Tuple[int, int]:
+    """Generación de los totales de un espacio; cambia con cada escritura."""
+    return _count_epoch, _count_generations.get(workspace_id, 0)
+
+
+def invalidate_counts(workspace_id: Optional[str] = None):
+    """
+    Descarta los totales en caché de un espacio (o de todos) tras una
+    escritura en este proceso; los de otros espacios siguen siendo válidos.
+    Los recuentos en curso afectados tampoco se guardarán.
+    """
+    global _count_epoch
+    if workspace_id is None:
+        _count_cache.clear()
+        _count_generations.clear()
+        _count_epoch += 1
+        return
+    _count_cache.pop(workspace_id, None)
+    if (
+        workspace_id not in _count_generations
+        and len(_count_generations) >= task_settings.count_cache_max_entries
+    ):
+        _count_generations.clear()
+        _count_epoch += 1
+    _count_generations[workspace_id] = _count_generations.get(workspace_id, 0) + 1
+
+
+def invalidate_indexes(workspace_id: Optional[str] = None):
+    """
+    Descarta los índices en memoria de un espacio (o de todos); se
+    reconstruyen en la siguiente consulta.
+    """
+    schedule_index.invalidate(workspace_id)
+    dependency_index.invalidate(workspace_id)
+    title_index.invalidate(workspace_id)
+
+
+def _index_write(workspace_id: str, doc: dict):
+    """
+    Refleja una tarea creada o actualizada en los índices en memoria. La
+    escritura ya está hecha: si un índice falla no se propaga el error y se
+    descartan los índices del espacio.
+    """
+    try:
+        schedule_index.apply(workspace_id, doc)
+        dependency_index.apply(workspace_id, doc)
+        title_index.apply(workspace_id, doc)
+    except Exception as e:
+        logger.error(f"Error al actualizar los índices en memoria de {doc.get('_id')}: {e}")
+        invalidate_indexes(workspace_id)
+
+
+def _index_delete(workspace_id: str, task_id: str):
+    """Retira una tarea eliminada de los índices en memoria, como `_index_write`."""
+    try:
+        schedule_index.remove(workspace_id, task_id)
+        dependency_index.remove(workspace_id, task_id)
+        title_index.remove(workspace_id, task_id)
+    except Exception as e:
+        logger.error(f"Error al retirar {task_id} de los índices en memoria: {e}")
+        invalidate_indexes(workspace_id)
+
+
+def _written_behind(key: TaskKey, doc: Optional[dict]):
+    """
+    Tras escribir un cambio diferido: los totales calculados mientras
+    estaba encolado leyeron el almacenamiento anterior, y los índices
+    reciben el estado guardado (con los cambios de otros workers).
+    """
+    workspace_id, oid = key
+    invalidate_counts(workspace_id)
+    if doc is None:
+        _index_delete(workspace_id, str(oid))
+    else:
+        _index_write(workspace_id, doc)
+
+
+task_write_buffer.on_write(_written_behind)
+
+
+async def create_task_service(workspace_id: str, task_data: TaskCreate) -> Optional[TaskResponse]:
     """
     Crea una nueva tarea.
     
     Parámetros:
+    - `workspace_id`: Espacio de trabajo de la tarea.
     - `task_data`: Datos de la tarea a crear.
     
     Retorna:
     - TaskResponse con la tarea creada o None si falla.
+    
+    Lanza:
+    - TaskDependencyError: Si `dependsOn` no es válido.
     """
     try:
         task_dict = task_data.model_dump()
-        document = _prepare_task_document(task_dict)
+        task_dict["dependsOn"] = await validate_dependencies(
+            workspace_id, None, task_dict["dependsOn"]
+        )
+        document = prepare_task_document(workspace_id, task_dict)
         
-        result = await database.db.tasks.insert_one(document)
-        logger.info(f"Tarea creada: {result.inserted_id}, colección: tasks")
+        created_doc = await database.task_repository.insert(document)
+        invalidate_counts(workspace_id)
         
-        # Recuperar el documento creado
-        created_doc = await database.db.tasks.find_one({"_id": result.inserted_id})
         if not created_doc:
             return None
+        logger.info(f"Tarea creada: {created_doc['_id']}, colección: tasks")
         
+        _index_write(workspace_id, created_doc)
         return _task_doc_to_response(created_doc)
+    except TaskDependencyError as e:
+        logger.info(f"Dependencias no válidas al crear tarea: {e}")
+        raise
     except Exception as e:
         logger.error(f"Error al crear tarea: {e}")
         return None
 
 
-async def get_task_by_id_service(task_id: str) -> Optional[TaskResponse]:
+async def get_task_by_id_service(workspace_id: str, task_id: str) -> Optional[TaskResponse]:
     """
     Obtiene una tarea por su ID.
     
     Parámetros:
+    - `workspace_id`: Espacio de trabajo; las tareas de otros espacios no se encuentran.
     - `task_id`: ID de la tarea.
     
     Retorna:
@@ -161,7 +339,10 @@ async def get_task_by_id_service(task_id: str) -> Optional[TaskResponse]:
     """
     try:
         oid = validate_object_id(task_id)
-        doc = await database.db.tasks.find_one({"_id": oid})
+        # Los cambios aún sin escribir son más recientes que el almacenamiento
+        doc = task_write_buffer.peek((workspace_id, oid)) or await database.task_repository.get(
+            workspace_id, oid, include_archived=True
+        )
         
         if not doc:
             logger.info(f"Tarea no encontrada: {task_id}, colección: tasks")
@@ -178,120 +359,66 @@ async def get_task_by_id_service(task_id: str) -> Optional[TaskResponse]:
 
 
 async def get_all_tasks_service(
+    workspace_id: str,
     completed: Optional[bool] = None,
     sort_by: Optional[str] = None,
     filter_by: Optional[str] = None,
     search: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[TaskResponse]:
+    limit: int = 100,
+    fields: Optional[Sequence[str]] = None,
+    view: Optional[str] = None,
+    include_archived: bool = False
+) -> List[Union[TaskResponse, TaskSummaryResponse]]:
     """
-    Obtiene todas las tareas con filtros opcionales y ordenamiento.
+    Obtiene todas las tareas del espacio con filtros opcionales y ordenamiento.
     
     Parámetros:
+    - `workspace_id`: Espacio de trabajo.
     - `completed`: Filtrar por estado de completado (opcional).
     - `sort_by`: Opción de ordenamiento ('recent', 'oldest', 'dueDate', 'title', 'progress', 'duration').
     - `filter_by`: Opción de filtrado ('all', 'completed', 'inProgress', 'overdue', 'today').
     - `search`: Texto para buscar en título y descripción (opcional).
     - `skip`: Número de documentos a saltar.
     - `limit`: Número máximo de documentos a retornar.
+    - `fields`: Campos a devolver (opcional, ver TASK_LIST_FIELDS).
+    - `view`: 'full' (por defecto) o 'summary'.
+    - `include_archived`: Mezclar también las tareas archivadas.
     
     Retorna:
-    - Lista de TaskResponse.
+    - Lista de TaskResponse, o de TaskSummaryResponse si se pidieron
+      `fields` o `view='summary'`.
     """
     try:
-        from datetime import datetime, timezone
-        
-        filter_query = {}
-        
-        # Filtro por completado (compatibilidad con API anterior)
-        if completed is not None:
-            filter_query["completed"] = completed
-        
-        # Filtros avanzados
-        if filter_by:
-            now = datetime.now(timezone.utc)
-            today_start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
-            today_end = datetime(now.year, now.month, now.day, 23, 59, 59, tzinfo=timezone.utc)
-            
-            if filter_by == 'completed':
-                filter_query["completed"] = True
-            elif filter_by == 'inProgress':
-                filter_query["completed"] = False
-            elif filter_by == 'overdue':
-                filter_query["endDateTime"] = {"$lt": now}
-            elif filter_by == 'today':
-                filter_query["$or"] = [
-                    {"startDateTime": {"$gte": today_start, "$lte": today_end}},
-                    {"endDateTime": {"$gte": today_start, "$lte": today_end}},
-                    {"$and": [
-                        {"startDateTime": {"$lt": today_start}},
-                        {"endDateTime": {"$gt": today_end}}
-                    ]}
-                ]
-        
-        # Búsqueda de texto en título y descripción
-        if search and search.strip():
-            search_regex = {"$regex": search.strip(), "$options": "i"}
-            if "$or" in filter_query:
-                # Si ya hay $or, añadir búsqueda
-                filter_query["$and"] = [
-                    {"$or": filter_query.pop("$or")},
-                    {"$or": [
-                        {"title": search_regex},
-                        {"description": search_regex}
-                    ]}
-                ]
-            else:
-                filter_query["$or"] = [
-                    {"title": search_regex},
-                    {"description": search_regex}
-                ]
-        
-        # Construir cursor base
-        cursor = database.db.tasks.find(filter_query)
-        
-        # Aplicar ordenamiento
-        sort_key = "created_at"
-        sort_direction = -1  # Por defecto: más recientes primero
-        
-        if sort_by:
-            if sort_by == 'recent':
-                sort_key = "created_at"
-                sort_direction = -1
-            elif sort_by == 'oldest':
-                sort_key = "created_at"
-                sort_direction = 1
-            elif sort_by == 'dueDate':
-                sort_key = "endDateTime"
-                sort_direction = 1
-            elif sort_by == 'title':
-                sort_key = "title"
-                sort_direction = 1
-            elif sort_by == 'duration':
-                sort_key = "estimatedHours"
-                sort_direction = -1
-            # 'progress' se maneja después de obtener los documentos
-        
-        cursor = cursor.sort(sort_key, sort_direction).skip(skip).limit(limit)
-        docs = await cursor.to_list(length=limit)
-        
-        # Convertir a TaskResponse
-        tasks = [_task_doc_to_response(doc) for doc in docs]
+        query = TaskQuery(
+            workspace_id=workspace_id,
+            completed=completed,
+            filter_by=filter_by,
+            search=search,
+            include_archived=include_archived
+        )
+        projection = _resolve_projection(fields, view, sort_by)
+        docs = await database.task_repository.find(
+            query,
+            sort_by=sort_by,
+            skip=skip,
+            limit=limit,
+            projection=projection
+        )
         
         # Ordenamiento por progreso (requiere cálculo de subtareas completadas)
         if sort_by == 'progress':
-            def get_progress(task: TaskResponse) -> float:
-                if not task.subtasks:
-                    return 0.0
-                completed = sum(1 for st in task.subtasks if st.completed)
-                return completed / len(task.subtasks)
-            
-            tasks.sort(key=get_progress, reverse=True)
+            docs.sort(key=_doc_progress, reverse=True)
+        
+        if projection is None:
+            tasks = [_task_doc_to_response(doc) for doc in docs]
+        else:
+            requested = fields or TASK_SUMMARY_FIELDS
+            tasks = [_task_doc_to_summary(doc, requested) for doc in docs]
         
         logger.info(
-            f"Tareas obtenidas: {len(tasks)}, filtro: {filter_query}, "
-            f"ordenamiento: {sort_by}, colección: tasks"
+            f"Tareas obtenidas: {len(tasks)}, filtro: {query}, "
+            f"ordenamiento: {sort_by}, vista: {view or 'full'}, colección: tasks"
         )
         
         return tasks
@@ -300,84 +427,149 @@ async def get_all_tasks_service(
         return []
 
 
+async def count_tasks_service(
+    workspace_id: str,
+    completed: Optional[bool] = None,
+    filter_by: Optional[str] = None,
+    search: Optional[str] = None,
+    include_archived: bool = False
+) -> Optional[int]:
+    """
+    Cuenta las tareas que devolvería `get_all_tasks_service` sin paginar.
+    
+    Cuenta con el mismo criterio que el listado; sin filtros, el backend
+    cuenta sobre el índice del espacio sin leer los documentos. El
+    resultado se guarda unos segundos por forma de filtro y se descarta al
+    escribir; un recuento que coincide con una escritura no se guarda.
+    
+    Parámetros:
+    - `workspace_id`, `completed`, `filter_by`, `search`,
+      `include_archived`: Igual que en `get_all_tasks_service`.
+    
+    Retorna:
+    - Total de tareas o None si falla.
+    """
+    try:
+        query = TaskQuery(
+            workspace_id=workspace_id,
+            completed=completed,
+            filter_by=filter_by,
+            search=search,
+            include_archived=include_archived
+        )
+        key = (completed, filter_by, search.strip() if search else None, include_archived)
+        now = time.monotonic()
+        
+        workspace_cache = _count_cache.get(workspace_id)
+        cached = workspace_cache.get(key) if workspace_cache else None
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        generation = _count_generation(workspace_id)
+        total = await database.task_repository.count(query)
+        if _count_generation(workspace_id) != generation:
+            # Hubo una escritura mientras se contaba: el total puede estar desfasado
+            return total
+        
+        workspace_cache = _count_cache.get(workspace_id)
+        if workspace_cache is None:
+            if len(_count_cache) >= task_settings.count_cache_max_entries:
+                _count_cache.clear()
+            workspace_cache = _count_cache.setdefault(workspace_id, {})
+        elif len(workspace_cache) >= task_settings.count_cache_max_entries:
+            workspace_cache.clear()
+        workspace_cache[key] = (now + task_settings.count_cache_ttl, total)
+        return total
+    except Exception as e:
+        logger.error(f"Error al contar tareas: {e}")
+        return None
+
+
 async def update_task_service(
+    workspace_id: str,
     task_id: str,
-    task_update: TaskUpdate
+    task_update: TaskUpdate,
+    expected_version: Optional[int] = None
 ) -> Optional[TaskResponse]:
     """
-    Actualiza una tarea existente.
+    Actualiza una tarea existente con una sola operación atómica.
+    
+    La versión esperada y la coherencia de fechas se comprueban en el
+    filtro de la propia escritura; solo si no se aplica se relee la tarea
+    para saber el motivo.
     
     Parámetros:
+    - `workspace_id`: Espacio de trabajo de la tarea.
     - `task_id`: ID de la tarea a actualizar.
     - `task_update`: Datos a actualizar.
+    - `expected_version`: Versión que leyó el cliente (If-Match o
+      `expectedVersion`); None para actualizar sin comprobarla.
     
     Retorna:
     - TaskResponse con la tarea actualizada o None si no se encuentra.
+    
+    Lanza:
+    - TaskVersionConflict: Si la tarea ya no está en `expected_version`.
+    - TaskDependencyError: Si `dependsOn` no es válido.
     """
     try:
         oid = validate_object_id(task_id)
         
-        # Verificar que la tarea existe
-        existing = await database.db.tasks.find_one({"_id": oid})
-        if not existing:
-            logger.info(f"Tarea no encontrada para actualizar: {task_id}")
-            return None
-        
         # Preparar datos de actualización
-        update_data = task_update.model_dump(exclude_unset=True)
+        update_data = task_update.model_dump(exclude_unset=True, exclude={"expectedVersion"})
+        if expected_version is None and task_write_buffer.accepts(update_data):
+            return await _stage_status_update(workspace_id, oid, update_data)
         
-        # Si hay fechas, validar y convertir
-        if "startDateTime" in update_data or "endDateTime" in update_data:
-            start_dt = existing.get("startDateTime")
-            end_dt = existing.get("endDateTime")
-            
-            if "startDateTime" in update_data:
-                start_dt = datetime.fromisoformat(
-                    update_data["startDateTime"].replace('Z', '+00:00')
-                )
-            if "endDateTime" in update_data:
-                end_dt = datetime.fromisoformat(
-                    update_data["endDateTime"].replace('Z', '+00:00')
-                )
-            
-            if end_dt <= start_dt:
-                raise ValueError("endDateTime debe ser posterior a startDateTime")
-            
-            if "startDateTime" in update_data:
-                update_data["startDateTime"] = start_dt
-            if "endDateTime" in update_data:
-                update_data["endDateTime"] = end_dt
+        # Las fechas que no cambian se validan en el filtro de la escritura
+        for key in ("startDateTime", "endDateTime"):
+            if key in update_data and update_data[key] is None:
+                raise ValueError(f"{key} no puede ser nulo")
+        start_dt = update_data.get("startDateTime")
+        end_dt = update_data.get("endDateTime")
+        if start_dt and end_dt and end_dt <= start_dt:
+            raise ValueError("endDateTime debe ser posterior a startDateTime")
+        guard = UpdateGuard(
+            version=expected_version,
+            start_before=end_dt if not start_dt else None,
+            end_after=start_dt if not end_dt else None
+        )
         
         # Si hay subtareas, prepararlas con IDs
         if "subtasks" in update_data:
-            subtasks = []
-            for subtask in update_data["subtasks"]:
-                subtask_doc = {
-                    "_id": ObjectId(),
-                    "title": subtask["title"],
-                    "estimatedHours": subtask["estimatedHours"],
-                    "completed": subtask.get("completed", False)
-                }
-                subtasks.append(subtask_doc)
-            update_data["subtasks"] = subtasks
+            update_data["subtasks"] = _prepare_subtasks(update_data["subtasks"])
+        if "dependsOn" in update_data:
+            update_data["dependsOn"] = await validate_dependencies(
+                workspace_id, str(oid), update_data["dependsOn"] or []
+            )
         
         # Añadir timestamp de actualización
         update_data["updated_at"] = datetime.now(timezone.utc)
         
-        result = await database.db.tasks.update_one(
-            {"_id": oid},
-            {"$set": update_data}
-        )
+        # Un lote diferido posterior no debe pisar esta actualización
+        await task_write_buffer.flush_task((workspace_id, oid))
+        updated_doc = await database.task_repository.update(workspace_id, oid, update_data, guard)
         
-        if result.modified_count == 0:
-            logger.warning(f"No se modificó la tarea: {task_id}")
-            return None
+        if not updated_doc:
+            # Solo en el caso de fallo: averiguar qué condición no se cumplió
+            current = await database.task_repository.get(workspace_id, oid)
+            if not current:
+                logger.info(f"Tarea no encontrada para actualizar: {task_id}")
+                return None
+            current_version = current.get("version", 0)
+            if expected_version is not None and current_version != expected_version:
+                raise TaskVersionConflict(task_id, current_version)
+            raise ValueError("endDateTime debe ser posterior a startDateTime")
         
+        invalidate_counts(workspace_id)
+        _index_write(workspace_id, updated_doc)
         logger.info(f"Tarea actualizada: {task_id}, colección: tasks")
-        
-        # Recuperar el documento actualizado
-        updated_doc = await database.db.tasks.find_one({"_id": oid})
         return _task_doc_to_response(updated_doc)
+    except TaskVersionConflict as e:
+        logger.info(f"Conflicto de versión al actualizar tarea: {e}")
+        raise
+    except TaskDependencyError as e:
+        logger.info(f"Dependencias no válidas al actualizar tarea: {e}")
+        raise
     except ValueError as e:
         logger.warning(f"Error de validación al actualizar tarea: {e}")
         return None
@@ -386,11 +578,40 @@ async def update_task_service(
         return None
 
 
-async def delete_task_service(task_id: str) -> bool:
+async def _stage_status_update(
+    workspace_id: str,
+    oid: ObjectId,
+    update_data: dict
+) -> Optional[TaskResponse]:
+    """
+    Encola un cambio de `completed`/`subtasks` en la escritura diferida y
+    retorna el estado fusionado de la tarea.
+    """
+    key = (workspace_id, oid)
+    base_doc = task_write_buffer.peek(key) or await database.task_repository.get(workspace_id, oid)
+    if not base_doc:
+        logger.info(f"Tarea no encontrada para actualizar: {oid}")
+        return None
+    
+    if "subtasks" in update_data:
+        update_data["subtasks"] = _prepare_subtasks(update_data["subtasks"])
+    # Con la misma forma que devuelve el almacenamiento
+    update_data["updated_at"] = to_stored(datetime.now(timezone.utc))
+    
+    merged_doc = task_write_buffer.stage(key, base_doc, update_data)
+    invalidate_counts(workspace_id)
+    _index_write(workspace_id, merged_doc)
+    logger.info(f"Tarea actualizada (escritura diferida): {oid}, colección: tasks")
+    return _task_doc_to_response(merged_doc)
+
+
+async def delete_task_service(workspace_id: str, task_id: str) -> bool:
     """
-    Elimina una tarea.
+    Elimina una tarea y la quita del `dependsOn` de las tareas que dependían
+    de ella.
     
     Parámetros:
+    - `workspace_id`: Espacio de trabajo de la tarea.
     - `task_id`: ID de la tarea a eliminar.
     
     Retorna:
@@ -398,13 +619,24 @@ async def delete_task_service(task_id: str) -> bool:
     """
     try:
         oid = validate_object_id(task_id)
-        result = await database.db.tasks.delete_one({"_id": oid})
+        task_write_buffer.discard((workspace_id, oid))
+        deleted = await database.task_repository.delete(workspace_id, oid)
         
-        if result.deleted_count == 0:
+        if not deleted:
             logger.info(f"Tarea no encontrada para eliminar: {task_id}")
             return False
         
+        invalidate_counts(workspace_id)
+        _index_delete(workspace_id, str(oid))
         logger.info(f"Tarea eliminada: {task_id}, colección: tasks")
+        try:
+            # Las tareas que dependían de ella dejan de referenciarla
+            dependents = await database.task_repository.remove_dependency(workspace_id, oid)
+            if dependents:
+                logger.info(f"Dependencia {task_id} retirada de {dependents} tareas")
+        except Exception as e:
+            # El grafo ignora las dependencias de tareas que ya no existen
+            logger.error(f"Error al retirar la dependencia {task_id}: {e}")
         return True
     except ValueError as e:
         logger.warning(f"ObjectId inválido: {task_id}")
@@ -0,0 +1,345 @@
+"""
+Índice en memoria de los títulos de las tareas, para sugerencias mientras
+se escribe sin consultar el almacenamiento.
+
+Los títulos se normalizan (minúsculas, sin tildes, solo letras y dígitos)
+y se parten en palabras. El vocabulario del espacio se indexa de dos
+formas:
+- En una lista ordenada, con las tareas de cada palabra: un prefijo es un
+  rango contiguo que se localiza con búsqueda binaria.
+- Por trigramas (con espacios de relleno, como pg_trgm): una palabra mal
+  escrita comparte trigramas con la buena, así que sirven para encontrar
+  palabras candidatas, que se confirman con la distancia de edición.
+
+Como los trigramas apuntan a palabras y no a tareas, la búsqueda con
+erratas trabaja sobre el vocabulario, mucho menor que el número de tareas.
+Cada consulta examina como mucho SUGGEST_MAX_CANDIDATES tareas, sin
+importar el tamaño del espacio. Solo se indexan los primeros
+SUGGEST_MAX_TITLE_CHARS caracteres de cada título, así que la memoria es
+proporcional al número de tareas y el número de espacios lo limita
+WORKSPACE_INDEX_MAX_WORKSPACES.
+
+La construcción bajo demanda y la caducidad son las de `workspace_index`.
+"""
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db.repository import TaskProjection
+from app.services.workspace_index import WorkspaceIndexRegistry
+
+TITLE_PROJECTION = TaskProjection(fields=frozenset({"title", "completed"}))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Palabras de la consulta que se tienen en cuenta
+_MAX_QUERY_WORDS = 8
+
+# Palabras parecidas (por trigramas) cuya distancia de edición se calcula
+_FUZZY_WORDS = 16
+
+
+class TitleIndexSettings(BaseSettings):
+    """Configuración del índice de títulos."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Caracteres de cada título que se indexan
+    suggest_max_title_chars: int = 64
+    # Tareas que se examinan como mucho en cada consulta
+    suggest_max_candidates: int = 200
+    # Construir los índices de los espacios con tareas al arrancar
+    suggest_warm_on_startup: bool = True
+
+
+title_settings = TitleIndexSettings()
+
+
+class Suggestion(NamedTuple):
+    task_id: str
+    title: str
+    completed: bool
+    # 1 si todas las palabras de la consulta aparecen en el título; con
+    # erratas, 1 menos la fracción de letras corregidas
+    score: float
+
+
+def normalize_words(text: str) -> List[str]:
+    """Palabras de un texto en minúsculas, sin tildes ni signos."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return _WORD.findall("".join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def word_trigrams(word: str, complete: bool = True) -> List[str]:
+    """
+    Trigramas de una palabra con dos espacios delante y uno detrás. Sin
+    `complete` (la última palabra de una consulta, que puede estar a medio
+    escribir) se omite el del final.
+    """
+    padded = f"  {word} " if complete else f"  {word}"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(typed: str, word: str, prefix: bool = False, bound: Optional[int] = None) -> int:
+    """
+    Distancia de Damerau-Levenshtein (con transposiciones de letras
+    contiguas). Con `prefix`, la distancia al prefijo de `word` más
+    parecido, para palabras a medio escribir. Con `bound`, deja de calcular
+    en cuanto la distancia supera ese valor y retorna `bound + 1`.
+    """
+    if bound is None:
+        bound = max(len(typed), len(word))
+    if prefix:
+        # Los prefijos más largos ya superan la cota
+        word = word[:len(typed) + bound]
+    elif abs(len(typed) - len(word)) > bound:
+        return bound + 1
+    # Solo se calculan las celdas a `bound` o menos de la diagonal; las
+    # demás ya superan la cota
+    over = bound + 1
+    before: List[int] = []
+    previous = [min(j, over) for j in range(len(word) + 1)]
+    for i in range(1, len(typed) + 1):
+        current = [min(i, over)] + [over] * len(word)
+        for j in range(max(1, i - bound), min(len(word), i + bound) + 1):
+            cost = previous[j - 1] + (typed[i - 1] != word[j - 1])
+            if previous[j] < cost:
+                cost = previous[j] + 1
+            if current[j - 1] < cost:
+                cost = current[j - 1] + 1
+            if (
+                i > 1 and j > 1
+                and typed[i - 1] == word[j - 2] and typed[i - 2] == word[j - 1]
+                and before[j - 2] < cost
+            ):
+                cost = before[j - 2] + 1
+            current[j] = min(cost, over)
+        if min(current) > bound:
+            return over
+        before, previous = previous, current
+    return min(previous) if prefix else previous[-1]
+
+
+def allowed_edits(word: str) -> int:
+    """Erratas que se toleran según la longitud de la palabra escrita."""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 7 else 2
+
+
+class TitleIndex:
+    """Títulos de las tareas de un espacio."""
+
+    def __init__(self):
+        # ID -> (título, palabras, completada)
+        self.tasks: Dict[str, Tuple[str, Tuple[str, ...], bool]] = {}
+        # Vocabulario ordenado y tareas de cada palabra
+        self._words: List[str] = []
+        self._by_word: Dict[str, Set[str]] = {}
+        # Trigrama -> palabras del vocabulario que lo contienen
+        self._by_trigram: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def from_docs(cls, docs: List[dict]) -> "TitleIndex":
+        """Construye el índice a partir de documentos con TITLE_PROJECTION."""
+        index = cls()
+        for doc in docs:
+            index._add(str(doc["_id"]), doc.get("title", ""), bool(doc.get("completed")))
+        index._words = sorted(index._by_word)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def _add(self, task_id: str, title: str, completed: bool, sort: bool = False):
+        words = tuple(normalize_words(title[:title_settings.suggest_max_title_chars]))
+        self.tasks[task_id] = (title, words, completed)
+        for word in set(words):
+            tasks = self._by_word.get(word)
+            if tasks is None:
+                tasks = self._by_word[word] = set()
+                if sort:
+                    insort(self._words, word)
+                for gram in word_trigrams(word):
+                    self._by_trigram.setdefault(gram, set()).add(word)
+            tasks.add(task_id)
+
+    def remove(self, task_id: str):
+        """Retira una tarea; no hace nada si no está."""
+        entry = self.tasks.pop(task_id, None)
+        if entry is None:
+            return
+        for word in set(entry[1]):
+            tasks = self._by_word[word]
+            tasks.discard(task_id)
+            if tasks:
+                continue
+            del self._by_word[word]
+            del self._words[bisect_left(self._words, word)]
+            # Una palabra puede repetir trigrama ("aaaa")
+            for gram in set(word_trigrams(word)):
+                words = self._by_trigram[gram]
+                words.discard(word)
+                if not words:
+                    del self._by_trigram[gram]
+
+    def put(self, task_id: str, title: str, completed: bool):
+        """Inserta o actualiza una tarea."""
+        entry = self.tasks.get(task_id)
+        if entry is not None and entry[0] == title:
+            self.tasks[task_id] = (title, entry[1], completed)
+            return
+        self.remove(task_id)
+        self._add(task_id, title, completed, sort=True)
+
+    # Consultas
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        low = bisect_left(self._words, prefix)
+        # "~" va después de cualquier letra o dígito
+        return low, bisect_left(self._words, prefix + "~", low)
+
+    def _similar_words(self, typed: str, partial: bool) -> Dict[str, float]:
+        """
+        Palabras del vocabulario a las que puede referirse `typed` con
+        erratas, con su puntuación: 1 menos la fracción de letras
+        corregidas. Con `partial` se compara con sus prefijos.
+        """
+        edits = allowed_edits(typed)
+        if not edits:
+            return {}
+        # Candidatas por número de trigramas compartidos, empezando por los
+        # trigramas menos frecuentes y sin pasar de SUGGEST_MAX_CANDIDATES
+        cap = title_settings.suggest_max_candidates
+        shared: Dict[str, int] = {}
+        postings = (self._by_trigram.get(gram, ()) for gram in set(word_trigrams(typed, not partial)))
+        for words in sorted(postings, key=len):
+            for word in words:
+                if word in shared:
+                    shared[word] += 1
+                elif len(shared) < cap:
+                    shared[word] = 1
+        similar = {}
+        for word in heapq.nlargest(_FUZZY_WORDS, shared, key=shared.get):
+            distance = edit_distance(typed, word, prefix=partial, bound=edits)
+            if distance <= edits:
+                similar[word] = 1 - distance / len(typed)
+        return similar
+
+    def _matches(self, words: List[str], fuzzy: bool) -> Dict[str, float]:
+        """
+        Tareas en cuyo título aparecen todas las palabras de la consulta
+        (la última, como prefijo), con la puntuación media por palabra. Con
+        `fuzzy` se aceptan también palabras con erratas.
+        """
+        cap = title_settings.suggest_max_candidates
+        options: List[Dict[str, float]] = []
+        for i, typed in enumerate(words):
+            partial = i == len(words) - 1
+            if partial:
+                low, high = self._prefix_range(typed)
+                # La palabra exacta, si existe, va primero en el rango
+                found = {word: 1.0 for word in self._words[low:min(high, low + cap)]}
+            else:
+                found = {typed: 1.0} if typed in self._by_word else {}
+            if fuzzy:
+                for word, score in self._similar_words(typed, partial).items():
+                    found.setdefault(word, score)
+            if not found:
+                return {}
+            options.append(found)
+
+        # Las palabras de la consulta con una sola variante se cruzan
+        # directamente. Después se recorre la palabra con menos tareas de las
+        # demás, empezando por sus variantes con mejor puntuación, y el resto
+        # se comprueba en el título de cada tarea.
+        fixed = [found for found in options if len(found) == 1]
+        others = sorted(
+            (found for found in options if len(found) > 1),
+            key=lambda found: sum(len(self._by_word[word]) for word in found)
+        )
+        base = sum(score for found in fixed for score in found.values())
+        common = None
+        if fixed:
+            postings = sorted((self._by_word[next(iter(found))] for found in fixed), key=len)
+            common = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        if others:
+            candidates = [
+                (base + score, self._by_word[word] if common is None else common & self._by_word[word])
+                for word, score in sorted(others.pop(0).items(), key=lambda item: -item[1])
+            ]
+        else:
+            candidates = [(base, common)]
+
+        scores: Dict[str, float] = {}
+        examined = 0
+        for start, task_ids in candidates:
+            for task_id in task_ids:
+                if task_id in scores:
+                    continue
+                if examined >= cap:
+                    return scores
+                examined += 1
+                title_words = self.tasks[task_id][1]
+                total = start
+                for found in others:
+                    best = max([found.get(w, 0.0) for w in title_words])
+                    if not best:
+                        break
+                    total += best
+                else:
+                    scores[task_id] = total / len(words)
+        return scores
+
+    def search(self, query: str, limit: int) -> List[Suggestion]:
+        """
+        Títulos que coinciden con `query`, de mejor a peor: primero los que
+        contienen todas sus palabras (la última, como prefijo) y después, si
+        faltan, los que las contienen con erratas. A igual puntuación van
+        antes los que empiezan por la consulta, las tareas abiertas y los
+        títulos cortos.
+        """
+        words = normalize_words(query)[:_MAX_QUERY_WORDS]
+        if not words or limit <= 0:
+            return []
+        scores = self._matches(words, fuzzy=False)
+        if len(scores) < limit:
+            for task_id, score in self._matches(words, fuzzy=True).items():
+                scores.setdefault(task_id, score)
+
+        # A igual puntuación: empieza por la consulta, abierta, título corto
+        ranked = heapq.nsmallest(limit, (
+            (-score, not title_words[:1] or not title_words[0].startswith(words[0]), completed, len(title), task_id)
+            for task_id, score in scores.items()
+            for title, title_words, completed in (self.tasks[task_id],)
+        ))
+        return [
+            Suggestion(task_id, self.tasks[task_id][0], completed, round(-score, 3))
+            for score, _, completed, _, task_id in ranked
+        ]
+
+
+class TitleIndexRegistry(WorkspaceIndexRegistry[TitleIndex]):
+    """Índices de títulos por espacio de trabajo."""
+
+    name = "Índice de títulos"
+
+    def build(self, docs: List[dict]) -> TitleIndex:
+        return TitleIndex.from_docs(docs)
+
+    def update(self, index: TitleIndex, task_id: str, doc: Optional[dict]):
+        if doc is None:
+            index.remove(task_id)
+        else:
+            index.put(task_id, doc.get("title", ""), bool(doc.get("completed")))
+
+
+title_index = TitleIndexRegistry(TITLE_PROJECTION)
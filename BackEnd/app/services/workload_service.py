@@ -0,0 +1,288 @@
+"""
+Servicio de carga de trabajo por día o semana.
+
+Las horas pendientes de cada tarea abierta (estimatedHours menos las horas
+de sus subtareas completadas) se reparten de forma uniforme entre su inicio
+y su fin. La suma no recorre las tareas en Python: el trabajo acumulado
+hasta un instante es una función lineal a trozos cuyos vértices son los
+inicios y fines ordenados, así que se calcula una vez con sumas acumuladas
+de numpy, se evalúa en los bordes de los intervalos con `np.interp` y la
+carga de cada intervalo es la diferencia entre bordes consecutivos.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db import database
+from app.db.repository import TaskQuery, TaskProjection
+from app.models.workload import WorkloadBucket, WorkloadResponse
+from app.utils.dates import ensure_utc, to_stored
+
+logger = logging.getLogger(__name__)
+
+
+class WorkloadSettings(BaseSettings):
+    """Configuración de la carga de trabajo."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Horas de trabajo disponibles por día natural
+    daily_capacity_hours: float = 8.0
+    # Días que cubre la consulta si no se indica `to`
+    workload_default_days: int = 28
+    # Máximo de intervalos por consulta
+    workload_max_buckets: int = 400
+
+
+workload_settings = WorkloadSettings()
+
+BUCKET_DAYS = {"day": 1, "week": 7}
+
+# Solo se leen las fechas y las horas; las de subtareas completadas las
+# suma el almacenamiento
+WORKLOAD_PROJECTION = TaskProjection(
+    fields=frozenset({"startDateTime", "endDateTime", "estimatedHours"}),
+    completed_subtask_hours=True
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class WorkloadRangeError(Exception):
+    """El rango pedido está vacío o tiene demasiados intervalos."""
+
+
+def bucket_edges(start: datetime, end: datetime, bucket: str) -> List[datetime]:
+    """
+    Calcula los bordes de los intervalos que cubren [start, end).
+
+    Los días empiezan a las 00:00 UTC y las semanas el lunes a las 00:00
+    UTC; el primer borde es el inicio del intervalo que contiene `start` y
+    el último el fin del que contiene el instante anterior a `end`.
+
+    Retorna:
+    - Bordes como datetime UTC sin tzinfo, igual que las fechas guardadas.
+
+    Lanza:
+    - WorkloadRangeError: Si `end` no es posterior a `start` o hacen falta
+      más de WORKLOAD_MAX_BUCKETS intervalos.
+    """
+    start, end = to_stored(start), to_stored(end)
+    if end <= start:
+        raise WorkloadRangeError("'to' debe ser posterior a 'from'")
+    step = timedelta(days=BUCKET_DAYS[bucket])
+    first = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        first -= timedelta(days=first.weekday())
+    count = -(-(end - first) // step)
+    if count > workload_settings.workload_max_buckets:
+        raise WorkloadRangeError(
+            f"El rango necesita {count} intervalos; el máximo es "
+            f"{workload_settings.workload_max_buckets}"
+        )
+    return [first + step * i for i in range(count + 1)]
+
+
+def default_range(
+    start: Optional[datetime],
+    end: Optional[datetime]
+) -> Tuple[datetime, datetime]:
+    """
+    Completa un rango: por defecto empieza hoy a las 00:00 UTC y dura
+    WORKLOAD_DEFAULT_DAYS días.
+    """
+    if start is None:
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if end is None:
+        end = ensure_utc(start) + timedelta(days=workload_settings.workload_default_days)
+    return start, end
+
+
+def remaining_hours(doc: dict) -> float:
+    """
+    Horas pendientes de una tarea: 0 si está completada y, si no,
+    estimatedHours menos las de sus subtareas completadas. Acepta el
+    documento completo o uno con `completedSubtaskHours`.
+    """
+    if doc.get("completed"):
+        return 0.0
+    if "completedSubtaskHours" in doc:
+        done = doc["completedSubtaskHours"] or 0
+    else:
+        done = sum(
+            st.get("estimatedHours") or 0 for st in doc.get("subtasks") or [] if st.get("completed")
+        )
+    return max((doc.get("estimatedHours") or 0) - done, 0.0)
+
+
+def to_seconds(values: List[datetime]) -> np.ndarray:
+    """
+    Fechas UTC sin tzinfo a segundos desde 1970 (float64).
+
+    Las restas y conversiones van encadenadas con `map`, en C y sin un
+    generador por fecha. Convertir la lista a datetime64 con numpy es unas
+    diez veces más lento, porque numpy analiza cada `datetime` por separado.
+    """
+    return np.fromiter(
+        map(timedelta.total_seconds, map(_EPOCH.__rsub__, values)),
+        dtype=np.float64,
+        count=len(values)
+    )
+
+
+def cumulative_work(times: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+    """
+    Trabajo acumulado (horas) en cada evento.
+
+    Parámetros:
+    - `times`: Fechas de los eventos en segundos, ordenadas.
+    - `deltas`: Horas por segundo que suma (inicio) o resta (fin) cada evento.
+    """
+    # Ritmo total a partir de cada evento; el trabajo es el área bajo él
+    rate_after = np.cumsum(deltas)
+    work = np.empty_like(times)
+    work[0] = 0.0
+    np.cumsum(rate_after[:-1] * np.diff(times), out=work[1:])
+    return work
+
+
+def bucket_load(times: np.ndarray, work: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Horas por intervalo a partir del trabajo acumulado en cada evento.
+
+    Fuera de [primer evento, último evento] el ritmo es 0 y `np.interp`
+    repite el valor del extremo, que es justo lo que corresponde.
+    """
+    if len(times) == 0:
+        return np.zeros(len(edges) - 1)
+    return np.maximum(np.diff(np.interp(edges, times, work)), 0.0)
+
+
+def bucket_counts(starts: np.ndarray, ends: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Tareas que se solapan con cada intervalo, con `starts` y `ends` ordenados.
+    Solapan con [a, b) las que empiezan antes de b y no terminan antes de a.
+    """
+    started = np.searchsorted(starts, edges[1:], side="left")
+    finished = np.searchsorted(ends, edges[:-1], side="right")
+    return started - finished
+
+
+def compute_workload(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    hours: np.ndarray,
+    edges: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reparte `hours[i]` uniformemente en [starts[i], ends[i]) y suma por intervalo.
+
+    Parámetros:
+    - `starts`, `ends`, `hours`: Arrays de la misma longitud, con fechas en
+      segundos y `ends > starts`.
+    - `edges`: Bordes ordenados de los intervalos, en segundos.
+
+    Retorna:
+    - (horas por intervalo, tareas que se solapan con cada intervalo), de
+      longitud len(edges) - 1.
+    """
+    if len(starts) == 0:
+        return bucket_load(starts, starts, edges), np.zeros(len(edges) - 1, dtype=np.int64)
+
+    rates = hours / (ends - starts)
+    times = np.concatenate((starts, ends))
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    work = cumulative_work(times, np.concatenate((rates, -rates))[order])
+    return (
+        bucket_load(times, work, edges),
+        bucket_counts(np.sort(starts), np.sort(ends), edges)
+    )
+
+
+async def get_workload_service(
+    workspace_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "day"
+) -> Optional[WorkloadResponse]:
+    """
+    Calcula la carga de trabajo pendiente por día o semana.
+
+    Parámetros:
+    - `workspace_id`: Espacio de trabajo.
+    - `start`: Inicio del rango (por defecto, hoy a las 00:00 UTC).
+    - `end`: Fin del rango (por defecto, WORKLOAD_DEFAULT_DAYS después).
+    - `bucket`: 'day' o 'week'.
+
+    Retorna:
+    - WorkloadResponse con un intervalo por día o semana, o None si hubo
+      un error de almacenamiento.
+
+    Lanza:
+    - WorkloadRangeError: Si el rango está vacío o es demasiado largo.
+    """
+    edges = bucket_edges(*default_range(start, end), bucket)
+
+    try:
+        docs = await database.task_repository.scan(
+            TaskQuery(
+                workspace_id=workspace_id,
+                completed=False,
+                window=(edges[0], edges[-1])
+            ),
+            WORKLOAD_PROJECTION
+        )
+    except Exception as e:
+        logger.error(f"Error al obtener tareas para la carga de trabajo: {e}")
+        return None
+
+    def compute() -> Tuple[np.ndarray, np.ndarray]:
+        starts = to_seconds([doc["startDateTime"] for doc in docs])
+        ends = to_seconds([doc["endDateTime"] for doc in docs])
+        estimated = np.fromiter(
+            (doc.get("estimatedHours") or 0 for doc in docs), dtype=np.float64, count=len(docs)
+        )
+        done = np.fromiter(
+            (doc.get("completedSubtaskHours") or 0 for doc in docs), dtype=np.float64, count=len(docs)
+        )
+        return compute_workload(
+            starts, ends, np.maximum(estimated - done, 0.0), to_seconds(edges)
+        )
+
+    # La conversión y las operaciones de numpy no bloquean el bucle de eventos
+    load, active = await asyncio.to_thread(compute)
+
+    days = BUCKET_DAYS[bucket]
+    capacity = workload_settings.daily_capacity_hours * days
+    buckets = [
+        WorkloadBucket(
+            start=edges[i],
+            end=edges[i + 1],
+            hours=round(float(load[i]), 2),
+            tasks=int(active[i]),
+            capacityHours=capacity,
+            overloaded=float(load[i]) > capacity + 1e-9
+        )
+        for i in range(len(edges) - 1)
+    ]
+    logger.info(
+        f"Carga de trabajo: {len(docs)} tareas, {len(buckets)} intervalos de "
+        f"{bucket}, espacio: {workspace_id}"
+    )
+    return WorkloadResponse(
+        start=edges[0],
+        end=edges[-1],
+        bucket=bucket,
+        totalHours=round(float(load.sum()), 2),
+        tasks=len(docs),
+        buckets=buckets
+    )
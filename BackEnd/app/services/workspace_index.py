@@ -0,0 +1,205 @@
+"""
+Base de los índices en memoria por espacio de trabajo.
+
+Cada índice se construye con `scan` la primera vez que se consulta un
+espacio (o al arrancar, con `warm`) y después lo mantienen las escrituras
+de este proceso (`apply`/`remove`, llamados desde task_service). Los
+workers no ven las escrituras de los demás, así que el índice de un
+espacio se reconstruye cuando supera WORKSPACE_INDEX_MAX_AGE_SECONDS: la
+consulta que lo detecta usa todavía el anterior y la reconstrucción se
+hace en segundo plano. Como mucho se conservan
+WORKSPACE_INDEX_MAX_WORKSPACES espacios por índice.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db import database
+from app.db.repository import TaskQuery, TaskProjection
+
+logger = logging.getLogger(__name__)
+
+IndexT = TypeVar("IndexT")
+
+
+class WorkspaceIndexSettings(BaseSettings):
+    """Configuración de los índices en memoria."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Segundos tras los que se reconstruye un espacio (cambios de otros workers)
+    workspace_index_max_age_seconds: float = 60.0
+    # Espacios indexados a la vez; se descarta el usado hace más tiempo
+    workspace_index_max_workspaces: int = 64
+
+
+index_settings = WorkspaceIndexSettings()
+
+
+class WorkspaceIndexRegistry(ABC, Generic[IndexT]):
+    """Índices de un tipo por espacio de trabajo, construidos bajo demanda."""
+
+    # Nombre para los logs
+    name = "índice"
+
+    def __init__(self, projection: TaskProjection, completed: Optional[bool] = None):
+        self._projection = projection
+        self._completed = completed
+        # workspace_id -> (momento de construcción, índice)
+        self._workspaces: "OrderedDict[str, Tuple[float, IndexT]]" = OrderedDict()
+        # Escrituras que llegan mientras se construye un espacio
+        self._pending: Dict[str, List[Tuple[str, Optional[dict]]]] = {}
+        # Espacios invalidados mientras se construían: el resultado no se guarda
+        self._stale: Set[str] = set()
+        # Una construcción a la vez por espacio: [lock, peticiones que lo usan]
+        self._build_locks: Dict[str, list] = {}
+        # Reconstrucciones en segundo plano de índices caducados
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    @abstractmethod
+    def build(self, docs: List[dict]) -> IndexT:
+        """Construye el índice a partir de los documentos del `scan`."""
+
+    @abstractmethod
+    def update(self, index: IndexT, task_id: str, doc: Optional[dict]):
+        """Refleja una tarea escrita (documento completo) o eliminada (None)."""
+
+    def _fresh(self, workspace_id: str) -> Optional[IndexT]:
+        entry = self._workspaces.get(workspace_id)
+        if entry is None:
+            return None
+        built_at, index = entry
+        if time.monotonic() - built_at > index_settings.workspace_index_max_age_seconds:
+            return None
+        self._workspaces.move_to_end(workspace_id)
+        return index
+
+    async def get(self, workspace_id: str) -> IndexT:
+        """
+        Índice del espacio. Si no existe se construye; si está caducado se
+        retorna el actual y se reconstruye en segundo plano.
+
+        Lanza:
+        - Exception: Los errores del almacenamiento al construirlo.
+        """
+        index = self._fresh(workspace_id)
+        if index is not None:
+            return index
+        entry = self._workspaces.get(workspace_id)
+        if entry is None:
+            return await self._build(workspace_id)
+        if workspace_id not in self._refreshing:
+            self._refreshing[workspace_id] = asyncio.create_task(self._refresh(workspace_id))
+        self._workspaces.move_to_end(workspace_id)
+        return entry[1]
+
+    async def _refresh(self, workspace_id: str):
+        try:
+            await self._build(workspace_id)
+        except Exception as e:
+            logger.error(f"Error al reconstruir {self.name}, espacio: {workspace_id}: {e}")
+        finally:
+            self._refreshing.pop(workspace_id, None)
+
+    async def _build(self, workspace_id: str, force: bool = False) -> IndexT:
+        # Los demás espacios se construyen a la vez; el lock se descarta
+        # cuando nadie más lo espera
+        entry = self._build_locks.setdefault(workspace_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._build_locked(workspace_id, force)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._build_locks[workspace_id]
+
+    async def _build_locked(self, workspace_id: str, force: bool) -> IndexT:
+        """Construye el índice de un espacio con su lock tomado."""
+        if not force:
+            index = self._fresh(workspace_id)
+            if index is not None:
+                return index
+        self._pending[workspace_id] = []
+        try:
+            docs = await database.task_repository.scan(
+                TaskQuery(workspace_id=workspace_id, completed=self._completed),
+                self._projection
+            )
+            started = time.perf_counter()
+            index = await asyncio.to_thread(self.build, docs)
+            # Las escrituras durante el scan pueden no estar en él
+            for task_id, doc in self._pending[workspace_id]:
+                self.update(index, task_id, doc)
+        finally:
+            self._pending.pop(workspace_id, None)
+        if workspace_id in self._stale:
+            self._stale.discard(workspace_id)
+            return index
+        self._workspaces[workspace_id] = (time.monotonic(), index)
+        self._workspaces.move_to_end(workspace_id)
+        while len(self._workspaces) > index_settings.workspace_index_max_workspaces:
+            self._workspaces.popitem(last=False)
+        logger.info(
+            f"{self.name} construido: {len(docs)} tareas, espacio: {workspace_id}, "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        return index
+
+    async def rebuild(self, workspace_id: str) -> IndexT:
+        """
+        Reconstruye el índice de un espacio desde el almacenamiento, aunque
+        no haya caducado.
+
+        Lanza:
+        - Exception: Los errores del almacenamiento al construirlo.
+        """
+        return await self._build(workspace_id, force=True)
+
+    async def warm(self, workspace_ids: List[str]):
+        """
+        Construye los índices de varios espacios (al arrancar), hasta
+        WORKSPACE_INDEX_MAX_WORKSPACES; los errores solo se registran.
+        """
+        for workspace_id in workspace_ids[:index_settings.workspace_index_max_workspaces]:
+            try:
+                await self._build(workspace_id)
+            except Exception as e:
+                logger.error(f"Error al construir {self.name}, espacio: {workspace_id}: {e}")
+
+    def _write(self, workspace_id: str, task_id: str, doc: Optional[dict]):
+        if workspace_id in self._pending:
+            self._pending[workspace_id].append((task_id, doc))
+        entry = self._workspaces.get(workspace_id)
+        if entry is not None:
+            self.update(entry[1], task_id, doc)
+
+    def apply(self, workspace_id: str, doc: dict):
+        """Refleja el estado de una tarea tras crearla o actualizarla."""
+        self._write(workspace_id, str(doc["_id"]), doc)
+
+    def remove(self, workspace_id: str, task_id: str):
+        """Retira una tarea eliminada."""
+        self._write(workspace_id, task_id, None)
+
+    def invalidate(self, workspace_id: Optional[str] = None):
+        """
+        Descarta el índice de un espacio (o de todos) tras escrituras
+        masivas; se reconstruye en la siguiente consulta.
+        """
+        if workspace_id is None:
+            self._workspaces.clear()
+            self._stale.update(self._pending)
+        else:
+            self._workspaces.pop(workspace_id, None)
+            if workspace_id in self._pending:
+                self._stale.add(workspace_id)
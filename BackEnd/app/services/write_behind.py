@@ -0,0 +1,282 @@
+"""
+Escritura diferida (write-behind) de cambios de estado de tareas.
+
+Los PUT que solo cambian `completed` o `subtasks` se acumulan por tarea
+durante WRITE_BEHIND_WINDOW_MS y se escriben juntos con un único
+`bulk_update` sin orden. Los cambios de una misma tarea se fusionan en orden
+de llegada, de modo que gana el último.
+
+Cada lote se escribe con la versión que tenía la tarea al encolar el primer
+cambio como condición. Si otro worker la modificó entretanto, se vuelve a
+leer y se aplican los campos encolados encima, salvo los que ese worker
+cambió después (por `updated_at`) que el último cambio encolado.
+
+Tras cada tarea escrita se avisa a las funciones registradas con
+`on_write` (task_service descarta los totales y refleja el estado guardado
+en los índices en memoria).
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db import database
+from app.db.repository import TaskKey, UpdateGuard
+from app.utils.dates import to_stored
+
+logger = logging.getLogger(__name__)
+
+# Campos de estado: escribirlos de nuevo con el mismo valor no cambia nada
+STATUS_FIELDS = frozenset({"completed", "subtasks"})
+# Intentos de fusionar los cambios de una tarea modificada por otro worker
+MERGE_ATTEMPTS = 3
+
+
+class WriteBehindSettings(BaseSettings):
+    """Configuración de la escritura diferida."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    # Ventana de agrupación en milisegundos (0 = escritura inmediata)
+    write_behind_window_ms: float = 0.0
+    # Tareas pendientes que fuerzan la escritura antes de la ventana
+    write_behind_max_batch: int = 500
+
+
+write_behind_settings = WriteBehindSettings()
+
+
+class _PendingWrite:
+    """
+    Campos pendientes de una tarea, su estado fusionado, el documento sobre
+    el que se aplican (`base`) y cuántos cambios agrupa (incremento de
+    `version` al escribirlos).
+    """
+    __slots__ = ("fields", "doc", "base", "increment")
+
+    def __init__(self, fields: dict, base: dict):
+        self.fields = fields
+        self.doc = dict(base)
+        self.base = base
+        self.increment = 0
+
+    @property
+    def base_version(self) -> int:
+        return self.base.get("version") or 0
+
+
+class TaskWriteBuffer:
+    """
+    Agrupa cambios de estado por tarea y los escribe por lotes. Las
+    escrituras se serializan con un lock, así que los cambios de una tarea
+    llegan al almacenamiento en el mismo orden en que se recibieron.
+    """
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        # Claves (workspace_id, _id): una tarea solo se ve desde su espacio
+        self._pending: Dict[TaskKey, _PendingWrite] = {}
+        # Estado de las tareas del lote que se está escribiendo
+        self._inflight: Dict[TaskKey, dict] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._listeners: List[Callable[[TaskKey, Optional[dict]], None]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def accepts(self, fields: dict) -> bool:
+        """True si la actualización solo toca campos de estado."""
+        return self.enabled and bool(fields) and fields.keys() <= STATUS_FIELDS
+
+    def peek(self, key: TaskKey) -> Optional[dict]:
+        """Copia del estado fusionado de la tarea si tiene cambios sin confirmar."""
+        entry = self._pending.get(key)
+        doc = entry.doc if entry is not None else self._inflight.get(key)
+        return dict(doc) if doc is not None else None
+
+    def stage(self, key: TaskKey, base_doc: dict, fields: dict) -> dict:
+        """
+        Encola `fields` para la tarea y retorna su estado fusionado.
+
+        Parámetros:
+        - `key`: (workspace_id, _id) de la tarea.
+        - `base_doc`: Documento leído del almacenamiento; se ignora si la
+          tarea ya tiene cambios sin confirmar, que son más recientes.
+        - `fields`: Campos a aplicar con semántica `$set`.
+        """
+        entry = self._pending.get(key)
+        if entry is None:
+            base = self._inflight.get(key) or base_doc
+            entry = _PendingWrite({}, dict(base))
+            self._pending[key] = entry
+        entry.fields.update(fields)
+        entry.doc.update(fields)
+        # Cada cambio cuenta como una versión, aunque se escriban juntos
+        entry.increment += 1
+        entry.doc["version"] = entry.doc.get("version", 0) + 1
+        self._schedule()
+        return dict(entry.doc)
+
+    def on_write(self, listener: Callable[[TaskKey, Optional[dict]], None]):
+        """
+        Registra una función que se llama con la clave y el estado de cada
+        tarea que llega al almacenamiento (None si ya no está activa). Si la
+        tarea tiene cambios más recientes encolados, recibe esos.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, key: TaskKey, doc: Optional[dict]):
+        newer = self._pending.get(key)
+        if newer is not None:
+            doc = newer.doc
+        for listener in self._listeners:
+            try:
+                listener(key, dict(doc) if doc is not None else None)
+            except Exception as e:
+                logger.error(f"Error al notificar la escritura diferida de {key[1]}: {e}")
+
+    def discard(self, key: TaskKey):
+        """Olvida los cambios de una tarea eliminada."""
+        self._pending.pop(key, None)
+        self._inflight.pop(key, None)
+
+    def _schedule(self):
+        if len(self._pending) >= self.max_batch:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+
+    def _start_flush(self):
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def flush(self):
+        """Escribe todos los cambios pendientes en un solo lote."""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._inflight = {key: entry.doc for key, entry in batch.items()}
+            try:
+                await self._write(batch)
+                logger.debug(f"Escritura diferida: {len(batch)} tareas")
+            except Exception as e:
+                logger.error(f"Error en la escritura diferida de {len(batch)} tareas: {e}")
+                self._requeue(batch)
+            finally:
+                self._inflight = {}
+
+    async def _write(self, batch: Dict[TaskKey, _PendingWrite]):
+        """Escribe un lote y fusiona las tareas que otro worker modificó."""
+        missed = await database.task_repository.bulk_update(
+            {key: (entry.fields, entry.base_version, entry.increment) for key, entry in batch.items()}
+        )
+        missed = set(missed)
+        for key, entry in batch.items():
+            if key in missed:
+                self._notify(key, await self._merge(key, entry))
+            else:
+                self._notify(key, entry.doc)
+
+    async def _merge(self, key: TaskKey, entry: _PendingWrite) -> Optional[dict]:
+        """
+        Vuelve a aplicar los cambios de una tarea cuya versión ya no es la
+        leída, con la versión actual como condición. Gana el último: un campo
+        que otro worker también cambió conserva su valor solo si esa
+        escritura es posterior (`updated_at`) al último cambio encolado.
+
+        Retorna:
+        - El documento guardado, o None si la tarea ya no está activa.
+        """
+        workspace_id, task_id = key
+        staged_at = to_stored(entry.fields["updated_at"])
+        current = None
+        for _ in range(MERGE_ATTEMPTS):
+            current = await database.task_repository.get(workspace_id, task_id, include_archived=True)
+            if current is None or current.get("archived"):
+                logger.warning(
+                    f"Se descarta la escritura diferida de {task_id}: la tarea se "
+                    f"{'archivó' if current else 'eliminó'} desde otro worker"
+                )
+                return None
+            newer = to_stored(current["updated_at"]) > staged_at
+            fields = {
+                name: value for name, value in entry.fields.items()
+                if name in STATUS_FIELDS
+                and current.get(name) != value
+                and not (newer and current.get(name) != entry.base.get(name))
+            }
+            if not fields:
+                logger.info(f"Escritura diferida de {task_id} sustituida por un cambio posterior")
+                return current
+            if not newer:
+                fields["updated_at"] = entry.fields["updated_at"]
+            guard = UpdateGuard(version=current.get("version") or 0)
+            updated = await database.task_repository.update(workspace_id, task_id, fields, guard)
+            if updated:
+                return updated
+        logger.warning(f"Se descarta la escritura diferida de {task_id}: la tarea cambia sin parar")
+        return current
+
+    def _requeue(self, batch: Dict[TaskKey, _PendingWrite]):
+        """Devuelve un lote fallido a la cola sin pisar cambios más recientes."""
+        for key, entry in batch.items():
+            newer = self._pending.get(key)
+            if newer is None:
+                self._pending[key] = entry
+            else:
+                newer.fields = {**entry.fields, **newer.fields}
+                newer.increment += entry.increment
+                # El lote fallido no llegó al almacenamiento
+                newer.base = entry.base
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+
+    async def flush_task(self, key: TaskKey):
+        """
+        Escribe ya los cambios pendientes de una tarea. Se usa antes de una
+        actualización directa para que no la pise un lote posterior.
+        """
+        async with self._lock:
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return
+            self._inflight = {key: entry.doc}
+            try:
+                await self._write({key: entry})
+            except Exception:
+                self._requeue({key: entry})
+                raise
+            finally:
+                self._inflight = {}
+
+    async def close(self):
+        """Escribe lo pendiente; se llama al cerrar la aplicación."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._timer is not None:
+            # La última escritura falló y se reprogramó
+            self._timer.cancel()
+            self._timer = None
+            logger.error(f"Se descartan {len(self._pending)} cambios diferidos sin escribir")
+            self._pending.clear()
+
+
+task_write_buffer = TaskWriteBuffer(
+    write_behind_settings.write_behind_window_ms,
+    write_behind_settings.write_behind_max_batch
+)
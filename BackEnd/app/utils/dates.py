@@ -0,0 +1,35 @@
+"""
+Utilidades para fechas en UTC.
+"""
+from datetime import datetime, timezone
+
+
+def ensure_utc(value: datetime) -> datetime:
+    """
+    Normaliza una fecha a UTC con zona horaria.
+
+    Parámetros:
+    - `value`: Fecha con o sin zona. Las fechas sin zona se interpretan
+      como UTC, igual que las que devuelve MongoDB.
+
+    Retorna:
+    - datetime con tzinfo UTC.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_stored(value: datetime) -> datetime:
+    """
+    Convierte una fecha a la forma en que la devuelve MongoDB.
+
+    Parámetros:
+    - `value`: Fecha con o sin zona (sin zona se interpreta como UTC).
+
+    Retorna:
+    - datetime UTC sin tzinfo, truncado a milisegundos.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
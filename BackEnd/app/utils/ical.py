@@ -0,0 +1,150 @@
+"""
+Lectura en streaming de eventos iCalendar (RFC 5545).
+
+Solo se interpreta lo necesario para importar tareas: las propiedades de
+cada VEVENT de primer nivel (los componentes anidados, como VALARM, se
+ignoran), el plegado de líneas, el escapado de texto y las fechas con
+TZID, en UTC o flotantes.
+"""
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Propiedad: (parámetros, valor)
+ICalProperty = Tuple[Dict[str, str], str]
+
+_DURATION = re.compile(
+    r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$"
+)
+_TEXT_ESCAPES = {"n": "\n", "N": "\n", ",": ",", ";": ";", "\\": "\\"}
+
+
+def unfold_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    Une las líneas plegadas (las que empiezan por espacio o tabulador
+    continúan la anterior). Retorna (número de la primera línea, línea).
+    """
+    current = None
+    start = 0
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield start, current
+        current = line
+        start = number
+    if current:
+        yield start, current
+
+
+def parse_content_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """
+    Separa una línea de contenido en (nombre, parámetros, valor). Los dos
+    puntos dentro de un parámetro entre comillas no cuentan como separador.
+    """
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        raise ValueError(f"Línea iCalendar sin valor: {line[:80]}")
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw in raw_params:
+        key, _, param_value = raw.partition("=")
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[Tuple[int, Dict[str, ICalProperty]]]:
+    """
+    Recorre los VEVENT de un calendario sin cargarlo entero.
+
+    Retorna:
+    - Pares (línea de BEGIN:VEVENT, propiedades por nombre). Si una
+      propiedad se repite, queda la primera. Las líneas mal formadas se
+      ignoran, como hacen los clientes de calendario.
+    """
+    event = None
+    event_line = 0
+    nested = 0
+    for number, line in unfold_lines(lines):
+        try:
+            name, params, value = parse_content_line(line)
+        except ValueError:
+            continue
+        if name == "BEGIN":
+            if event is not None:
+                nested += 1
+            elif value.upper() == "VEVENT":
+                event, event_line, nested = {}, number, 0
+        elif name == "END":
+            if event is None:
+                continue
+            if nested:
+                nested -= 1
+            elif value.upper() == "VEVENT":
+                yield event_line, event
+                event = None
+        elif event is not None and not nested:
+            event.setdefault(name, (params, value))
+
+
+def unescape_text(value: str) -> str:
+    """Deshace el escapado de los valores TEXT (\\n, \\, \\; y \\\\)."""
+    return re.sub(r"\\(.)", lambda m: _TEXT_ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def parse_datetime(prop: ICalProperty) -> datetime:
+    """
+    Convierte DTSTART/DTEND a datetime UTC con zona.
+
+    Las fechas sin hora (VALUE=DATE) empiezan a las 00:00 UTC y las horas
+    flotantes (sin Z ni TZID) se interpretan como UTC, igual que en la API.
+
+    Lanza:
+    - ValueError: Si el formato o la zona horaria no son válidos.
+    """
+    params, value = prop
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        day = date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+        return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    if value.endswith("Z"):
+        return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+    naive = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    tzid = params.get("TZID")
+    if not tzid:
+        return naive.replace(tzinfo=timezone.utc)
+    try:
+        zone = ZoneInfo(tzid)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Zona horaria desconocida: {tzid}")
+    return naive.replace(tzinfo=zone).astimezone(timezone.utc)
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Convierte un valor DURATION (p. ej. 'PT1H30M' o 'P2D') a timedelta.
+
+    Lanza:
+    - ValueError: Si el formato no es válido.
+    """
+    match = _DURATION.match(value.strip())
+    if not match or not any(match.groups()[1:]):
+        raise ValueError(f"Duración iCalendar no válida: {value}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0),
+        days=int(days or 0),
+        hours=int(hours or 0),
+        minutes=int(minutes or 0),
+        seconds=int(seconds or 0)
+    )
+    return -duration if sign == "-" else duration
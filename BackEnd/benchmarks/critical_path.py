@@ -0,0 +1,103 @@
+"""
+Benchmark del grafo de dependencias.
+
+Carga N tareas encadenadas (cada una depende de hasta 3 de las 50
+anteriores, backend en memoria) y compara reconstruir el grafo completo
+con aplicar una edición de una tarea (cambiar sus horas o sus
+dependencias), que solo recalcula los nodos cuyos valores cambian. Con
+todas las tareas en una sola cadena es el peor caso: un cambio al
+principio retrasa todo lo que viene detrás. También mide
+GET /tasks/{id}/critical-path y la planificación de las tareas críticas.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.critical_path --tasks 10000,100000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import DEFAULT_WORKSPACE, TaskQuery
+from app.models.task import TaskUpdate
+from app.services import dependency_service, task_service
+from app.services.dependency_graph import DEPENDENCY_PROJECTION, DependencyGraph, dependency_index
+from benchmarks.workload import make_tasks
+
+# Cada tarea depende de tareas entre las WINDOW anteriores
+WINDOW = 50
+
+
+def link_tasks(tasks: List[dict], rng: random.Random):
+    for i, task in enumerate(tasks):
+        previous = tasks[max(0, i - WINDOW):i]
+        task["dependsOn"] = [t["_id"] for t in rng.sample(previous, min(len(previous), rng.randint(0, 3)))]
+
+
+async def run(task_counts: List[int], edits: int):
+    rng = random.Random(7)
+    for count in task_counts:
+        tasks = make_tasks(count)
+        link_tasks(tasks, rng)
+        database.task_repository = MemoryTaskRepository()
+        await database.task_repository.insert_many(tasks)
+        dependency_index.invalidate()
+        ids = [str(t["_id"]) for t in tasks]
+
+        docs = await database.task_repository.scan(
+            TaskQuery(workspace_id=DEFAULT_WORKSPACE), DEPENDENCY_PROJECTION
+        )
+        started = time.perf_counter()
+        DependencyGraph.from_docs(docs)
+        rebuild = time.perf_counter() - started
+        graph = await dependency_index.get(DEFAULT_WORKSPACE)
+
+        hours_total = 0.0
+        links_total = 0.0
+        for _ in range(edits):
+            position = rng.randrange(count)
+            started = time.perf_counter()
+            await task_service.update_task_service(
+                DEFAULT_WORKSPACE, ids[position], TaskUpdate(estimatedHours=rng.randint(1, 40))
+            )
+            hours_total += time.perf_counter() - started
+
+            previous = ids[max(0, position - WINDOW):position]
+            started = time.perf_counter()
+            await task_service.update_task_service(
+                DEFAULT_WORKSPACE,
+                ids[position],
+                TaskUpdate(dependsOn=rng.sample(previous, min(len(previous), rng.randint(0, 3))))
+            )
+            links_total += time.perf_counter() - started
+
+        # La tarea que termina más tarde está en el camino crítico del proyecto
+        last = max(graph.nodes, key=lambda task_id: graph.nodes[task_id].finish)
+        started = time.perf_counter()
+        critical = await dependency_service.get_critical_path_service(DEFAULT_WORKSPACE, last)
+        path = time.perf_counter() - started
+        started = time.perf_counter()
+        await dependency_service.get_project_schedule_service(DEFAULT_WORKSPACE, critical_only=True)
+        schedule = time.perf_counter() - started
+
+        print(
+            f"{count:>8} tareas ({len(graph)} en el grafo): reconstrucción {rebuild * 1000:.0f} ms, "
+            f"editar horas {hours_total / edits * 1000:.2f} ms, "
+            f"editar dependencias {links_total / edits * 1000:.2f} ms, "
+            f"camino crítico {path * 1000:.2f} ms ({len(critical.path)} tareas), "
+            f"planificación crítica {schedule * 1000:.0f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="10000,100000", help="Números de tareas separados por comas")
+    parser.add_argument("--edits", type=int, default=200, help="Ediciones a medir")
+    args = parser.parse_args()
+    asyncio.run(run([int(n) for n in args.tasks.split(",")], args.edits))
+
+
+if __name__ == "__main__":
+    main()
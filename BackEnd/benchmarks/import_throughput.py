@@ -0,0 +1,95 @@
+"""
+Benchmark de la importación masiva de CSV.
+
+Genera un CSV de N filas y lo importa con el mismo trabajo que usa
+POST /tasks/import. Por defecto las tareas se descartan al insertarlas, de
+modo que se mide el techo de lectura y validación (el ritmo real lo marca el
+almacenamiento) y el pico de memoria de Python no incluye las tareas
+guardadas: debe ser el mismo con 10 000 que con 100 000 filas.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.import_throughput --rows 10000,100000
+    python -m benchmarks.import_throughput --rows 100000 --storage memory
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from starlette.datastructures import UploadFile
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import DEFAULT_WORKSPACE
+from app.services import import_service
+
+
+class _DiscardRepository(MemoryTaskRepository):
+    """Acepta los lotes sin guardarlos."""
+
+    async def insert_many(self, documents: List[dict]) -> int:
+        return len(documents)
+
+
+def write_csv(path: str, rows: int):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("title,description,startDateTime,endDateTime,estimatedHours,completed\n")
+        for i in range(rows):
+            start = base + timedelta(minutes=i)
+            end = start + timedelta(hours=2)
+            f.write(
+                f"Tarea {i},\"Descripción, con coma\",{start.isoformat()},"
+                f"{end.isoformat()},{1 + i % 8},{'true' if i % 3 == 0 else 'false'}\n"
+            )
+
+
+async def import_file(path: str) -> import_service.ImportJob:
+    with open(path, "rb") as f:
+        upload = UploadFile(f, filename=os.path.basename(path))
+        response = await import_service.start_import_service(DEFAULT_WORKSPACE, upload, "csv")
+    job = import_service._jobs[response.id]
+    await job.task
+    return job
+
+
+async def run(row_counts: List[int], storage: str):
+    print(f"almacenamiento: {storage}, lote: {import_service.import_settings.import_batch_size}")
+    for rows in row_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tasks.csv")
+            write_csv(path, rows)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+
+            database.task_repository = _DiscardRepository() if storage == "discard" else MemoryTaskRepository()
+            started = time.perf_counter()
+            job = await import_file(path)
+            elapsed = time.perf_counter() - started
+
+            # Segunda pasada solo para medir el pico de memoria (tracemalloc la ralentiza)
+            database.task_repository = _DiscardRepository() if storage == "discard" else MemoryTaskRepository()
+            tracemalloc.start()
+            await import_file(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        print(
+            f"{rows:>8} filas ({size_mb:.1f} MB): {job.imported / elapsed:,.0f} tareas/s "
+            f"({elapsed:.2f} s), {job.failed} rechazadas, pico de memoria {peak / 1024 / 1024:.1f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", default="10000,100000", help="Números de filas separados por comas")
+    parser.add_argument("--storage", choices=("discard", "memory"), default="discard")
+    args = parser.parse_args()
+    asyncio.run(run([int(n) for n in args.rows.split(",")], args.storage))
+
+
+if __name__ == "__main__":
+    main()
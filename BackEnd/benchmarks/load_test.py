@@ -0,0 +1,442 @@
+"""
+Prueba de carga de extremo a extremo con tráfico similar al del frontend.
+
+Levanta `serve.py` con el almacenamiento en memoria (sustituto local de
+MongoDB) y el backend de IA simulado, o apunta a un servidor ya en marcha con
+--target. Usuarios virtuales en lazo cerrado ejecutan una mezcla de
+peticiones (sondeo del listado con distintos filterBy/sortBy, lecturas de
+detalle, cambios de subtareas con PUT, altas, bajas y /ai/generate-task). La
+concurrencia se duplica en cada escalón hasta que el p95 supera el SLO o los
+errores superan el umbral; se informa el máximo de peticiones por segundo
+sostenible y su valor por worker.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.load_test --slo-p95-ms 150
+    python -m benchmarks.load_test --target http://localhost:8000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Espacio de trabajo de las tareas de la prueba (cabecera X-Workspace-Id)
+WORKSPACE_ID = "load-test"
+# Peso relativo de cada operación en la mezcla por defecto
+DEFAULT_MIX = "list=55,detail=20,toggle=12,create=6,delete=5,ai=2"
+LIST_FILTERS = [None, None, "today", "overdue", "inProgress", "completed"]
+LIST_SORTS = [None, "recent", "dueDate", "title", "progress", "duration"]
+# Respuestas que no cuentan como error (p. ej. tarea borrada por otro usuario)
+EXPECTED_STATUS = {
+    "list": {200},
+    "detail": {200, 404},
+    "toggle": {200, 404},
+    "create": {201},
+    "delete": {204, 404},
+    "ai": {200},
+}
+
+
+class HttpConnection:
+    """Cliente HTTP/1.1 mínimo con keep-alive: una conexión por usuario."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body=None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"X-Workspace-Id: {WORKSPACE_ID}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+        )
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        self.writer.write(head.encode() + b"\r\n" + payload)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("conexión cerrada por el servidor")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            data = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            data = await self._read_chunked()
+        else:
+            data = b""
+        if headers.get("connection") == "close":
+            self.close()
+        return status, data
+
+    async def _read_chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class TaskPool:
+    """Tareas conocidas por los usuarios virtuales (id → subtareas)."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.subtasks: Dict[str, List[dict]] = {}
+
+    def add(self, task: dict):
+        self.ids.append(task["id"])
+        self.subtasks[task["id"]] = [
+            {k: s[k] for k in ("title", "estimatedHours", "completed")}
+            for s in task["subtasks"]
+        ]
+
+    def pick(self) -> Optional[str]:
+        return random.choice(self.ids) if self.ids else None
+
+    def take(self) -> Optional[str]:
+        """Retira una tarea para borrarla; así nadie más la elige."""
+        if not self.ids:
+            return None
+        index = random.randrange(len(self.ids))
+        self.ids[index], self.ids[-1] = self.ids[-1], self.ids[index]
+        task_id = self.ids.pop()
+        self.subtasks.pop(task_id, None)
+        return task_id
+
+
+def build_task_payload(i: int) -> dict:
+    """Tarea como la que envía el formulario del frontend."""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    start = now + timedelta(hours=random.randint(-72, 72))
+    end = start + timedelta(hours=random.randint(2, 120))
+    return {
+        "title": f"Tarea de carga {i}",
+        "description": "Descripción generada por la prueba de carga",
+        "startDateTime": start.isoformat().replace("+00:00", "Z"),
+        "endDateTime": end.isoformat().replace("+00:00", "Z"),
+        "estimatedHours": random.randint(1, 40),
+        "subtasks": [
+            {"title": f"Subtarea {j}", "estimatedHours": 1, "completed": random.random() < 0.3}
+            for j in range(random.randint(0, 5))
+        ]
+    }
+
+
+def list_path() -> str:
+    params = []
+    filter_by = random.choice(LIST_FILTERS)
+    sort_by = random.choice(LIST_SORTS)
+    if filter_by:
+        params.append(f"filterBy={filter_by}")
+    if sort_by:
+        params.append(f"sortBy={sort_by}")
+    if random.random() < 0.5:
+        params.append("view=summary")
+    if random.random() < 0.2:
+        params.append("withTotal=true")
+    return "/tasks/" + ("?" + "&".join(params) if params else "")
+
+
+async def run_operation(conn: HttpConnection, op: str, pool: TaskPool) -> Optional[int]:
+    """Ejecuta una operación; retorna el código HTTP o None si no aplica."""
+    if op == "list":
+        status, _ = await conn.request("GET", list_path())
+    elif op == "detail":
+        task_id = pool.pick()
+        if task_id is None:
+            return None
+        status, _ = await conn.request("GET", f"/tasks/{task_id}")
+    elif op == "toggle":
+        task_id = pool.pick()
+        subtasks = pool.subtasks.get(task_id) if task_id else None
+        if not subtasks:
+            return None
+        subtask = random.choice(subtasks)
+        subtask["completed"] = not subtask["completed"]
+        status, _ = await conn.request("PUT", f"/tasks/{task_id}", {"subtasks": subtasks})
+    elif op == "create":
+        status, data = await conn.request("POST", "/tasks/", build_task_payload(random.randrange(10**6)))
+        if status == 201:
+            pool.add(json.loads(data))
+    elif op == "delete":
+        task_id = pool.take()
+        if task_id is None:
+            return None
+        status, _ = await conn.request("DELETE", f"/tasks/{task_id}")
+    else:
+        status, _ = await conn.request(
+            "POST", "/ai/generate-task",
+            {"title": "Preparar informe trimestral", "description": "Ventas y métricas"}
+        )
+    return status
+
+
+class StepResult:
+    """Latencias y errores de un escalón de concurrencia."""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.elapsed = 0.0
+
+    def record(self, op: str, latency_ms: float, ok: bool):
+        self.latencies.setdefault(op, []).append(latency_ms)
+        if not ok:
+            self.errors[op] = self.errors.get(op, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def rps(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def error_rate(self) -> float:
+        return sum(self.errors.values()) / self.total if self.total else 0.0
+
+    def percentile(self, q: float, ops: Optional[List[str]] = None) -> float:
+        values = sorted(
+            v for op, lat in self.latencies.items()
+            if ops is None or op in ops
+            for v in lat
+        )
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def virtual_user(host, port, mix, pool, result, record_after, stop_at, timeout):
+    ops, weights = zip(*mix.items())
+    conn = HttpConnection(host, port)
+    try:
+        while time.perf_counter() < stop_at:
+            op = random.choices(ops, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(run_operation(conn, op, pool), timeout)
+                if status is None:
+                    continue
+                ok = status in EXPECTED_STATUS[op]
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                conn.close()
+                ok = False
+            finished = time.perf_counter()
+            if started >= record_after:
+                result.record(op, (finished - started) * 1000, ok)
+    finally:
+        conn.close()
+
+
+async def run_step(host, port, mix, pool, concurrency, duration, warmup, timeout) -> StepResult:
+    result = StepResult(concurrency)
+    started = time.perf_counter()
+    record_after = started + warmup
+    stop_at = record_after + duration
+    await asyncio.gather(*(
+        virtual_user(host, port, mix, pool, result, record_after, stop_at, timeout)
+        for _ in range(concurrency)
+    ))
+    result.elapsed = time.perf_counter() - record_after
+    return result
+
+
+async def seed(host, port, pool: TaskPool, count: int):
+    conn = HttpConnection(host, port)
+    try:
+        for i in range(count):
+            status, data = await conn.request("POST", "/tasks/", build_task_payload(i))
+            if status != 201:
+                raise RuntimeError(f"No se pudo crear la tarea inicial: {status} {data[:200]!r}")
+            pool.add(json.loads(data))
+    finally:
+        conn.close()
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        op, _, weight = item.partition("=")
+        op = op.strip()
+        if op not in EXPECTED_STATUS:
+            raise ValueError(f"Operación desconocida en la mezcla: {op}")
+        if float(weight) > 0:
+            mix[op] = float(weight)
+    return mix
+
+
+def start_server(args, port: int) -> subprocess.Popen:
+    """Arranca serve.py sin MongoDB ni Gemini."""
+    env = dict(
+        os.environ,
+        STORAGE_BACKEND=args.storage,
+        MEMORY_SNAPSHOT_PATH="",
+        AI_BACKEND="fake",
+        AI_FAKE_LATENCY_MS=str(args.ai_latency_ms),
+        PROFILING_ENABLED="false",
+    )
+    command = [
+        sys.executable, "serve.py",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers)
+    ]
+    return subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(host: str, port: int, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        conn = HttpConnection(host, port)
+        try:
+            status, _ = await conn.request("GET", "/ready")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            conn.close()
+        await asyncio.sleep(0.2)
+    raise RuntimeError("El servidor no respondió en /ready")
+
+
+def print_step(result: StepResult, crud_ops: List[str], passed: bool):
+    print(
+        f"{result.concurrency:>6} {result.rps:>10,.0f} "
+        f"{result.percentile(0.50, crud_ops):>8.1f} {result.percentile(0.95, crud_ops):>8.1f} "
+        f"{result.percentile(0.99, crud_ops):>8.1f} {result.error_rate():>7.2%}  "
+        f"{'ok' if passed else 'SLO superado'}"
+    )
+
+
+def print_breakdown(result: StepResult):
+    print(f"\nDetalle por operación ({result.concurrency} usuarios):")
+    for op, latencies in sorted(result.latencies.items()):
+        print(
+            f"  {op:<8} {len(latencies) / result.elapsed:>9,.1f} req/s  "
+            f"p50 {result.percentile(0.50, [op]):>7.1f} ms  "
+            f"p95 {result.percentile(0.95, [op]):>7.1f} ms  "
+            f"errores {result.errors.get(op, 0)}"
+        )
+
+
+async def run(args, host: str, port: int, workers: int):
+    mix = parse_mix(args.mix)
+    # El SLO se evalúa sobre la API de tareas; la latencia de IA es externa
+    crud_ops = [op for op in mix if op != "ai"]
+    await wait_ready(host, port)
+    pool = TaskPool()
+    await seed(host, port, pool, args.seed_tasks)
+
+    print(f"SLO: p95 <= {args.slo_p95_ms} ms, errores <= {args.max_error_rate:.1%}, {workers} worker(s)")
+    print(f"{'usuarios':>6} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>7}")
+    best: Optional[StepResult] = None
+    concurrency = args.start_concurrency
+    while concurrency <= args.max_concurrency:
+        result = await run_step(
+            host, port, mix, pool, concurrency, args.step_duration, args.warmup, args.timeout
+        )
+        passed = (
+            result.percentile(0.95, crud_ops) <= args.slo_p95_ms
+            and result.error_rate() <= args.max_error_rate
+        )
+        print_step(result, crud_ops, passed)
+        if not passed:
+            break
+        if best is None or result.rps > best.rps:
+            best = result
+        concurrency *= 2
+
+    if best is None:
+        print("\nNingún escalón cumple el SLO; reduce --start-concurrency o relaja el SLO.")
+        return None
+    print_breakdown(best)
+    summary = {
+        "max_rps": round(best.rps, 1),
+        "concurrency": best.concurrency,
+        "workers": workers,
+        "rps_per_worker": round(best.rps / workers, 1),
+        "p95_ms": round(best.percentile(0.95, crud_ops), 1),
+        "slo_p95_ms": args.slo_p95_ms,
+    }
+    print(
+        f"\nMáximo sostenible: {summary['max_rps']:,.0f} req/s con "
+        f"{summary['concurrency']} usuarios → {summary['rps_per_worker']:,.0f} req/s por worker"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", help="URL de un servidor ya en marcha (no se arranca serve.py)")
+    parser.add_argument("--workers", type=int, default=1, help="Workers del servidor")
+    parser.add_argument("--storage", default="memory", choices=["memory", "mongo"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Pesos op=peso separados por comas")
+    parser.add_argument("--ai-latency-ms", type=float, default=800.0)
+    parser.add_argument("--seed-tasks", type=int, default=500)
+    parser.add_argument("--slo-p95-ms", type=float, default=200.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--start-concurrency", type=int, default=4)
+    parser.add_argument("--max-concurrency", type=int, default=1024)
+    parser.add_argument("--step-duration", type=float, default=10.0, help="Segundos medidos por escalón")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos descartados por escalón")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--json", help="Guardar el resumen en este archivo")
+    args = parser.parse_args()
+
+    server = None
+    if args.target:
+        url = urlsplit(args.target)
+        host, port = url.hostname, url.port or 80
+        workers = args.workers
+    else:
+        host, port = "127.0.0.1", args.port
+        # serve.py fuerza un worker con el almacenamiento en memoria
+        workers = args.workers if args.storage == "mongo" else 1
+        server = start_server(args, port)
+    try:
+        summary = asyncio.run(run(args, host, port, workers))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=15)
+    if summary and args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
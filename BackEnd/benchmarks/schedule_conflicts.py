@@ -0,0 +1,82 @@
+"""
+Benchmark de los conflictos de calendario.
+
+Carga N tareas abiertas repartidas en un año (backend en memoria) y mide
+la construcción del índice, GET /tasks/conflicts sobre todo el año y el
+coste de una escritura con su comprobación de conflictos. Si el índice
+comparase las tareas por parejas, multiplicar N por 10 multiplicaría los
+tiempos por 100; la construcción y el año completo crecen de forma lineal
+y la actualización del índice en cada alta no depende de N. Con tantas
+tareas en un año casi todos los días están sobrecargados, así que es el
+peor caso para el listado de tareas implicadas, que sí crece con N.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.schedule_conflicts --tasks 10000,100000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import timedelta
+from typing import List
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import DEFAULT_WORKSPACE
+from app.models.task import TaskCreate
+from app.services import conflict_service, task_service
+from app.services.schedule_index import schedule_index
+from benchmarks.workload import YEAR_START, make_tasks
+
+
+async def run(task_counts: List[int], writes: int):
+    year_end = YEAR_START + timedelta(days=365)
+    rng = random.Random(7)
+    for count in task_counts:
+        database.task_repository = MemoryTaskRepository()
+        await database.task_repository.insert_many(make_tasks(count))
+        schedule_index.invalidate()
+
+        started = time.perf_counter()
+        indexed = len(await schedule_index.get(DEFAULT_WORKSPACE))
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        conflicts = await conflict_service.get_conflicts_service(DEFAULT_WORKSPACE, YEAR_START, year_end)
+        query = time.perf_counter() - started
+
+        write_total = 0.0
+        flagged = 0
+        for i in range(writes):
+            start = YEAR_START + timedelta(minutes=rng.randrange(365 * 24 * 60))
+            task = TaskCreate(
+                title=f"Nueva {i}",
+                description="",
+                startDateTime=start,
+                endDateTime=start + timedelta(hours=rng.randint(1, 72)),
+                estimatedHours=rng.randint(1, 16)
+            )
+            started = time.perf_counter()
+            created = await task_service.create_task_service(DEFAULT_WORKSPACE, task)
+            found = await conflict_service.check_task_conflicts_service(DEFAULT_WORKSPACE, created.id)
+            write_total += time.perf_counter() - started
+            flagged += bool(found)
+
+        print(
+            f"{count:>8} tareas ({indexed} indexadas): construcción {build * 1000:.0f} ms, "
+            f"año completo {query * 1000:.0f} ms ({len(conflicts.conflicts)} ventanas), "
+            f"alta + comprobación {write_total / writes * 1000:.2f} ms "
+            f"({flagged}/{writes} en conflicto)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="10000,100000", help="Números de tareas separados por comas")
+    parser.add_argument("--writes", type=int, default=200, help="Altas con comprobación a medir")
+    args = parser.parse_args()
+    asyncio.run(run([int(n) for n in args.tasks.split(",")], args.writes))
+
+
+if __name__ == "__main__":
+    main()
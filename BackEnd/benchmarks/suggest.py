@@ -0,0 +1,118 @@
+"""
+Benchmark de las sugerencias de títulos.
+
+Carga N tareas con títulos de 2 a 6 palabras tomadas de un vocabulario de
+5000 (backend en memoria) y mide la construcción del índice de títulos,
+su memoria y la latencia de `TitleIndex.search` para prefijos cortos,
+palabras completas, consultas de varias palabras y palabras con erratas.
+Como referencia mide también la búsqueda `search` del listado, que
+recorre la colección con una expresión regular.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.suggest --tasks 10000,100000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable, List
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import DEFAULT_WORKSPACE, TaskQuery
+from app.services import task_service
+from app.services.title_index import TITLE_PROJECTION, TitleIndex
+from benchmarks.workload import make_tasks
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def make_vocabulary(rng: random.Random, size: int = 5000) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def with_typo(word: str, rng: random.Random) -> str:
+    """Intercambia dos letras contiguas o cambia una."""
+    i = rng.randrange(len(word) - 1)
+    if rng.random() < 0.5:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice(LETTERS) + word[i + 1:]
+
+
+def measure(queries: List[str], search: Callable[[str], list]) -> str:
+    times = []
+    found = 0
+    for query in queries:
+        started = time.perf_counter()
+        found += bool(search(query))
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return (
+        f"p50 {statistics.median(times):.3f} ms, p99 {times[int(len(times) * 0.99)]:.3f} ms "
+        f"({found}/{len(queries)} con resultados)"
+    )
+
+
+async def run(task_counts: List[int], queries: int):
+    rng = random.Random(11)
+    vocabulary = make_vocabulary(rng)
+    # Frecuencias de Zipf, como en un texto real
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for count in task_counts:
+        tasks = make_tasks(count)
+        for task in tasks:
+            task["title"] = " ".join(rng.choices(vocabulary, weights, k=rng.randint(2, 6)))
+        database.task_repository = MemoryTaskRepository()
+        await database.task_repository.insert_many(tasks)
+
+        docs = await database.task_repository.scan(TaskQuery(workspace_id=DEFAULT_WORKSPACE), TITLE_PROJECTION)
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = TitleIndex.from_docs(docs)
+        build = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        tracemalloc.stop()
+
+        titles = [task["title"].split() for task in rng.sample(tasks, queries)]
+        cases = {
+            "prefijo de 2 letras": [words[0][:2] for words in titles],
+            "prefijo de 4 letras": [words[0][:4] for words in titles],
+            "palabra completa": [words[0] for words in titles],
+            "dos palabras": [" ".join(words[:2]) for words in titles],
+            "con erratas": [with_typo(max(words, key=len), rng) for words in titles],
+        }
+        print(
+            f"{count:>8} tareas: construcción {build * 1000:.0f} ms, "
+            f"{len(index._words)} palabras, {memory:.1f} MiB"
+        )
+        for name, case in cases.items():
+            print(f"    {name:<20} {measure(case, lambda q: index.search(q, 10))}")
+
+        async def regex_search(query: str):
+            return await task_service.get_all_tasks_service(DEFAULT_WORKSPACE, search=query, limit=10)
+
+        sample = cases["palabra completa"][:20]
+        started = time.perf_counter()
+        for query in sample:
+            await regex_search(query)
+        print(
+            f"    {'search= (regex)':<20} media "
+            f"{(time.perf_counter() - started) / len(sample) * 1000:.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="10000,100000", help="Números de tareas separados por comas")
+    parser.add_argument("--queries", type=int, default=1000, help="Consultas por tipo")
+    args = parser.parse_args()
+    asyncio.run(run([int(n) for n in args.tasks.split(",")], args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark de creación y listado de tareas.
+
+Mide la capa de servicio completa (validación de TaskCreate, preparación del
+documento, conversión a TaskResponse y serialización JSON) sobre el backend
+en memoria, de modo que no depende de MongoDB.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.task_throughput --tasks 20000 --lists 200
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import DEFAULT_WORKSPACE
+from app.models.task import TaskCreate, TaskResponse
+from app.services.task_service import create_task_service, get_all_tasks_service
+
+
+def build_payloads(count: int) -> List[dict]:
+    """Cuerpos JSON como los que envía el frontend."""
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    payloads = []
+    for i in range(count):
+        start = base + timedelta(hours=i)
+        payloads.append({
+            "title": f"Tarea {i}",
+            "description": "Descripción de prueba " * 10,
+            "startDateTime": start.isoformat().replace("+00:00", "Z"),
+            "endDateTime": (start + timedelta(days=2)).isoformat().replace("+00:00", "Z"),
+            "estimatedHours": 4,
+            "subtasks": [
+                {"title": f"Subtarea {j}", "estimatedHours": 1, "completed": j % 2 == 0}
+                for j in range(4)
+            ]
+        })
+    return payloads
+
+
+async def run(tasks: int, lists: int, limit: int):
+    database.task_repository = MemoryTaskRepository()
+    payloads = build_payloads(tasks)
+
+    started = time.perf_counter()
+    for payload in payloads:
+        await create_task_service(DEFAULT_WORKSPACE, TaskCreate.model_validate(payload))
+    elapsed = time.perf_counter() - started
+    print(f"create: {tasks / elapsed:,.0f} tareas/s ({elapsed:.2f} s)")
+
+    adapter = TypeAdapter(List[TaskResponse])
+    started = time.perf_counter()
+    for i in range(lists):
+        page = await get_all_tasks_service(DEFAULT_WORKSPACE, skip=(i * limit) % tasks, limit=limit)
+        adapter.dump_json(page)
+    elapsed = time.perf_counter() - started
+    print(
+        f"list (limit={limit}): {lists / elapsed:,.0f} peticiones/s, "
+        f"{lists * limit / elapsed:,.0f} tareas/s ({elapsed:.2f} s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--lists", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.tasks, args.lists, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark de latencia por espacio de trabajo según el número de espacios.
+
+Carga N espacios con el mismo número de tareas cada uno y mide las consultas
+de un espacio elegido al azar: listado por defecto, listado filtrado y
+conteo. Como los índices empiezan por `workspace_id`, una consulta recorre
+solo su espacio y la latencia crece mucho más despacio que el total de
+tareas: la búsqueda del rango del espacio es logarítmica y los índices más
+grandes caben peor en caché.
+
+Por defecto usa el backend en memoria; con `--backend mongo` usa una base de
+datos de pruebas que se borra al terminar.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.tenant_scaling --tenants 1,10,100,1000 --tasks-per-tenant 100
+    python -m benchmarks.tenant_scaling --backend mongo --mongodb-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+from bson import ObjectId
+
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import TaskQuery, TaskRepository
+
+BENCH_DATABASE = "intellitasker_tenant_bench"
+INSERT_BATCH = 1000
+
+
+def build_documents(workspace_id: str, count: int, base: datetime) -> List[dict]:
+    """Tareas de un espacio con fechas repartidas y un tercio completadas."""
+    documents = []
+    for i in range(count):
+        start = base + timedelta(hours=random.randrange(24 * 60))
+        created = base - timedelta(minutes=random.randrange(60 * 24 * 30))
+        documents.append({
+            "_id": ObjectId(),
+            "workspace_id": workspace_id,
+            "title": f"Tarea {i}",
+            "description": "",
+            "startDateTime": start,
+            "endDateTime": start + timedelta(hours=random.randint(1, 72)),
+            "estimatedHours": 4.0,
+            "completed": i % 3 == 0,
+            "subtasks": [],
+            "created_at": created,
+            "updated_at": created,
+            "version": 1,
+        })
+    return documents
+
+
+async def open_repository(backend: str, mongodb_url: str):
+    """Retorna (repositorio, función de limpieza) para el backend pedido."""
+    if backend == "memory":
+        async def cleanup():
+            pass
+        return MemoryTaskRepository(), cleanup
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.db.mongo_repository import MongoTaskRepository
+
+    client = AsyncIOMotorClient(mongodb_url, serverSelectionTimeoutMS=5000)
+    await client.drop_database(BENCH_DATABASE)
+    repository = MongoTaskRepository(client[BENCH_DATABASE].tasks)
+    await repository.init_indexes()
+
+    async def cleanup():
+        await client.drop_database(BENCH_DATABASE)
+        client.close()
+    return repository, cleanup
+
+
+async def load(repository: TaskRepository, tenants: int, per_tenant: int):
+    base = datetime.now(timezone.utc).replace(microsecond=0)
+    documents = []
+    for t in range(tenants):
+        documents.extend(build_documents(f"tenant-{t}", per_tenant, base))
+    random.shuffle(documents)
+    collection = getattr(repository, "collection", None)
+    if collection is not None:
+        for i in range(0, len(documents), INSERT_BATCH):
+            await collection.insert_many(documents[i:i + INSERT_BATCH], ordered=False)
+    else:
+        for document in documents:
+            await repository.insert(document)
+
+
+async def measure(
+    tenants: int,
+    queries: int,
+    operation: Callable[[str], Awaitable[object]]
+) -> Dict[str, float]:
+    """Latencias en ms de `operation` sobre espacios al azar."""
+    samples = []
+    for _ in range(queries):
+        workspace_id = f"tenant-{random.randrange(tenants)}"
+        started = time.perf_counter()
+        await operation(workspace_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+async def run(backend: str, mongodb_url: str, tenant_counts: List[int], per_tenant: int, queries: int):
+    operations = {
+        "list": lambda ws: repository.find(TaskQuery(workspace_id=ws), limit=50),
+        "list inProgress dueDate": lambda ws: repository.find(
+            TaskQuery(workspace_id=ws, filter_by="inProgress"), sort_by="dueDate", limit=50
+        ),
+        "count": lambda ws: repository.count(TaskQuery(workspace_id=ws)),
+    }
+    print(f"backend={backend}, {per_tenant} tareas por espacio, {queries} consultas por operación")
+    print(f"{'espacios':>9} {'tareas':>9}  " + "  ".join(f"{name:>26}" for name in operations))
+    for tenants in tenant_counts:
+        repository, cleanup = await open_repository(backend, mongodb_url)
+        try:
+            await load(repository, tenants, per_tenant)
+            # Calentamiento: cachés del motor y del intérprete
+            for operation in operations.values():
+                await measure(tenants, min(queries, 20), operation)
+            results = [await measure(tenants, queries, op) for op in operations.values()]
+        finally:
+            await cleanup()
+        print(
+            f"{tenants:>9} {tenants * per_tenant:>9}  "
+            + "  ".join(f"p50 {r['p50']:7.3f} / p95 {r['p95']:7.3f} ms" for r in results)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=("memory", "mongo"), default="memory")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--tenants", default="1,10,100,1000",
+                        help="Números de espacios separados por comas")
+    parser.add_argument("--tasks-per-tenant", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    tenant_counts = [int(n) for n in args.tenants.split(",")]
+    asyncio.run(run(args.backend, args.mongodb_url, tenant_counts, args.tasks_per_tenant, args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de la carga de trabajo por día o semana.
+
+Genera N tareas abiertas repartidas en un año y mide GET /tasks/workload
+sobre todo el año: la lectura del almacenamiento en memoria y el cálculo
+vectorizado por separado, para ver que este último no depende del número
+de intervalos ni recorre las tareas en Python.
+
+Uso (desde BackEnd/):
+    python -m benchmarks.workload --tasks 100000
+    python -m benchmarks.workload --tasks 10000,100000 --bucket week
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+from bson import ObjectId
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import DEFAULT_WORKSPACE
+from app.services import workload_service
+
+YEAR_START = datetime(2026, 1, 1)
+
+
+def make_tasks(count: int) -> List[dict]:
+    rng = random.Random(42)
+    now = datetime(2025, 12, 1)
+    tasks = []
+    for i in range(count):
+        start = YEAR_START + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        end = start + timedelta(hours=rng.randint(1, 24 * 30))
+        subtasks = [
+            {"_id": ObjectId(), "title": f"Paso {j}", "estimatedHours": 2, "completed": j == 0}
+            for j in range(i % 3)
+        ]
+        tasks.append({
+            "_id": ObjectId(),
+            "workspace_id": DEFAULT_WORKSPACE,
+            "title": f"Tarea {i}",
+            "description": "",
+            "startDateTime": start,
+            "endDateTime": end,
+            "estimatedHours": rng.randint(1, 40),
+            "completed": i % 10 == 0,
+            "subtasks": subtasks,
+            "subtaskCount": len(subtasks),
+            "completedSubtaskCount": 1 if subtasks else 0,
+            "version": 1,
+            "created_at": now,
+            "updated_at": now
+        })
+    return tasks
+
+
+async def run(task_counts: List[int], bucket: str, repeat: int):
+    year_end = YEAR_START + timedelta(days=365)
+    for count in task_counts:
+        database.task_repository = MemoryTaskRepository()
+        await database.task_repository.insert_many(make_tasks(count))
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            workload = await workload_service.get_workload_service(
+                DEFAULT_WORKSPACE, YEAR_START, year_end, bucket
+            )
+            timings.append(time.perf_counter() - started)
+
+        # Solo el cálculo con numpy, con las fechas ya convertidas
+        edges = workload_service.bucket_edges(YEAR_START, year_end, bucket)
+        rng = np.random.default_rng(42)
+        starts = rng.uniform(0, 365 * 86400, workload.tasks)
+        ends = starts + rng.uniform(3600, 30 * 86400, workload.tasks)
+        hours = rng.uniform(1, 40, workload.tasks)
+        edge_seconds = np.array([(edge - YEAR_START).total_seconds() for edge in edges])
+        started = time.perf_counter()
+        for _ in range(repeat):
+            workload_service.compute_workload(starts, ends, hours, edge_seconds)
+        compute = (time.perf_counter() - started) / repeat
+
+        print(
+            f"{count:>8} tareas ({workload.tasks} abiertas), {len(workload.buckets)} intervalos "
+            f"de {bucket}: petición {min(timings) * 1000:.0f} ms, cálculo {compute * 1000:.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", default="10000,100000", help="Números de tareas separados por comas")
+    parser.add_argument("--bucket", choices=("day", "week"), default="day")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run([int(n) for n in args.tasks.split(",")], args.bucket, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,23 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.db.database import connect_to_mongo, close_mongo_connection
-from app.services.task_service import init_indexes
+from app.db.database import (
+    connect_storage,
+    close_storage,
+    warm_up_connection,
+    db_settings
+)
+from app.db.bootstrap import bootstrap_database
 from app.api.tasks import router as tasks_router
 from app.api.ai import router as ai_router
+from app.api.debug import router as debug_router
+from app.services.write_behind import task_write_buffer
+from app.services.archive_service import start_archive_job, stop_archive_job
+from app.services.import_service import stop_import_jobs
+from app.services.suggest_service import start_suggest_warmup, stop_suggest_warmup
+from app.middleware.profiling import ProfilingMiddleware, profiling_settings
 
 # Configurar logging
 logging.basicConfig(
@@ -23,20 +35,40 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """
     Gestiona el ciclo de vida de la aplicación.
-    - Al iniciar: conecta a MongoDB e inicializa índices.
-    - Al cerrar: cierra la conexión a MongoDB.
+    - Al iniciar: conecta el almacenamiento, inicializa índices (salvo que serve.py
+      ya lo haya hecho) y precalienta el pool antes de marcarse como listo.
+    - Arranca el archivado periódico de tareas completadas, si está activo,
+      y la precarga de los índices de títulos.
+    - Al cerrar: detiene el archivado, la precarga y las importaciones en curso, escribe
+      los cambios diferidos pendientes y cierra el almacenamiento (guarda el
+      snapshot en memoria).
     """
     # Startup
     logger.info("Iniciando aplicación...")
-    await connect_to_mongo()
-    await init_indexes()
+    app.state.ready = False
+    await connect_storage()
+    if db_settings.init_indexes_on_startup:
+        try:
+            await bootstrap_database()
+        except Exception:
+            # Sin serve.py el worker arranca igual, como antes de bootstrap
+            logger.warning("Aplicación iniciada sin índices ni migraciones aplicados")
+    await warm_up_connection()
+    start_archive_job()
+    start_suggest_warmup()
+    app.state.ready = True
     logger.info("Aplicación iniciada correctamente")
     
     yield
     
     # Shutdown
     logger.info("Cerrando aplicación...")
-    await close_mongo_connection()
+    app.state.ready = False
+    await stop_archive_job()
+    await stop_suggest_warmup()
+    await stop_import_jobs()
+    await task_write_buffer.close()
+    await close_storage()
     logger.info("Aplicación cerrada")
 
 
@@ -59,11 +91,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Profile-Id", "ETag", "Location", "X-Schedule-Conflicts"],
 )
 
+# Perfilado por petición (opcional, ver PROFILING_ENABLED)
+if profiling_settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Incluir routers
 app.include_router(tasks_router)
 app.include_router(ai_router)
+if profiling_settings.profiling_enabled:
+    app.include_router(debug_router)
 
 
 @app.get("/", status_code=200)
@@ -85,3 +124,14 @@ async def health_check():
     """
     return {"status": "healthy"}
 
+
+@app.get("/ready", status_code=200)
+async def readiness_check():
+    """
+    Endpoint de disponibilidad: responde 503 hasta que el worker termina
+    el precalentamiento y mientras se está cerrando.
+    """
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
+
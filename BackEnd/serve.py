@@ -0,0 +1,110 @@
+"""
+Punto de entrada multiproceso para IntelliTasker.
+
+Uso:
+    python serve.py                 # índices una vez + N workers (N = núcleos)
+    python serve.py --workers 4     # número de workers explícito
+    python serve.py bootstrap       # solo aplica índices y migraciones
+    python serve.py archive         # una pasada de archivado (p. ej. desde cron)
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+import uvicorn
+from pydantic_settings import BaseSettings
+from pydantic import ConfigDict
+
+from app.db import database
+from app.db.bootstrap import bootstrap_database
+from app.services.archive_service import archive_completed_tasks_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+class ServerSettings(BaseSettings):
+    """Configuración del servidor."""
+    model_config = ConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore"  # Ignorar campos extra del .env
+    )
+
+    host: str = "0.0.0.0"
+    port: int = 8000
+    # 0 = derivar de los núcleos disponibles
+    workers: int = 0
+
+
+def default_worker_count() -> int:
+    """
+    Calcula el número de workers a partir de los núcleos disponibles
+    para este proceso.
+    """
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(1, cores)
+
+
+async def run_bootstrap():
+    """Conecta, aplica índices y migraciones, y cierra la conexión."""
+    await database.connect_storage()
+    try:
+        await bootstrap_database()
+    finally:
+        await database.close_storage()
+
+
+async def run_archive():
+    """Conecta, ejecuta una pasada de archivado y cierra la conexión."""
+    await database.connect_storage()
+    try:
+        await archive_completed_tasks_service()
+    finally:
+        await database.close_storage()
+
+
+def main():
+    settings = ServerSettings()
+    parser = argparse.ArgumentParser(description="Servidor de IntelliTasker")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "bootstrap", "archive"])
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers)
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        asyncio.run(run_archive())
+        return
+    if database.db_settings.storage_backend == "mongo":
+        try:
+            asyncio.run(run_bootstrap())
+        except Exception as e:
+            # Sin índices ni migraciones no se arrancan los workers
+            logger.error(f"Inicialización de la base de datos fallida: {e}")
+            sys.exit(1)
+    if args.command == "bootstrap":
+        return
+
+    workers = args.workers or default_worker_count()
+    if database.db_settings.storage_backend != "mongo" and workers > 1:
+        # Cada worker tendría su propia copia de las tareas
+        logger.warning("El almacenamiento en memoria solo admite un worker")
+        workers = 1
+    # Los workers heredan el entorno: reparten el pool y omiten los índices
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    os.environ["INIT_INDEXES_ON_STARTUP"] = "false"
+    logger.info(f"Iniciando {workers} workers en {args.host}:{args.port}")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Fixtures comunes de las pruebas.
+
+Las pruebas asíncronas usan el plugin de pytest de anyio (incluido con
+FastAPI). Las del repositorio se ejecutan contra los dos backends; las de
+MongoDB necesitan un servidor en MONGODB_TEST_URL y se omiten si no está
+definida. Cada ejecución usa una base de datos propia que se borra al
+terminar.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from bson import ObjectId
+
+from app.db import database
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.mongo_repository import MongoTaskRepository
+from app.services import task_service
+from app.services.dependency_graph import dependency_index
+from app.services.schedule_index import schedule_index
+from app.services.title_index import title_index
+
+WORKSPACE = "ws"
+OTHER_WORKSPACE = "other"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=["memory", "mongo"])
+async def repository(request):
+    """Repositorio vacío de cada backend."""
+    if request.param == "memory":
+        yield MemoryTaskRepository()
+        return
+
+    url = os.environ.get("MONGODB_TEST_URL")
+    if not url:
+        pytest.skip("MONGODB_TEST_URL no definida")
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=2000)
+    name = f"intellitasker_test_{uuid4().hex[:12]}"
+    db = client[name]
+    repo = MongoTaskRepository(db.tasks, archive=db.tasks_archive)
+    await repo.init_indexes()
+    await repo.init_archive()
+    try:
+        yield repo
+    finally:
+        await client.drop_database(name)
+        client.close()
+
+
+def make_task(
+    title: str,
+    start: datetime,
+    end: datetime,
+    hours: float,
+    created_at: datetime,
+    workspace_id: str = WORKSPACE,
+    description: str = "",
+    completed: bool = False,
+    subtasks=(),
+    updated_at: datetime = None
+) -> dict:
+    """Documento de tarea como lo prepara `task_service`."""
+    return {
+        "_id": ObjectId(),
+        "workspace_id": workspace_id,
+        "title": title,
+        "description": description,
+        "startDateTime": start,
+        "endDateTime": end,
+        "estimatedHours": hours,
+        "completed": completed,
+        "subtasks": [
+            {"_id": ObjectId(), "title": f"{title} {i}", "estimatedHours": h, "completed": done}
+            for i, (h, done) in enumerate(subtasks)
+        ],
+        "dependsOn": [],
+        "created_at": created_at,
+        "updated_at": updated_at or created_at,
+        "version": 1
+    }
+
+
+@pytest.fixture
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def sample_tasks(now):
+    """
+    Tareas de WORKSPACE con títulos, fechas de creación, fines y horas
+    distintos (los órdenes no tienen empates) y una de OTHER_WORKSPACE.
+    """
+    hour = timedelta(hours=1)
+    day = timedelta(days=1)
+    created = [now - timedelta(minutes=60 - i) for i in range(7)]
+    return [
+        make_task(
+            "Alpha report", now - 10 * day, now - 9 * day, 3, created[0],
+            description="quarterly numbers", completed=True,
+            subtasks=[(2, True), (1, False)], updated_at=now - 10 * day
+        ),
+        make_task(
+            "beta review", now - 2 * day, now - hour, 5, created[1],
+            description="Check the REPORT", subtasks=[(1.5, True)]
+        ),
+        make_task("Gamma launch", now - hour / 2, now + hour / 2, 1.5, created[2]),
+        make_task("Delta plan", now - 3 * day, now + 3 * day, 8, created[3]),
+        make_task("Epsilon sync", now + 5 * day, now + 6 * day, 2, created[4], completed=True),
+        make_task(
+            "zeta notes", now + day, now + 2 * day, 0.5, created[5],
+            description="alpha mention"
+        ),
+        make_task(
+            "Alpha other", now - 4 * day, now + 4 * day, 4, created[6],
+            workspace_id=OTHER_WORKSPACE
+        ),
+    ]
+
+
+@pytest.fixture
+async def seeded(repository, sample_tasks):
+    """Repositorio con `sample_tasks` insertadas."""
+    assert await repository.insert_many([dict(task) for task in sample_tasks]) == len(sample_tasks)
+    return repository
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    """
+    Backend en memoria instalado como almacenamiento de los servicios, con
+    los índices en memoria y la caché de totales vacíos.
+    """
+    registries = (schedule_index, dependency_index, title_index)
+    repo = MemoryTaskRepository()
+    monkeypatch.setattr(database, "task_repository", repo)
+    for registry in registries:
+        registry.invalidate()
+    task_service._count_cache.clear()
+    yield repo
+    for registry in registries:
+        registry.invalidate()
+    task_service._count_cache.clear()
+
+
+@pytest.fixture
+def client(storage):
+    """Cliente HTTP de la API sobre `storage`, sin el ciclo de vida de la aplicación."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    return TestClient(app, headers={"X-Workspace-Id": WORKSPACE})
@@ -0,0 +1,49 @@
+"""
+Pruebas del servicio de IA con el modelo de Gemini sustituido.
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.ai import AITaskRequest
+from app.services import ai_service
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeModel:
+    """Modelo que registra el hilo en el que se le llama."""
+    threads = []
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def generate_content(self, prompt: str):
+        FakeModel.threads.append(threading.current_thread())
+        start = datetime.now() + timedelta(days=2)
+        text = json.dumps({
+            "title": "Informe",
+            "description": "Redactar el informe",
+            "startDateTime": start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "endDateTime": (start + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "estimatedHours": 3,
+            "subtasks": [{"title": "Borrador", "estimatedHours": 3}]
+        })
+        return type("Response", (), {"text": f"```json\n{text}\n```"})()
+
+
+async def test_gemini_call_runs_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(ai_service.settings, "ai_backend", "gemini")
+    monkeypatch.setattr(ai_service.settings, "gemini_api_key", "key")
+    monkeypatch.setattr(ai_service.genai, "GenerativeModel", FakeModel)
+    FakeModel.threads.clear()
+
+    response = await ai_service.generate_task_with_ai(AITaskRequest(title="Informe"))
+
+    assert response is not None
+    assert response.estimatedHours == 3
+    assert [subtask["title"] for subtask in response.subtasks] == ["Borrador"]
+    assert len(FakeModel.threads) == 1
+    assert FakeModel.threads[0] is not threading.current_thread()
@@ -0,0 +1,27 @@
+"""
+Pruebas del archivado de tareas completadas.
+"""
+from datetime import timedelta
+
+import pytest
+
+from app.services import archive_service, task_service
+from app.services.title_index import title_index
+from tests.conftest import WORKSPACE, make_task
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_archive_pass_clears_counts_and_indexes(storage, now, monkeypatch):
+    monkeypatch.setattr(archive_service.archive_settings, "archive_after_days", 1)
+    old = now - timedelta(days=10)
+    await storage.insert_many([
+        make_task("Informe antiguo", old, old + timedelta(days=1), 2, old, completed=True),
+        make_task("Informe nuevo", now, now + timedelta(days=1), 2, now),
+    ])
+    assert await task_service.count_tasks_service(WORKSPACE) == 2
+    assert len((await title_index.get(WORKSPACE)).search("informe", 10)) == 2
+
+    assert await archive_service.archive_completed_tasks_service() == 1
+    assert await task_service.count_tasks_service(WORKSPACE) == 1
+    assert [s.title for s in (await title_index.get(WORKSPACE)).search("informe", 10)] == ["Informe nuevo"]
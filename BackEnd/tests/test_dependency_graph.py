@@ -0,0 +1,115 @@
+"""
+Pruebas aleatorias del grafo de dependencias frente a un CPM y una búsqueda
+de ciclos por fuerza bruta.
+"""
+import random
+from functools import lru_cache
+
+import pytest
+
+from app.services.dependency_graph import DependencyGraph
+
+TASKS = 40
+
+
+def brute_force_cpm(docs: dict):
+    """(head, tail, duración del proyecto) recorriendo el grafo completo."""
+    preds = {
+        task_id: [p for p in doc["dependsOn"] if p in docs] for task_id, doc in docs.items()
+    }
+    succs = {task_id: [] for task_id in docs}
+    for task_id, task_preds in preds.items():
+        for pred in task_preds:
+            succs[pred].append(task_id)
+
+    def duration(task_id):
+        doc = docs[task_id]
+        return 0.0 if doc["completed"] else doc["estimatedHours"]
+
+    @lru_cache(maxsize=None)
+    def head(task_id):
+        return max((head(p) + duration(p) for p in preds[task_id]), default=0.0)
+
+    @lru_cache(maxsize=None)
+    def tail(task_id):
+        return duration(task_id) + max((tail(s) for s in succs[task_id]), default=0.0)
+
+    heads = {task_id: head(task_id) for task_id in docs}
+    tails = {task_id: tail(task_id) for task_id in docs}
+    project = max((heads[t] + duration(t) for t in docs), default=0.0)
+    return heads, tails, project
+
+
+def depends_on(docs: dict, task_id: str, target: str) -> bool:
+    """True si `task_id` depende, directa o indirectamente, de `target`."""
+    seen, stack = set(), [task_id]
+    while stack:
+        current = stack.pop()
+        for pred in docs[current]["dependsOn"] if current in docs else []:
+            if pred == target:
+                return True
+            if pred not in seen:
+                seen.add(pred)
+                stack.append(pred)
+    return False
+
+
+def assert_matches_brute_force(graph: DependencyGraph, docs: dict):
+    heads, tails, project = brute_force_cpm(docs)
+    assert set(graph.nodes) == set(docs)
+    assert graph.project_hours == pytest.approx(project)
+    for task_id, node in graph.nodes.items():
+        assert node.head == pytest.approx(heads[task_id])
+        assert node.tail == pytest.approx(tails[task_id])
+        timing = graph.timing(task_id, graph.project_hours)
+        assert timing["slack"] == pytest.approx(max(project - tails[task_id] - heads[task_id], 0.0), abs=1e-9)
+        # Los rangos respetan el orden topológico
+        for pred in node.preds:
+            if pred in graph.nodes:
+                assert graph.nodes[pred].rank < node.rank
+
+
+def assert_valid_cycle(cycle: list, task_id: str, new_preds: list, docs: dict):
+    assert cycle[0] == cycle[-1] == task_id
+    for current, pred in zip(cycle, cycle[1:]):
+        if current == task_id:
+            assert pred in new_preds
+        else:
+            assert pred in docs[current]["dependsOn"]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_graph_matches_brute_force(seed):
+    rng = random.Random(seed)
+    graph = DependencyGraph()
+    docs = {}
+    cycles = 0
+    for step in range(400):
+        task_id = f"t{rng.randrange(TASKS)}"
+        if docs and rng.random() < 0.15:
+            graph.remove(task_id)
+            docs.pop(task_id, None)
+            continue
+        # Algunas dependencias apuntan a tareas que aún no existen
+        preds = rng.sample([f"t{i}" for i in range(TASKS + 5)], rng.randint(0, 3))
+        cycle = graph.find_cycle(task_id, preds)
+        creates_cycle = task_id in preds or any(depends_on(docs, p, task_id) for p in preds)
+        assert (cycle is not None) == creates_cycle
+        if cycle is not None:
+            assert_valid_cycle(cycle, task_id, preds, docs)
+            cycles += 1
+            continue
+        doc = {
+            "_id": task_id,
+            "title": task_id,
+            "estimatedHours": rng.choice([0.5, 1, 2, 3, 5, 8]),
+            "completed": rng.random() < 0.15,
+            "dependsOn": preds,
+        }
+        graph.put(task_id, doc)
+        docs[task_id] = doc
+        if step % 20 == 0:
+            assert_matches_brute_force(graph, docs)
+    assert cycles > 0
+    assert_matches_brute_force(graph, docs)
+    assert_matches_brute_force(DependencyGraph.from_docs(list(docs.values())), docs)
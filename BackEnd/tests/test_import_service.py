@@ -0,0 +1,57 @@
+"""
+Pruebas de la importación masiva de tareas.
+"""
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.db.repository import TaskQuery
+from app.services import import_service
+from tests.conftest import WORKSPACE
+
+pytestmark = pytest.mark.anyio
+
+CSV = (
+    "title,startDateTime,endDateTime,estimatedHours,completed\n"
+    "Uno,2025-01-20T09:00:00Z,2025-01-21T09:00:00Z,2,false\n"
+    "Fechas al revés,2025-01-21T09:00:00Z,2025-01-20T09:00:00Z,2,false\n"
+    "Dos,2025-01-20T09:00:00Z,2025-01-22T09:00:00Z,3,true\n"
+    ",2025-01-20T09:00:00Z,2025-01-22T09:00:00Z,3,false\n"
+    "Tres,2025-01-20T09:00:00Z,2025-01-23T09:00:00Z,1.5,false\n"
+)
+
+
+def rows(text: str):
+    return import_service._csv_rows(io.StringIO(text))
+
+
+def test_next_batch_returns_rejections_without_a_job(monkeypatch):
+    monkeypatch.setattr(import_service.import_settings, "import_batch_size", 3)
+    batch = rows(CSV)
+    documents, rejections, read = import_service._next_batch(batch, WORKSPACE)
+    assert [doc["title"] for doc in documents] == ["Uno", "Dos"]
+    assert all(doc["workspace_id"] == WORKSPACE for doc in documents)
+    assert [line for line, _ in rejections] == [3]
+    assert read == 3
+
+    documents, rejections, read = import_service._next_batch(batch, WORKSPACE)
+    assert [doc["title"] for doc in documents] == ["Tres"]
+    assert [line for line, _ in rejections] == [5]
+    assert read == 2
+
+
+async def test_import_job_counts(storage, monkeypatch, tmp_path):
+    monkeypatch.setattr(import_service.import_settings, "import_batch_size", 2)
+    monkeypatch.setattr(import_service.import_settings, "import_tmp_dir", str(tmp_path))
+    upload = UploadFile(io.BytesIO(CSV.encode()), filename="tareas.csv")
+
+    response = await import_service.start_import_service(WORKSPACE, upload, "csv")
+    job = import_service._jobs[response.id]
+    await job.task
+
+    assert job.status == "completed"
+    assert (job.processed, job.imported, job.failed) == (5, 3, 2)
+    assert [error["line"] for error in job.errors] == [3, 5]
+    assert job.processed_bytes == job.total_bytes == len(CSV.encode())
+    assert await storage.count(TaskQuery(WORKSPACE)) == 3
@@ -0,0 +1,40 @@
+"""
+Pruebas del almacén de perfiles.
+"""
+from app.middleware.profiling import ProfileStore
+
+
+def summary(profile_id: str, duration_ms: float) -> dict:
+    return {"id": profile_id, "duration_ms": duration_ms}
+
+
+def test_keeps_the_slowest_profiles():
+    store = ProfileStore("profiles", keep=2, keep_explicit=0)
+    assert store.add(summary("a", 10), explicit=False) == []
+    assert store.add(summary("b", 30), explicit=False) == []
+    assert store.add(summary("c", 20), explicit=False) == ["a"]
+    # Más rápido que todos: sale en cuanto entra
+    assert store.add(summary("d", 5), explicit=False) == ["d"]
+    assert [p["id"] for p in store.slowest()] == ["b", "c"]
+
+
+def test_explicit_profiles_are_bounded():
+    store = ProfileStore("profiles", keep=1, keep_explicit=2)
+    store.add(summary("slow", 100), explicit=False)
+    # Fuera del ranking, pero se conservan como explícitos
+    assert store.add(summary("e1", 1), explicit=True) == []
+    assert store.add(summary("e2", 2), explicit=True) == []
+    # El explícito más antiguo se descarta al superar el límite
+    assert store.add(summary("e3", 3), explicit=True) == ["e1"]
+    assert store.add(summary("e4", 4), explicit=True) == ["e2"]
+
+
+def test_explicit_profile_in_ranking_is_not_removed_twice():
+    store = ProfileStore("profiles", keep=2, keep_explicit=1)
+    store.add(summary("e1", 50), explicit=True)
+    # e1 sigue en el ranking al dejar de ser uno de los explícitos recientes
+    assert store.add(summary("e2", 1), explicit=True) == []
+    assert [p["id"] for p in store.slowest()] == ["e1", "e2"]
+    # Al salir del ranking ya no está protegido
+    assert store.add(summary("x", 60), explicit=False) == []
+    assert store.add(summary("y", 70), explicit=False) == ["e1"]
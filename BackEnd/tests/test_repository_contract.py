@@ -0,0 +1,371 @@
+"""
+Contrato de `TaskRepository`: los dos backends deben devolver lo mismo para
+las mismas operaciones. Los resultados esperados se calculan en Python a
+partir de `sample_tasks` con la semántica de MongoDB.
+"""
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.db.memory_repository import MemoryTaskRepository
+from app.db.repository import (
+    SORT_OPTIONS,
+    TaskProjection,
+    TaskQuery,
+    UpdateGuard,
+    today_bounds
+)
+from app.utils.dates import to_stored
+from tests.conftest import OTHER_WORKSPACE, WORKSPACE, make_task
+
+pytestmark = pytest.mark.anyio
+
+
+def own(tasks):
+    return [task for task in tasks if task["workspace_id"] == WORKSPACE]
+
+
+def ids(docs):
+    return [doc["_id"] for doc in docs]
+
+
+def sorted_ids(tasks, sort_by=None):
+    key, direction = SORT_OPTIONS.get(sort_by, SORT_OPTIONS["recent"])
+    return ids(sorted(tasks, key=lambda task: task[key], reverse=direction < 0))
+
+
+def matches_filter(task, filter_by, now):
+    today_start, today_end = today_bounds(now)
+    start, end = task["startDateTime"], task["endDateTime"]
+    if filter_by == "completed":
+        return task["completed"]
+    if filter_by == "inProgress":
+        return not task["completed"]
+    if filter_by == "overdue":
+        return end < now
+    if filter_by == "today":
+        return (
+            today_start <= start <= today_end
+            or today_start <= end <= today_end
+            or (start < today_start and end > today_end)
+        )
+    return True
+
+
+# Lecturas
+
+async def test_insert_returns_stored_document(repository, now):
+    task = make_task("Stored", now, now + timedelta(hours=1), 1, now)
+    task.pop("_id")
+    stored = await repository.insert(task)
+    assert isinstance(stored["_id"], ObjectId)
+    # Fechas en UTC sin zona y truncadas a milisegundos, como las devuelve MongoDB
+    assert stored["startDateTime"] == to_stored(now)
+    assert stored["startDateTime"].tzinfo is None
+    assert stored["created_at"].microsecond % 1000 == 0
+    assert await repository.get(WORKSPACE, stored["_id"]) == stored
+
+
+async def test_get_is_scoped_to_workspace(seeded, sample_tasks):
+    task = sample_tasks[0]
+    doc = await seeded.get(WORKSPACE, task["_id"])
+    assert doc["title"] == task["title"]
+    assert doc["version"] == 1
+    assert [st["estimatedHours"] for st in doc["subtasks"]] == [2, 1]
+    assert await seeded.get(OTHER_WORKSPACE, task["_id"]) is None
+    assert await seeded.get(WORKSPACE, ObjectId()) is None
+
+
+@pytest.mark.parametrize("sort_by", [None, *SORT_OPTIONS, "progress"])
+async def test_find_sort_options(seeded, sample_tasks, sort_by):
+    # 'progress' se ordena en el servicio; el backend usa el orden por defecto
+    docs = await seeded.find(TaskQuery(WORKSPACE), sort_by=sort_by)
+    assert ids(docs) == sorted_ids(own(sample_tasks), sort_by)
+
+
+@pytest.mark.parametrize("filter_by", [None, "all", "completed", "inProgress", "overdue", "today"])
+async def test_find_and_count_filters(seeded, sample_tasks, now, filter_by):
+    query = TaskQuery(WORKSPACE, filter_by=filter_by)
+    expected = [task for task in own(sample_tasks) if matches_filter(task, filter_by, now)]
+    assert ids(await seeded.find(query)) == sorted_ids(expected)
+    assert await seeded.count(query) == len(expected)
+
+
+@pytest.mark.parametrize("completed", [True, False])
+async def test_find_completed_flag(seeded, sample_tasks, completed):
+    query = TaskQuery(WORKSPACE, completed=completed)
+    expected = [task for task in own(sample_tasks) if task["completed"] == completed]
+    assert ids(await seeded.find(query)) == sorted_ids(expected)
+    assert await seeded.count(query) == len(expected)
+
+
+@pytest.mark.parametrize("search, titles", [
+    # Sin distinguir mayúsculas, en título y descripción
+    ("report", {"Alpha report", "beta review"}),
+    ("ALPHA", {"Alpha report", "zeta notes"}),
+    # Es una expresión regular
+    ("^beta", {"beta review"}),
+    ("  plan  ", {"Delta plan"}),
+    ("missing", set()),
+])
+async def test_find_and_count_search(seeded, search, titles):
+    query = TaskQuery(WORKSPACE, search=search)
+    docs = await seeded.find(query)
+    assert {doc["title"] for doc in docs} == titles
+    assert await seeded.count(query) == len(titles)
+
+
+async def test_search_combined_with_today(seeded, sample_tasks, now):
+    query = TaskQuery(WORKSPACE, filter_by="today", search="a")
+    expected = [
+        task for task in own(sample_tasks)
+        if matches_filter(task, "today", now) and "a" in (task["title"] + task["description"]).lower()
+    ]
+    assert ids(await seeded.find(query)) == sorted_ids(expected)
+    assert await seeded.count(query) == len(expected)
+
+
+async def test_find_window(seeded, sample_tasks, now):
+    window = (now, now + timedelta(days=1, hours=12))
+    query = TaskQuery(WORKSPACE, window=window)
+    expected = [
+        task for task in own(sample_tasks)
+        if task["startDateTime"] < window[1] and task["endDateTime"] > window[0]
+    ]
+    assert ids(await seeded.find(query, sort_by="dueDate")) == sorted_ids(expected, "dueDate")
+    assert await seeded.count(query) == len(expected)
+
+
+async def test_find_pagination(seeded, sample_tasks):
+    expected = sorted_ids(own(sample_tasks), "title")
+    docs = await seeded.find(TaskQuery(WORKSPACE), sort_by="title", skip=2, limit=2)
+    assert ids(docs) == expected[2:4]
+    assert await seeded.find(TaskQuery(WORKSPACE), skip=len(expected)) == []
+
+
+async def test_unfiltered_count_is_per_workspace(seeded, sample_tasks):
+    assert await seeded.count(TaskQuery(WORKSPACE)) == len(own(sample_tasks))
+    assert await seeded.count(TaskQuery(OTHER_WORKSPACE)) == 1
+    assert await seeded.count(TaskQuery("empty")) == 0
+
+
+# Proyecciones
+
+async def test_projection_fields(seeded, sample_tasks):
+    projection = TaskProjection(fields=frozenset({"title", "completed"}))
+    docs = await seeded.find(TaskQuery(WORKSPACE), projection=projection)
+    assert docs == [
+        {"_id": task["_id"], "title": task["title"], "completed": task["completed"]}
+        for task in sorted(own(sample_tasks), key=lambda t: t["created_at"], reverse=True)
+    ]
+
+
+async def test_projection_subtask_counts_and_hours(seeded, sample_tasks):
+    projection = TaskProjection(
+        fields=frozenset({"title"}),
+        subtask_counts=True,
+        completed_subtask_hours=True
+    )
+    docs = {doc["_id"]: doc for doc in await seeded.find(TaskQuery(WORKSPACE), projection=projection)}
+    for task in own(sample_tasks):
+        doc = docs[task["_id"]]
+        assert set(doc) == {
+            "_id", "title", "subtaskCount", "completedSubtaskCount", "completedSubtaskHours"
+        }
+        done = [st for st in task["subtasks"] if st["completed"]]
+        assert doc["subtaskCount"] == len(task["subtasks"])
+        assert doc["completedSubtaskCount"] == len(done)
+        assert doc["completedSubtaskHours"] == sum(st["estimatedHours"] for st in done)
+
+
+async def test_scan_returns_projected_matches(seeded, sample_tasks):
+    projection = TaskProjection(fields=frozenset({"estimatedHours"}))
+    docs = await seeded.scan(TaskQuery(WORKSPACE, completed=False), projection)
+    expected = {
+        task["_id"]: {"_id": task["_id"], "estimatedHours": task["estimatedHours"]}
+        for task in own(sample_tasks) if not task["completed"]
+    }
+    assert {doc["_id"]: doc for doc in docs} == expected
+
+
+async def test_workspace_ids_by_recent_activity(seeded, sample_tasks, now):
+    # La tarea de OTHER_WORKSPACE es la última creada
+    assert await seeded.workspace_ids(10) == [OTHER_WORKSPACE, WORKSPACE]
+    assert await seeded.workspace_ids(1) == [OTHER_WORKSPACE]
+    await seeded.update(WORKSPACE, sample_tasks[0]["_id"], {"updated_at": now})
+    assert await seeded.workspace_ids(10) == [WORKSPACE, OTHER_WORKSPACE]
+
+
+# Escrituras
+
+async def test_update_sets_fields_and_increments_version(seeded, sample_tasks):
+    task = sample_tasks[1]
+    updated = await seeded.update(WORKSPACE, task["_id"], {"title": "beta final"})
+    assert updated["title"] == "beta final"
+    assert updated["description"] == task["description"]
+    assert updated["version"] == 2
+    assert await seeded.get(WORKSPACE, task["_id"]) == updated
+    assert await seeded.update(OTHER_WORKSPACE, task["_id"], {"title": "x"}) is None
+
+
+async def test_update_version_guard(seeded, sample_tasks):
+    task = sample_tasks[1]
+    assert await seeded.update(WORKSPACE, task["_id"], {"title": "x"}, UpdateGuard(version=7)) is None
+    assert (await seeded.get(WORKSPACE, task["_id"]))["title"] == task["title"]
+    updated = await seeded.update(WORKSPACE, task["_id"], {"title": "x"}, UpdateGuard(version=1))
+    assert updated["version"] == 2
+    # La misma versión ya no sirve
+    assert await seeded.update(WORKSPACE, task["_id"], {"title": "y"}, UpdateGuard(version=1)) is None
+
+
+async def test_update_guard_version_zero_matches_legacy_tasks(repository, now):
+    task = make_task("Legacy", now, now + timedelta(hours=1), 1, now)
+    del task["version"]
+    await repository.insert_many([task])
+    updated = await repository.update(WORKSPACE, task["_id"], {"completed": True}, UpdateGuard(version=0))
+    assert updated["version"] == 1
+
+
+async def test_update_date_guards(seeded, sample_tasks, now):
+    task = sample_tasks[3]
+    start, end = task["startDateTime"], task["endDateTime"]
+    # Cambiar solo el fin: el inicio guardado debe ser anterior
+    assert await seeded.update(
+        WORKSPACE, task["_id"], {"endDateTime": start}, UpdateGuard(start_before=start)
+    ) is None
+    new_end = end + timedelta(days=1)
+    assert await seeded.update(
+        WORKSPACE, task["_id"], {"endDateTime": new_end}, UpdateGuard(start_before=new_end)
+    ) is not None
+    # Cambiar solo el inicio: el fin guardado debe ser posterior
+    assert await seeded.update(
+        WORKSPACE, task["_id"], {"startDateTime": new_end}, UpdateGuard(end_after=new_end)
+    ) is None
+    assert await seeded.update(
+        WORKSPACE, task["_id"], {"startDateTime": now}, UpdateGuard(end_after=now)
+    ) is not None
+
+
+async def test_bulk_update(seeded, sample_tasks):
+    first, second = sample_tasks[1], sample_tasks[2]
+    missing = (WORKSPACE, ObjectId())
+    missed = await seeded.bulk_update({
+        (WORKSPACE, first["_id"]): ({"completed": True}, 1, 3),
+        (WORKSPACE, second["_id"]): ({"subtasks": []}, 1, 1),
+        # No se aplican: otro espacio y una tarea que no existe
+        (OTHER_WORKSPACE, first["_id"]): ({"title": "x"}, 1, 1),
+        missing: ({"completed": True}, 1, 1),
+    })
+    assert sorted(missed, key=str) == sorted([(OTHER_WORKSPACE, first["_id"]), missing], key=str)
+    doc = await seeded.get(WORKSPACE, first["_id"])
+    assert doc["completed"] is True
+    assert doc["title"] == first["title"]
+    assert doc["version"] == 4
+    assert (await seeded.get(WORKSPACE, second["_id"]))["version"] == 2
+    assert await seeded.count(TaskQuery(WORKSPACE)) == len(own(sample_tasks))
+
+
+async def test_bulk_update_requires_the_read_version(seeded, sample_tasks):
+    first, second = sample_tasks[1], sample_tasks[2]
+    # Otro proceso escribió `first` después de leerla en la versión 1
+    await seeded.update(WORKSPACE, first["_id"], {"title": "newer"})
+    missed = await seeded.bulk_update({
+        (WORKSPACE, first["_id"]): ({"completed": True}, 1, 1),
+        (WORKSPACE, second["_id"]): ({"completed": True}, 1, 1),
+    })
+    assert missed == [(WORKSPACE, first["_id"])]
+    doc = await seeded.get(WORKSPACE, first["_id"])
+    assert (doc["title"], doc["completed"], doc["version"]) == ("newer", False, 2)
+    assert (await seeded.get(WORKSPACE, second["_id"]))["completed"] is True
+
+
+async def test_delete(seeded, sample_tasks):
+    task = sample_tasks[2]
+    assert await seeded.delete(OTHER_WORKSPACE, task["_id"]) is False
+    assert await seeded.delete(WORKSPACE, task["_id"]) is True
+    assert await seeded.delete(WORKSPACE, task["_id"]) is False
+    assert await seeded.get(WORKSPACE, task["_id"]) is None
+    assert await seeded.count(TaskQuery(WORKSPACE)) == len(own(sample_tasks)) - 1
+
+
+# Archivo
+
+async def test_archive_and_include_archived(seeded, sample_tasks, now):
+    archived, recent = sample_tasks[0], sample_tasks[4]
+    # Solo las completadas sin cambios desde antes del corte
+    assert await seeded.archive_completed(now - timedelta(days=1), 10) == 1
+    assert await seeded.archive_completed(now - timedelta(days=1), 10) == 0
+
+    active = own(sample_tasks)[1:]
+    assert ids(await seeded.find(TaskQuery(WORKSPACE))) == sorted_ids(active)
+    assert await seeded.count(TaskQuery(WORKSPACE)) == len(active)
+    assert await seeded.get(WORKSPACE, archived["_id"]) is None
+
+    doc = await seeded.get(WORKSPACE, archived["_id"], include_archived=True)
+    assert doc["archived"] is True
+    assert "archived" not in await seeded.get(WORKSPACE, recent["_id"], include_archived=True)
+
+    for sort_by in SORT_OPTIONS:
+        query = TaskQuery(WORKSPACE, include_archived=True)
+        docs = await seeded.find(query, sort_by=sort_by)
+        assert ids(docs) == sorted_ids(own(sample_tasks), sort_by)
+        assert [doc.get("archived", False) for doc in docs] == [
+            doc["_id"] == archived["_id"] for doc in docs
+        ]
+
+    query = TaskQuery(WORKSPACE, completed=True, include_archived=True)
+    assert await seeded.count(query) == 2
+    projection = TaskProjection(fields=frozenset({"title"}))
+    docs = await seeded.find(query, sort_by="oldest", skip=0, limit=1, projection=projection)
+    assert docs == [{"_id": archived["_id"], "title": archived["title"], "archived": True}]
+    docs = await seeded.find(query, sort_by="oldest", skip=1, limit=5, projection=projection)
+    assert docs == [{"_id": recent["_id"], "title": recent["title"]}]
+
+
+async def test_include_archived_pages(seeded, sample_tasks, now):
+    # Alpha report y Epsilon sync, intercaladas con las activas en cada orden
+    assert await seeded.archive_completed(now + timedelta(days=1), 10) == 2
+    query = TaskQuery(WORKSPACE, include_archived=True)
+    for sort_by in SORT_OPTIONS:
+        pages = [
+            await seeded.find(query, sort_by=sort_by, skip=skip, limit=2)
+            for skip in range(0, 8, 2)
+        ]
+        assert [ids(page) for page in pages] == [
+            sorted_ids(own(sample_tasks), sort_by)[skip:skip + 2] for skip in range(0, 8, 2)
+        ]
+
+
+async def test_delete_archived_task(seeded, sample_tasks, now, tmp_path):
+    archived = sample_tasks[0]
+    assert await seeded.archive_completed(now - timedelta(days=1), 10) == 1
+    memory = isinstance(seeded, MemoryTaskRepository)
+    if memory:
+        # El snapshot ya guardado contiene la tarea archivada
+        seeded.snapshot_path = str(tmp_path / "tasks.bson")
+        await seeded.snapshot()
+    assert await seeded.delete(OTHER_WORKSPACE, archived["_id"]) is False
+    assert await seeded.delete(WORKSPACE, archived["_id"]) is True
+    assert await seeded.delete(WORKSPACE, archived["_id"]) is False
+    assert await seeded.get(WORKSPACE, archived["_id"], include_archived=True) is None
+    assert await seeded.count(TaskQuery(WORKSPACE, include_archived=True)) == len(own(sample_tasks)) - 1
+    if memory:
+        await seeded.close()
+        reopened = MemoryTaskRepository(snapshot_path=seeded.snapshot_path)
+        await reopened.open()
+        assert await reopened.get(WORKSPACE, archived["_id"], include_archived=True) is None
+
+
+async def test_remove_dependency(seeded, sample_tasks):
+    target, dependent, other = sample_tasks[2]["_id"], sample_tasks[3], sample_tasks[6]
+    kept = ObjectId()
+    await seeded.update(WORKSPACE, dependent["_id"], {"dependsOn": [target, kept]})
+    await seeded.update(OTHER_WORKSPACE, other["_id"], {"dependsOn": [target]})
+    assert await seeded.remove_dependency(WORKSPACE, target) == 1
+    stored = await seeded.get(WORKSPACE, dependent["_id"])
+    assert stored["dependsOn"] == [kept]
+    assert stored["version"] == 3
+    # Otro espacio no cambia
+    assert (await seeded.get(OTHER_WORKSPACE, other["_id"]))["dependsOn"] == [target]
+    assert await seeded.remove_dependency(WORKSPACE, target) == 0
@@ -0,0 +1,139 @@
+"""
+Pruebas aleatorias del índice de calendario y de las ventanas de conflicto
+frente a una construcción desde cero y un cálculo por fuerza bruta.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.conflict_service import find_conflicts
+from app.services.schedule_index import DAY_SECONDS, WorkspaceSchedule, day_edges
+
+HOUR = 3600.0
+DAYS = 20
+
+
+def random_interval(rng: random.Random):
+    # Horas enteras: abundan los inicios y fines repetidos
+    start = rng.randrange(DAYS * 24) * HOUR
+    end = start + rng.randint(1, 96) * HOUR
+    hours = rng.choice([0.5, 1, 2, 4, 8, 16])
+    return start, end, hours / (end - start)
+
+
+def structure(schedule: WorkspaceSchedule) -> dict:
+    """Contenido del índice, con las horas redondeadas (el orden de las sumas cambia)."""
+    def rounded(entries: dict) -> dict:
+        return {key: (n, count, round(hours, 6)) for key, (n, count, hours) in entries.items()}
+    return {
+        "tasks": dict(schedule.tasks),
+        "diffs": rounded(schedule._diffs),
+        "tree": rounded(schedule._tree),
+        "spans": schedule._spans,
+        "by_start": schedule._by_start,
+    }
+
+
+def brute_force_daily(tasks: dict, edges: np.ndarray):
+    load, active = [], []
+    for day_start, day_end in zip(edges[:-1], edges[1:]):
+        overlaps = [
+            (min(end, day_end) - max(start, day_start)) * rate
+            for start, end, rate in tasks.values()
+            if start < day_end and end > day_start
+        ]
+        load.append(sum(overlaps))
+        active.append(len(overlaps))
+    return np.array(load), np.array(active)
+
+
+def brute_force_conflicts(tasks: dict, edges: np.ndarray, capacity: float):
+    load, active = brute_force_daily(tasks, edges)
+    overloaded = [l > capacity + 1e-9 and a >= 2 for l, a in zip(load, active)]
+    windows = []
+    day = 0
+    while day < len(overloaded):
+        if not overloaded[day]:
+            day += 1
+            continue
+        first = day
+        while day < len(overloaded) and overloaded[day]:
+            day += 1
+        start, end = edges[first], edges[day]
+        members = sorted(
+            task_id for task_id, (task_start, task_end, _) in tasks.items()
+            if task_start < end and task_end > start
+        )
+        windows.append((start, end, max(load[first:day]), members))
+    return windows
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_matches_rebuilt(seed):
+    rng = random.Random(seed)
+    tasks = {f"t{i}": random_interval(rng) for i in range(30)}
+    schedule = WorkspaceSchedule(dict(tasks))
+    for step in range(300):
+        task_id = f"t{rng.randrange(45)}"
+        if rng.random() < 0.3:
+            schedule.put(task_id, None)
+            tasks.pop(task_id, None)
+        else:
+            # A veces con el mismo inicio o fin que otra tarea
+            interval = random_interval(rng)
+            if tasks and rng.random() < 0.3:
+                start, end, _ = rng.choice(list(tasks.values()))
+                interval = (start, end, interval[2])
+            schedule.put(task_id, interval)
+            tasks[task_id] = interval
+        if step % 25 == 0:
+            edges = day_edges(0, DAYS * DAY_SECONDS)
+            load, active = schedule.daily(edges)
+            expected_load, expected_active = brute_force_daily(tasks, edges)
+            np.testing.assert_allclose(load, expected_load, atol=1e-9)
+            assert active.tolist() == expected_active.tolist()
+    assert structure(schedule) == structure(WorkspaceSchedule(dict(tasks)))
+    assert len(schedule) == len(tasks)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_conflict_windows_match_brute_force(seed):
+    rng = random.Random(100 + seed)
+    tasks = {f"t{i}": random_interval(rng) for i in range(rng.randint(0, 40))}
+    schedule = WorkspaceSchedule(dict(tasks))
+    edges = day_edges(rng.randrange(5) * DAY_SECONDS, (DAYS + 3) * DAY_SECONDS)
+    capacity = rng.choice([2.0, 4.0, 8.0])
+
+    windows = find_conflicts(schedule, edges, capacity)
+    expected = brute_force_conflicts(tasks, edges, capacity)
+    assert [(start, end) for start, end, _, _ in windows] == [(start, end) for start, end, _, _ in expected]
+    assert [sorted(members) for _, _, _, members in windows] == [members for _, _, _, members in expected]
+    np.testing.assert_allclose(
+        [peak for _, _, peak, _ in windows], [peak for _, _, peak, _ in expected], atol=1e-9
+    )
+
+
+def test_conflict_header_only_when_the_schedule_changes(client):
+    def create(title):
+        response = client.post("/tasks/", json={
+            "title": title,
+            "startDateTime": "2025-01-20T00:00:00Z",
+            "endDateTime": "2025-01-21T00:00:00Z",
+            "estimatedHours": 6
+        })
+        assert response.status_code == 201, response.text
+        return response
+
+    first = create("Primera")
+    assert "X-Schedule-Conflicts" not in first.headers
+    second = create("Segunda")
+    assert second.headers["X-Schedule-Conflicts"] == first.json()["id"]
+
+    task_id = second.json()["id"]
+    # Un cambio de estado no mueve la tarea: no se comprueba
+    response = client.put(f"/tasks/{task_id}", json={"completed": False})
+    assert response.status_code == 200
+    assert "X-Schedule-Conflicts" not in response.headers
+    response = client.put(f"/tasks/{task_id}", json={"estimatedHours": 5})
+    assert response.headers["X-Schedule-Conflicts"] == first.json()["id"]
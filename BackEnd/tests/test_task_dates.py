@@ -0,0 +1,94 @@
+"""
+Formato de las fechas en la API: se aceptan con o sin zona y se devuelven
+siempre en UTC sin zona, truncadas a milisegundos, como el ISO 8601 que la
+API ha devuelto siempre (`datetime.isoformat()` de lo que guarda MongoDB).
+"""
+import re
+
+import pytest
+
+STORED_FORMAT = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{3}000)?$")
+
+
+@pytest.mark.parametrize("start, end, expected_start, expected_end", [
+    # Sin zona: se interpreta como UTC
+    ("2025-01-20T09:00:00", "2025-01-20T10:00:00", "2025-01-20T09:00:00", "2025-01-20T10:00:00"),
+    ("2025-01-20T09:00:00Z", "2025-01-20T10:00:00Z", "2025-01-20T09:00:00", "2025-01-20T10:00:00"),
+    # Con desplazamiento: se convierte a UTC
+    ("2025-01-20T09:00:00+02:00", "2025-01-20T10:30:00+02:00", "2025-01-20T07:00:00", "2025-01-20T08:30:00"),
+    ("2025-01-20T23:30:00-03:00", "2025-01-21T01:00:00-03:00", "2025-01-21T02:30:00", "2025-01-21T04:00:00"),
+    # Fracciones de segundo: se truncan a milisegundos
+    ("2025-01-20T09:00:00.123456Z", "2025-01-20T09:00:00.9999+00:00", "2025-01-20T09:00:00.123000", "2025-01-20T09:00:00.999000"),
+    ("2025-01-20T09:00:00.5", "2025-01-20T10:00:01.000+01:00", "2025-01-20T09:00:00.500000", "2025-01-20T09:00:01"),
+])
+def test_dates_round_trip(client, start, end, expected_start, expected_end):
+    response = client.post("/tasks/", json={
+        "title": "Fechas", "startDateTime": start, "endDateTime": end, "estimatedHours": 1
+    })
+    assert response.status_code == 201, response.text
+    created = response.json()
+    assert (created["startDateTime"], created["endDateTime"]) == (expected_start, expected_end)
+    assert STORED_FORMAT.match(created["created_at"])
+    assert STORED_FORMAT.match(created["updated_at"])
+
+    fetched = client.get(f"/tasks/{created['id']}").json()
+    assert (fetched["startDateTime"], fetched["endDateTime"]) == (expected_start, expected_end)
+    listed = client.get("/tasks/", params={"view": "summary"}).json()
+    assert [(t["startDateTime"], t["endDateTime"]) for t in listed] == [(expected_start, expected_end)]
+
+
+def test_update_dates_round_trip(client):
+    created = client.post("/tasks/", json={
+        "title": "Fechas",
+        "startDateTime": "2025-01-20T09:00:00Z",
+        "endDateTime": "2025-01-20T10:00:00Z",
+        "estimatedHours": 1
+    }).json()
+    response = client.put(f"/tasks/{created['id']}", json={"endDateTime": "2025-01-20T14:15:30.250+02:00"})
+    assert response.status_code == 200, response.text
+    updated = response.json()
+    assert updated["startDateTime"] == "2025-01-20T09:00:00"
+    assert updated["endDateTime"] == "2025-01-20T12:15:30.250000"
+    assert STORED_FORMAT.match(updated["updated_at"])
+    # El fin con zona se compara con el inicio guardado sin zona (08:00 UTC < 09:00)
+    response = client.put(f"/tasks/{created['id']}", json={"endDateTime": "2025-01-20T10:00:00+02:00"})
+    assert response.status_code != 200
+    assert client.get(f"/tasks/{created['id']}").json()["endDateTime"] == "2025-01-20T12:15:30.250000"
+
+
+def test_workload_dates_match_task_dates(client):
+    client.post("/tasks/", json={
+        "title": "Carga",
+        "startDateTime": "2025-01-20T09:00:00+02:00",
+        "endDateTime": "2025-01-21T10:00:00+02:00",
+        "estimatedHours": 4
+    })
+    response = client.get("/tasks/workload", params={
+        "from": "2025-01-20T10:30:00+01:00", "to": "2025-01-22T00:00:00Z"
+    })
+    assert response.status_code == 200, response.text
+    workload = response.json()
+    assert (workload["start"], workload["end"]) == ("2025-01-20T00:00:00", "2025-01-22T00:00:00")
+    assert [(b["start"], b["end"]) for b in workload["buckets"]] == [
+        ("2025-01-20T00:00:00", "2025-01-21T00:00:00"),
+        ("2025-01-21T00:00:00", "2025-01-22T00:00:00"),
+    ]
+
+
+def test_conflict_dates_match_task_dates(client):
+    for title in ("Primera", "Segunda"):
+        client.post("/tasks/", json={
+            "title": title,
+            "startDateTime": "2025-01-20T01:00:00+01:00",
+            "endDateTime": "2025-01-21T00:00:00Z",
+            "estimatedHours": 6
+        })
+    response = client.get("/tasks/conflicts", params={
+        "from": "2025-01-19T12:00:00Z", "to": "2025-01-23T00:00:00+01:00"
+    })
+    assert response.status_code == 200, response.text
+    conflicts = response.json()
+    assert (conflicts["start"], conflicts["end"]) == ("2025-01-19T00:00:00", "2025-01-23T00:00:00")
+    assert [(c["start"], c["end"]) for c in conflicts["conflicts"]] == [
+        ("2025-01-20T00:00:00", "2025-01-21T00:00:00")
+    ]
@@ -0,0 +1,119 @@
+"""
+Pruebas de `task_service` sobre el backend en memoria.
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.models.task import TaskCreate, TaskUpdate
+from app.services import task_service
+from app.services.schedule_index import schedule_index
+from app.services.dependency_service import TaskDependencyError
+from app.services.title_index import title_index
+from app.services.write_behind import task_write_buffer
+from tests.conftest import WORKSPACE, make_task
+
+pytestmark = pytest.mark.anyio
+
+
+def new_task(now, title="Tarea") -> TaskCreate:
+    return TaskCreate(
+        title=title,
+        startDateTime=now,
+        endDateTime=now + timedelta(hours=2),
+        estimatedHours=2
+    )
+
+
+async def test_count_is_cached_until_a_write(storage, now):
+    await task_service.create_task_service(WORKSPACE, new_task(now))
+    assert await task_service.count_tasks_service(WORKSPACE) == 1
+    # Escritura que no pasa por el servicio: se sigue usando el total guardado
+    await storage.insert_many([make_task("Externa", now, now + timedelta(hours=1), 1, now)])
+    assert await task_service.count_tasks_service(WORKSPACE) == 1
+    await task_service.create_task_service(WORKSPACE, new_task(now))
+    assert await task_service.count_tasks_service(WORKSPACE) == 3
+
+
+async def test_count_in_flight_during_a_write_is_not_cached(storage, now, monkeypatch):
+    await task_service.create_task_service(WORKSPACE, new_task(now))
+    counted = asyncio.Event()
+    release = asyncio.Event()
+    count = storage.count
+
+    async def slow_count(query):
+        total = await count(query)
+        counted.set()
+        await release.wait()
+        return total
+
+    monkeypatch.setattr(storage, "count", slow_count)
+    in_flight = asyncio.create_task(task_service.count_tasks_service(WORKSPACE))
+    await counted.wait()
+    await task_service.create_task_service(WORKSPACE, new_task(now))
+    release.set()
+    # El recuento empezó antes de la escritura: su valor no se guarda
+    assert await in_flight == 1
+    monkeypatch.setattr(storage, "count", count)
+    assert await task_service.count_tasks_service(WORKSPACE) == 2
+
+
+async def test_index_failure_after_a_write_keeps_the_task(storage, now, monkeypatch):
+    await task_service.create_task_service(WORKSPACE, new_task(now))
+    schedule = await schedule_index.get(WORKSPACE)
+    assert len(schedule) == 1
+
+    def broken(workspace_id, doc):
+        raise RuntimeError("índice roto")
+
+    monkeypatch.setattr(title_index, "apply", broken)
+    created = await task_service.create_task_service(WORKSPACE, new_task(now, "Segunda"))
+    # La tarea ya está guardada: se devuelve y los índices del espacio se descartan
+    assert created is not None
+    assert await storage.get(WORKSPACE, ObjectId(created.id)) is not None
+    assert schedule_index._workspaces.get(WORKSPACE) is None
+    assert len(await schedule_index.get(WORKSPACE)) == 2
+
+
+async def test_write_behind_flush_clears_counts_and_refreshes_indexes(storage, now, monkeypatch):
+    monkeypatch.setattr(task_write_buffer, "window", 60.0)
+    created = await task_service.create_task_service(WORKSPACE, new_task(now))
+    assert len(await schedule_index.get(WORKSPACE)) == 1
+    assert len(await title_index.get(WORKSPACE)) == 1
+    await task_service.update_task_service(WORKSPACE, created.id, TaskUpdate(completed=True))
+    # Recuento dentro de la ventana: el almacenamiento aún no tiene el cambio
+    assert await task_service.count_tasks_service(WORKSPACE, completed=True) == 0
+    # Otro worker cambia el título antes de la escritura del lote
+    await storage.update(WORKSPACE, ObjectId(created.id), {"title": "Renombrada"})
+    await task_write_buffer.flush()
+    assert await task_service.count_tasks_service(WORKSPACE, completed=True) == 1
+    # Los índices reflejan lo guardado, no solo el estado encolado
+    titles = await title_index.get(WORKSPACE)
+    assert [s.title for s in titles.search("renombrada", 5)] == ["Renombrada"]
+    assert created.id not in (await schedule_index.get(WORKSPACE)).tasks
+
+
+async def test_delete_removes_the_task_from_dependents(storage, now):
+    first = await task_service.create_task_service(WORKSPACE, new_task(now, "Primera"))
+    second = await task_service.create_task_service(
+        WORKSPACE, new_task(now, "Segunda").model_copy(update={"dependsOn": [first.id]})
+    )
+    assert await task_service.delete_task_service(WORKSPACE, first.id)
+    stored = await task_service.get_task_by_id_service(WORKSPACE, second.id)
+    assert stored.dependsOn == []
+    assert stored.version == second.version + 1
+
+
+async def test_stored_dependencies_are_accepted_again(storage, now):
+    missing = str(ObjectId())
+    doc = make_task("Con dependencia perdida", now, now + timedelta(hours=1), 1, now)
+    doc["dependsOn"] = [ObjectId(missing)]
+    await storage.insert_many([doc])
+    task_id = str(doc["_id"])
+    # Reenviar el `dependsOn` que ya tiene la tarea no falla
+    updated = await task_service.update_task_service(WORKSPACE, task_id, TaskUpdate(dependsOn=[missing]))
+    assert updated.dependsOn == [missing]
+    with pytest.raises(TaskDependencyError):
+        await task_service.update_task_service(WORKSPACE, task_id, TaskUpdate(dependsOn=[str(ObjectId())]))
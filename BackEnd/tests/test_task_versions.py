@@ -0,0 +1,100 @@
+"""
+Contrato HTTP de las versiones de las tareas: ETag en las respuestas,
+`If-Match` y `expectedVersion` como condición de la actualización y 409 con
+la versión actual cuando la tarea ya cambió.
+"""
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.services.write_behind import task_write_buffer
+from tests.conftest import WORKSPACE
+
+TASK = {
+    "title": "Versionada",
+    "startDateTime": "2025-01-20T09:00:00",
+    "endDateTime": "2025-01-20T10:00:00",
+    "estimatedHours": 1
+}
+
+
+def create(client) -> dict:
+    response = client.post("/tasks/", json=TASK)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_post_and_put_return_etag(client):
+    response = client.post("/tasks/", json=TASK)
+    assert response.status_code == 201, response.text
+    assert response.headers["ETag"] == '"1"'
+    task_id = response.json()["id"]
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "Renombrada"})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["version"] == 2
+    assert client.get(f"/tasks/{task_id}").headers["ETag"] == '"2"'
+
+
+@pytest.mark.parametrize("if_match", ['"1"', 'W/"1"', "1", "*"])
+def test_put_with_current_if_match(client, if_match):
+    task_id = create(client)["id"]
+    response = client.put(f"/tasks/{task_id}", json={"title": "Renombrada"}, headers={"If-Match": if_match})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] == '"2"'
+
+
+def test_put_with_stale_if_match_conflicts(client):
+    task_id = create(client)["id"]
+    assert client.put(f"/tasks/{task_id}", json={"title": "Primera"}).status_code == 200
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "Segunda"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 409, response.text
+    assert response.headers["ETag"] == '"2"'
+    assert client.get(f"/tasks/{task_id}").json()["title"] == "Primera"
+
+    # Con el ETag del 409 la actualización se aplica
+    response = client.put(f"/tasks/{task_id}", json={"title": "Segunda"}, headers={"If-Match": response.headers["ETag"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Segunda"
+
+
+def test_put_with_stale_expected_version_conflicts(client):
+    task_id = create(client)["id"]
+    assert client.put(f"/tasks/{task_id}", json={"title": "Primera"}).status_code == 200
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "Segunda", "expectedVersion": 1})
+    assert response.status_code == 409, response.text
+    assert response.headers["ETag"] == '"2"'
+
+
+@pytest.mark.parametrize("if_match, body, status", [
+    # If-Match y expectedVersion que no coinciden
+    ('"1"', {"title": "Otra", "expectedVersion": 2}, 400),
+    # Que coinciden: se aplica
+    ('"1"', {"title": "Otra", "expectedVersion": 1}, 200),
+    # If-Match mal formado
+    ('"uno"', {"title": "Otra"}, 400),
+])
+def test_put_if_match_validation(client, if_match, body, status):
+    task_id = create(client)["id"]
+    response = client.put(f"/tasks/{task_id}", json=body, headers={"If-Match": if_match})
+    assert response.status_code == status, response.text
+    expected_title = "Otra" if status == 200 else TASK["title"]
+    assert client.get(f"/tasks/{task_id}").json()["title"] == expected_title
+
+
+def test_if_match_skips_write_behind(client, storage, monkeypatch):
+    monkeypatch.setattr(task_write_buffer, "window", 60.0)
+    task_id = create(client)["id"]
+
+    response = client.put(f"/tasks/{task_id}", json={"completed": True}, headers={"If-Match": '"1"'})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] == '"2"'
+    # La actualización condicionada se escribe al momento, sin pasar por el lote
+    key = (WORKSPACE, ObjectId(task_id))
+    assert task_write_buffer.peek(key) is None
+    stored = asyncio.run(storage.get(*key))
+    assert (stored["completed"], stored["version"]) == (True, 2)
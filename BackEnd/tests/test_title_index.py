@@ -0,0 +1,143 @@
+"""
+Pruebas aleatorias del índice de títulos frente a una construcción desde
+cero y a una búsqueda y una distancia de edición por fuerza bruta.
+"""
+import random
+
+import pytest
+
+from app.services import title_index as title_module
+from app.services.title_index import TitleIndex, allowed_edits, edit_distance, normalize_words
+
+# Alfabeto corto: abundan las palabras con prefijos comunes y las erratas
+LETTERS = "abcde"
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(LETTERS) for _ in range(rng.randint(1, 8)))
+
+
+def random_title(rng: random.Random, vocabulary: list) -> str:
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 4))]
+    if rng.random() < 0.3:
+        words[0] = words[0].capitalize()
+    return " ".join(words)
+
+
+def structure(index: TitleIndex) -> dict:
+    return {
+        "tasks": dict(index.tasks),
+        "words": list(index._words),
+        "by_word": {word: set(tasks) for word, tasks in index._by_word.items()},
+        "by_trigram": {gram: set(words) for gram, words in index._by_trigram.items()},
+    }
+
+
+def reference_distance(a: str, b: str) -> int:
+    """Damerau-Levenshtein con transposiciones contiguas, tabla completa."""
+    table = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            table[i][j] = min(
+                table[i - 1][j] + 1,
+                table[i][j - 1] + 1,
+                table[i - 1][j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                table[i][j] = min(table[i][j], table[i - 2][j - 2] + 1)
+    return table[-1][-1]
+
+
+def brute_force_exact(tasks: dict, words: list) -> set:
+    """Tareas con todas las palabras de la consulta (la última, como prefijo)."""
+    *complete, last = words
+    return {
+        task_id for task_id, title in tasks.items()
+        for title_words in (normalize_words(title),)
+        if all(word in title_words for word in complete)
+        and any(title_word.startswith(last) for title_word in title_words)
+    }
+
+
+def matches_with_typos(title_words: list, words: list) -> bool:
+    """Cada palabra de la consulta está en el título con las erratas toleradas."""
+    for i, typed in enumerate(words):
+        partial = i == len(words) - 1
+        edits = allowed_edits(typed)
+        if not any(
+            min(reference_distance(typed, word[:k]) for k in range(len(word) + 1)) <= edits
+            if partial else reference_distance(typed, word) <= edits
+            for word in title_words
+        ):
+            return False
+    return True
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_edit_distance_matches_reference(seed):
+    rng = random.Random(seed)
+    for _ in range(300):
+        typed, word = random_word(rng), random_word(rng)
+        expected = reference_distance(typed, word)
+        assert edit_distance(typed, word) == expected
+        bound = rng.randint(0, 3)
+        assert edit_distance(typed, word, bound=bound) == min(expected, bound + 1)
+        prefix = min(reference_distance(typed, word[:k]) for k in range(len(word) + 1))
+        assert edit_distance(typed, word, prefix=True, bound=bound) == min(prefix, bound + 1)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_matches_rebuilt(seed):
+    rng = random.Random(seed)
+    vocabulary = [random_word(rng) for _ in range(30)]
+    tasks = {f"t{i}": (random_title(rng, vocabulary), rng.random() < 0.2) for i in range(20)}
+    index = TitleIndex.from_docs([
+        {"_id": task_id, "title": title, "completed": completed}
+        for task_id, (title, completed) in tasks.items()
+    ])
+    for _ in range(300):
+        task_id = f"t{rng.randrange(40)}"
+        if rng.random() < 0.3:
+            index.remove(task_id)
+            tasks.pop(task_id, None)
+            continue
+        # A veces solo cambia el estado y se conserva el título
+        title = tasks[task_id][0] if task_id in tasks and rng.random() < 0.3 else random_title(rng, vocabulary)
+        completed = rng.random() < 0.2
+        index.put(task_id, title, completed)
+        tasks[task_id] = (title, completed)
+    rebuilt = TitleIndex.from_docs([
+        {"_id": task_id, "title": title, "completed": completed}
+        for task_id, (title, completed) in tasks.items()
+    ])
+    assert structure(index) == structure(rebuilt)
+    assert len(index) == len(tasks)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_search_matches_brute_force(seed, monkeypatch):
+    # Sin tope de candidatas la búsqueda exacta debe ser completa
+    monkeypatch.setattr(title_module.title_settings, "suggest_max_candidates", 10_000)
+    rng = random.Random(200 + seed)
+    vocabulary = [random_word(rng) for _ in range(40)]
+    tasks = {f"t{i}": random_title(rng, vocabulary) for i in range(60)}
+    index = TitleIndex.from_docs([{"_id": task_id, "title": title} for task_id, title in tasks.items()])
+
+    for _ in range(40):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 3))]
+        # La última palabra, a medio escribir o con una errata
+        last = words[-1][:rng.randint(1, len(words[-1]))]
+        if rng.random() < 0.4 and len(last) > 1:
+            position = rng.randrange(len(last))
+            last = last[:position] + rng.choice(LETTERS) + last[position + 1:]
+        words[-1] = last
+
+        results = index.search(" ".join(words), limit=len(tasks))
+        scores = [suggestion.score for suggestion in results]
+        assert scores == sorted(scores, reverse=True)
+        assert len({suggestion.task_id for suggestion in results}) == len(results)
+        assert {s.task_id for s in results if s.score == 1} == brute_force_exact(tasks, words)
+        for suggestion in results:
+            assert suggestion.title == tasks[suggestion.task_id]
+            assert 0 < suggestion.score <= 1
+            assert matches_with_typos(normalize_words(suggestion.title), words)
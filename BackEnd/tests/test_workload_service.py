@@ -0,0 +1,23 @@
+"""
+Pruebas de la conversión de fechas de la carga de trabajo.
+"""
+import random
+from datetime import datetime, timedelta
+
+from app.services.workload_service import to_seconds
+
+
+def test_to_seconds_matches_timedelta_arithmetic():
+    rng = random.Random(3)
+    values = [
+        datetime(2025, 1, 1) + timedelta(seconds=rng.randrange(10 ** 8), microseconds=rng.randrange(10 ** 6))
+        for _ in range(1000)
+    ] + [datetime(1970, 1, 1), datetime(1969, 12, 31, 23, 59, 59, 500000)]
+    expected = [(value - datetime(1970, 1, 1)).total_seconds() for value in values]
+    assert to_seconds(values).tolist() == expected
+
+
+def test_to_seconds_of_nothing():
+    seconds = to_seconds([])
+    assert seconds.shape == (0,)
+    assert seconds.dtype.name == "float64"
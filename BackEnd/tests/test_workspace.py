@@ -0,0 +1,31 @@
+"""
+Pruebas de la cabecera X-Workspace-Id.
+"""
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from main import app
+
+
+def test_missing_workspace_is_rejected(storage):
+    response = TestClient(app).get("/tasks/")
+    assert response.status_code == 401
+
+
+def test_invalid_workspace_is_rejected(storage):
+    response = TestClient(app, headers={"X-Workspace-Id": "a/b"}).get("/tasks/")
+    assert response.status_code == 400
+
+
+def test_default_workspace_when_not_required(storage, monkeypatch):
+    monkeypatch.setattr(deps.identity_settings, "require_workspace", False)
+    body = {
+        "title": "Sin espacio",
+        "startDateTime": "2025-01-20T09:00:00",
+        "endDateTime": "2025-01-21T09:00:00",
+        "estimatedHours": 2
+    }
+    assert TestClient(app).post("/tasks/", json=body).status_code == 201
+    default = TestClient(app, headers={"X-Workspace-Id": "default"}).get("/tasks/").json()
+    assert [task["title"] for task in default] == ["Sin espacio"]
+    assert TestClient(app, headers={"X-Workspace-Id": "ws"}).get("/tasks/").json() == []
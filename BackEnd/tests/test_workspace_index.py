@@ -0,0 +1,43 @@
+"""
+Pruebas de la construcción de los índices en memoria por espacio.
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app.services.schedule_index import schedule_index
+from tests.conftest import OTHER_WORKSPACE, WORKSPACE, make_task
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_slow_workspace_does_not_block_others(storage, now, monkeypatch):
+    await storage.insert_many([
+        make_task("Lenta", now, now + timedelta(days=1), 4, now),
+        make_task("Rápida", now, now + timedelta(days=1), 4, now, workspace_id=OTHER_WORKSPACE),
+    ])
+    release = asyncio.Event()
+    scans = []
+    scan = storage.scan
+
+    async def slow_scan(query, projection):
+        scans.append(query.workspace_id)
+        if query.workspace_id == WORKSPACE:
+            await release.wait()
+        return await scan(query, projection)
+
+    monkeypatch.setattr(storage, "scan", slow_scan)
+    slow = [asyncio.create_task(schedule_index.get(WORKSPACE)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    other = await asyncio.wait_for(schedule_index.get(OTHER_WORKSPACE), timeout=1)
+    assert len(other) == 1
+    assert not any(task.done() for task in slow)
+
+    release.set()
+    built = await asyncio.gather(*slow)
+    # Las consultas simultáneas del mismo espacio comparten una construcción
+    assert all(index is built[0] for index in built)
+    assert scans == [WORKSPACE, OTHER_WORKSPACE]
+    assert schedule_index._build_locks == {}
@@ -0,0 +1,94 @@
+"""
+Pruebas de la escritura diferida con cambios concurrentes de otro worker.
+"""
+from datetime import timedelta
+
+import pytest
+
+from app.services.write_behind import TaskWriteBuffer
+from tests.conftest import WORKSPACE, make_task
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def task(storage, now):
+    doc = make_task("Checklist", now, now + timedelta(days=1), 2, now, subtasks=[(1, False)])
+    await storage.insert_many([dict(doc)])
+    return doc
+
+
+@pytest.fixture
+async def buffer():
+    # Ventana larga: las pruebas escriben con flush
+    buffer = TaskWriteBuffer(window_ms=60_000, max_batch=100)
+    yield buffer
+    await buffer.close()
+
+
+def done_subtasks(doc: dict) -> list:
+    return [{**subtask, "completed": True} for subtask in doc["subtasks"]]
+
+
+async def stage(buffer: TaskWriteBuffer, storage, doc: dict, fields: dict, at=None) -> dict:
+    key = (WORKSPACE, doc["_id"])
+    base = buffer.peek(key) or await storage.get(*key)
+    return buffer.stage(key, base, {**fields, "updated_at": at or doc["updated_at"]})
+
+
+async def test_batched_changes_count_as_versions(storage, buffer, task):
+    await stage(buffer, storage, task, {"completed": True})
+    merged = await stage(buffer, storage, task, {"subtasks": done_subtasks(task)})
+    assert merged["version"] == 3
+    await buffer.flush()
+    stored = await storage.get(WORKSPACE, task["_id"])
+    assert stored["completed"] is True
+    assert stored["subtasks"][0]["completed"] is True
+    assert stored["version"] == 3
+
+
+async def test_keeps_fields_changed_by_another_worker(storage, buffer, task):
+    await stage(buffer, storage, task, {"subtasks": done_subtasks(task)})
+    # PUT atendido por otro worker antes de la escritura del lote
+    await storage.update(WORKSPACE, task["_id"], {"title": "Renamed", "completed": True})
+    await buffer.flush()
+    stored = await storage.get(WORKSPACE, task["_id"])
+    assert (stored["title"], stored["completed"]) == ("Renamed", True)
+    assert stored["subtasks"][0]["completed"] is True
+    assert stored["version"] == 3
+
+
+async def test_does_not_overwrite_a_newer_change_of_the_same_field(storage, buffer, task, now):
+    await stage(buffer, storage, task, {"subtasks": done_subtasks(task)}, at=now)
+    newer = [{**task["subtasks"][0], "title": "Renamed"}]
+    await storage.update(WORKSPACE, task["_id"], {"subtasks": newer, "updated_at": now + timedelta(seconds=1)})
+    await buffer.flush()
+    stored = await storage.get(WORKSPACE, task["_id"])
+    assert stored["subtasks"] == newer
+    assert stored["version"] == 2
+
+
+async def test_last_writer_wins_over_an_older_change_of_the_same_field(storage, buffer, task, now):
+    written = []
+    buffer.on_write(lambda key, doc: written.append(doc))
+    await stage(buffer, storage, task, {"completed": True}, at=now + timedelta(seconds=2))
+    # Otro worker escribe después de encolar, pero con un cambio anterior
+    await storage.update(WORKSPACE, task["_id"], {
+        "completed": False, "title": "Renamed", "updated_at": now + timedelta(seconds=1)
+    })
+    await buffer.flush()
+    stored = await storage.get(WORKSPACE, task["_id"])
+    assert (stored["completed"], stored["title"]) == (True, "Renamed")
+    assert stored["version"] == 3
+    assert [(doc["completed"], doc["title"]) for doc in written] == [(True, "Renamed")]
+
+
+async def test_task_deleted_by_another_worker_is_skipped(storage, buffer, task):
+    await stage(buffer, storage, task, {"completed": True})
+    await storage.delete(WORKSPACE, task["_id"])
+    written = []
+    buffer.on_write(lambda key, doc: written.append(doc))
+    await buffer.flush()
+    assert written == [None]
+    assert await storage.get(WORKSPACE, task["_id"]) is None
+    assert buffer.peek((WORKSPACE, task["_id"])) is None
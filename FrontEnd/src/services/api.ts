@@ -4,6 +4,8 @@
  */
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+// Espacio de trabajo de las tareas (cabecera X-Workspace-Id)
+const WORKSPACE_ID = import.meta.env.VITE_WORKSPACE_ID || 'default';
 
 export interface ApiError {
   detail: string;
@@ -33,6 +35,7 @@ async function fetchApi<T>(
   
   const defaultHeaders: HeadersInit = {
     'Content-Type': 'application/json',
+    'X-Workspace-Id': WORKSPACE_ID,
   };
 
   const response = await fetch(url, {